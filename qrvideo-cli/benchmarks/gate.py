@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Benchmark gate: throughput and peak memory of the batch operations
+
+Runs each batch operation against a local stand-in server
+(benchmarks/standin.py) and records its wall time, operations per second,
+peak traced memory (tracemalloc) and peak RSS growth (sampled every few
+milliseconds). Every operation runs in a fresh process with its own empty
+home directory, so one operation's memory or tuned page sizes never
+affect the next.
+
+Timing samples do not trace allocations; one extra run with tracemalloc
+measures the peak heap. Each of the --repeat timing samples repeats the
+operation for at least --min-time seconds, and the median sample is kept,
+so one slow or fast sample (a scheduler hiccup, a warm cache) does not
+move the result. An operation that regresses is measured again (up to
+--retries times) and only fails the gate if every measurement regresses,
+which rides out a machine that is briefly slower as a whole.
+
+Results are compared with a JSON baseline. The gate fails (exit status 1)
+when an operation's throughput drops or its peak memory grows by more
+than the tolerance. Memory changes smaller than --memory-floor are ignored
+whatever their relative size: growth of a few hundred KB on a 1-2 MB peak
+is allocator and sampling noise. Without a baseline, or with --update,
+the results are written as the new baseline. Baselines are
+machine-specific: record one on the machine that runs the gate.
+
+Usage:
+    python benchmarks/gate.py [--baseline FILE] [--update] [--only OPERATION]...
+                              [--repeat 5] [--min-time 2.0] [--retries 1] [--scale 1.0]
+                              [--tolerance 0.10] [--memory-tolerance 0.10] [--memory-floor 2.0]
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from qrvideo_cli import batch
+from qrvideo_cli.api import QRVideoClient
+
+
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+
+#: Operation -> stand-in dataset and work size at scale 1
+OPERATIONS = {
+    "export-videos": {"videos": 20000, "qrcodes": 0},
+    "export-qrcodes": {"videos": 100, "qrcodes": 50000},
+    "download-all": {"videos": 10, "qrcodes": 500},
+    "bulk-create": {"videos": 10, "qrcodes": 0, "rows": 500},
+    "bulk-upload": {"videos": 1, "qrcodes": 0, "files": 16, "file_mb": 4, "workers": 4},
+}
+
+#: Metric -> (direction, tolerance argument, absolute floor argument or None);
+#: "higher" metrics must not drop
+METRICS = {
+    "ops_per_s": ("higher", "tolerance", None),
+    "peak_traced_bytes": ("lower", "memory_tolerance", "memory_floor"),
+    "peak_rss_bytes": ("lower", "memory_tolerance", "memory_floor"),
+}
+
+# Seconds between RSS samples
+_RSS_INTERVAL = 0.005
+
+
+def _rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """Background thread tracking the peak RSS while a block runs"""
+
+    def __init__(self):
+        self.start_rss = 0
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        while not self._stop.wait(_RSS_INTERVAL):
+            self.peak_rss = max(self.peak_rss, _rss())
+
+    def __enter__(self):
+        self.start_rss = self.peak_rss = _rss()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, _rss())
+
+    @property
+    def growth(self) -> int:
+        return self.peak_rss - self.start_rss
+
+
+def _prepare(name: str, client: QRVideoClient, work_dir: str, spec: Dict[str, Any]) -> Tuple[Callable[[], Any], int]:
+    """Set up one operation; returns (run, operations per run)"""
+    if name == "export-videos":
+        return lambda: batch.export_videos_to_csv(client, os.path.join(work_dir, "videos.csv")), spec["videos"]
+    if name == "export-qrcodes":
+        return lambda: batch.export_qrcodes_to_csv(client, os.path.join(work_dir, "qrcodes.csv")), spec["qrcodes"]
+    if name == "download-all":
+        return lambda: batch.download_all_qr_images(client, os.path.join(work_dir, "images")), spec["qrcodes"]
+    if name == "bulk-create":
+        video_ids = [video["id"] for video in client.list_videos(page=1, page_size=spec["videos"])["items"]]
+        csv_file = os.path.join(work_dir, "qrcodes.csv")
+        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["video_id", "description", "is_active"])
+            for i in range(spec["rows"]):
+                writer.writerow([video_ids[i % len(video_ids)], f"Benchmark {i}", "true"])
+        return lambda: batch.bulk_create_qrcodes_from_csv(client, csv_file), spec["rows"]
+    if name == "bulk-upload":
+        upload_dir = os.path.join(work_dir, "uploads")
+        os.makedirs(upload_dir)
+        block = os.urandom(1024 * 1024)
+        for i in range(spec["files"]):
+            with open(os.path.join(upload_dir, f"video-{i:03d}.mp4"), "wb") as f:
+                for _ in range(spec["file_mb"]):
+                    f.write(block)
+        return lambda: batch.bulk_upload_videos(client, upload_dir, workers=spec["workers"],
+                                                faststart=False, preflight=False), spec["files"]
+    raise ValueError(f"Unknown operation: {name}")
+
+
+def run_operation(name: str, api_url: str, spec: Dict[str, Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    """Measure one operation in this process (the --run-one child)"""
+    client = QRVideoClient(api_url)
+    client.token = "benchmark"
+
+    with tempfile.TemporaryDirectory(prefix="qrvideo-bench-") as work_dir:
+        run, operations = _prepare(name, client, work_dir, spec)
+        rates = []
+        peak_rss = 0
+        with open(os.devnull, "w") as devnull:
+            for _ in range(repeat):
+                with contextlib.redirect_stdout(devnull), RssSampler() as sampler:
+                    runs = 0
+                    started = time.perf_counter()
+                    while True:
+                        run()
+                        runs += 1
+                        elapsed = time.perf_counter() - started
+                        if elapsed >= min_time:
+                            break
+                rates.append(operations * runs / elapsed)
+                peak_rss = max(peak_rss, sampler.growth)
+
+            tracemalloc.start()
+            with contextlib.redirect_stdout(devnull):
+                run()
+            peak_traced = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    rate = statistics.median(rates)
+    return {
+        "operations": operations,
+        "wall_s": round(operations / rate, 4),
+        "ops_per_s": round(rate, 2),
+        "ops_per_s_spread": round((max(rates) - min(rates)) / rate, 3),
+        "peak_traced_bytes": peak_traced,
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+def _scaled(spec: Dict[str, Any], scale: float) -> Dict[str, Any]:
+    return {key: value if key in ("workers", "file_mb") else max(1, int(value * scale)) if value else 0
+            for key, value in spec.items()}
+
+
+def measure(name: str, spec: Dict[str, Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    """Start a stand-in with the operation's dataset and measure it in a fresh process"""
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARKS_DIR, "standin.py"),
+         "--videos", str(spec["videos"]), "--qrcodes", str(spec["qrcodes"])],
+        stdout=subprocess.PIPE, text=True
+    )
+    try:
+        port = int(server.stdout.readline())
+        with tempfile.TemporaryDirectory(prefix="qrvideo-bench-home-") as home:
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-one", name,
+                 "--api-url", f"http://127.0.0.1:{port}/api", "--spec", json.dumps(spec),
+                 "--repeat", str(repeat), "--min-time", str(min_time)],
+                env=dict(os.environ, HOME=home), capture_output=True, text=True
+            )
+        if child.returncode != 0:
+            raise RuntimeError(child.stderr.strip().splitlines()[-1] if child.stderr.strip()
+                               else f"exit status {child.returncode}")
+        return json.loads(child.stdout.strip().splitlines()[-1])
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(name: str, result: Dict[str, Any], baseline: Dict[str, Any], args) -> List[str]:
+    """Regressions of one operation against its baseline, as messages"""
+    regressions = []
+    for metric, (direction, tolerance_arg, floor_arg) in METRICS.items():
+        old, new = baseline.get(metric), result[metric]
+        if not old:
+            continue
+        if floor_arg and abs(new - old) < getattr(args, floor_arg):
+            continue
+        tolerance = getattr(args, tolerance_arg)
+        change = (new - old) / old
+        if (direction == "higher" and change < -tolerance) or (direction == "lower" and change > tolerance):
+            regressions.append(f"{name}: {metric} {old} -> {new} ({change * 100:+.1f}%, "
+                               f"tolerance {tolerance * 100:.0f}%)")
+    return regressions
+
+
+def _format_change(new: float, old: Optional[float]) -> str:
+    return f"{(new - old) / old * 100:+7.1f}%" if old else "       -"
+
+
+def _megabytes(value: str) -> float:
+    """argparse type for a size in MB, returned in bytes"""
+    return float(value) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file (default: benchmarks/baseline.json)")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--only", action="append", choices=list(OPERATIONS), help="Operation to run, repeatable")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timing samples per operation; the median is kept (default: 5)")
+    parser.add_argument("--min-time", type=float, default=2.0,
+                        help="Seconds each timing sample repeats the operation for (default: 2.0)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every dataset and work size (default: 1.0)")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed drop in operations per second (default: 0.10)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10,
+                        help="Allowed growth of peak memory (default: 0.10)")
+    parser.add_argument("--memory-floor", type=_megabytes, default=2e6, metavar="MB",
+                        help="Ignore peak memory changes smaller than this (default: 2.0)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Measure an operation again when it regresses; it fails only if every "
+                             "measurement does (default: 1)")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    parser.add_argument("--spec", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_operation(args.run_one, args.api_url, json.loads(args.spec), args.repeat,
+                                       args.min_time)))
+        return
+
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"✗ Baseline was recorded at --scale {baseline.get('scale')}, not {args.scale}")
+            sys.exit(1)
+
+    names = args.only or list(OPERATIONS)
+    results: Dict[str, Dict[str, Any]] = {}
+    regressions = []
+    print(f"{'Operation':<16}{'ops/s':>10}{'':>9}{'traced peak':>14}{'':>9}{'RSS peak':>12}{'':>9}")
+    for name in names:
+        spec = _scaled(OPERATIONS[name], args.scale)
+        old = baseline.get("results", {}).get(name, {})
+        found: List[str] = []
+        try:
+            for attempt in range(max(0, args.retries) + 1):
+                if attempt:
+                    print(f"  ⚠ {name}: {found[0].split(': ', 1)[1]}; measuring again")
+                result = measure(name, spec, max(1, args.repeat), max(0.0, args.min_time))
+                found = compare(name, result, old, args) if old and not args.update else []
+                if not found:
+                    break
+        except (RuntimeError, ValueError, OSError) as e:
+            print(f"✗ {name}: {e}")
+            regressions.append(f"{name}: failed to run")
+            continue
+        results[name] = result
+        regressions.extend(found)
+        print(f"{name:<16}{result['ops_per_s']:>10.1f}{_format_change(result['ops_per_s'], old.get('ops_per_s')):>9}"
+              f"{result['peak_traced_bytes'] / 1e6:>11.1f} MB"
+              f"{_format_change(result['peak_traced_bytes'], old.get('peak_traced_bytes')):>9}"
+              f"{result['peak_rss_bytes'] / 1e6:>9.1f} MB"
+              f"{_format_change(result['peak_rss_bytes'], old.get('peak_rss_bytes')):>9}")
+
+    print(f"\n{'='*60}")
+    print(f"Benchmark Gate Summary:")
+    if args.update or not baseline:
+        recorded = dict(baseline.get("results", {}), **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"scale": args.scale, "python": platform.python_version(), "machine": platform.machine(),
+                       "cpus": os.cpu_count(), "results": recorded}, f, indent=2)
+            f.write("\n")
+        print(f"  ✓ Baseline written to {args.baseline}")
+    if regressions:
+        for regression in regressions:
+            print(f"  ✗ {regression}")
+        sys.exit(1)
+    if baseline and not args.update:
+        print(f"  ✓ No regressions in {len(results)} operations")
+
+
+if __name__ == "__main__":
+    main()
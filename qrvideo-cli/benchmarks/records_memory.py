@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held by log rows as dicts vs slotted records
+
+Builds N synthetic play or scan log rows shaped like the API's JSON
+(a realistic number of videos, QR codes and client strings), decodes them
+page by page the way the client does, and reports the memory retained by
+the rows as dicts and as records, measured with tracemalloc.
+
+Usage:
+    python benchmarks/records_memory.py [--rows 1000000] [--kind plays|scans]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qrvideo_cli import jsonstream
+from qrvideo_cli.records import PlayLog, ScanLog
+
+
+PAGE_SIZE = 1000
+
+CLIENTS = [
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.5 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/126.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/125.0.0.0 Mobile Safari/537.36 MicroMessenger/8.0.49",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/126.0.0.0 Safari/537.36",
+]
+
+
+def make_pages(kind: str, rows: int, seed: int = 1):
+    """Yield encoded pages of synthetic log rows"""
+    rng = random.Random(seed)
+    videos = [(str(uuid.UUID(int=rng.getrandbits(128))), f"产品演示视频 {i}") for i in range(500)]
+    codes = [(str(uuid.UUID(int=rng.getrandbits(128))), f"{rng.getrandbits(40):010X}") for _ in range(5000)]
+    start = 1760000000.0
+    for first in range(0, rows, PAGE_SIZE):
+        items = []
+        for i in range(first, min(first + PAGE_SIZE, rows)):
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(start - i * 3)) + f".{i % 1000000:06d}Z"
+            if kind == "plays":
+                video_id, title = rng.choice(videos)
+                items.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "videoId": video_id,
+                              "videoTitle": title, "timestamp": stamp,
+                              "watchedDuration": f"00:00:{rng.randrange(60):02d}",
+                              "completed": rng.random() < 0.4, "clientInfo": rng.choice(CLIENTS)})
+            else:
+                qr_id, code = rng.choice(codes)
+                items.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "qrCodeId": qr_id,
+                              "codeValue": code, "timestamp": stamp, "success": True,
+                              "failReason": None, "clientInfo": rng.choice(CLIENTS)})
+        yield json.dumps({"items": items, "page": first // PAGE_SIZE + 1, "pageSize": PAGE_SIZE,
+                          "totalCount": rows}).encode()
+
+
+def retained(kind: str, rows: int, record_type=None) -> int:
+    """Decode all pages and return the bytes retained by the rows"""
+    pages = list(make_pages(kind, rows))
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    held = []
+    for body in pages:
+        items = jsonstream.loads(body)["items"]
+        if record_type is not None:
+            items = [record_type.from_dict(item) for item in items]
+        held.extend(items)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del held
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--kind", choices=("plays", "scans"), default="plays")
+    args = parser.parse_args()
+
+    record_type = PlayLog if args.kind == "plays" else ScanLog
+    print(f"{args.rows} {args.kind} rows, JSON backend: {jsonstream.BACKEND}")
+    dict_bytes = retained(args.kind, args.rows)
+    print(f"  dict:    {dict_bytes / 1e6:8.1f} MB  ({dict_bytes / args.rows:.0f} B/row)")
+    record_bytes = retained(args.kind, args.rows, record_type)
+    print(f"  records: {record_bytes / 1e6:8.1f} MB  ({record_bytes / args.rows:.0f} B/row)")
+    print(f"  reduction: {(1 - record_bytes / dict_bytes) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
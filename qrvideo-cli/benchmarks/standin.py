@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the QR Video API, for benchmarks
+
+Serves a fixed, seeded dataset of videos and QR codes from memory with the
+endpoints the batch operations use, plus the public resolve and play
+endpoints the kiosk SDK uses. Writes are answered like the real API but
+discarded, so every benchmark run sees the same dataset. Pages are
+encoded once and cached, keeping the server's share of the CPU small.
+
+Prints the port it listens on as the first line of output.
+
+Usage:
+    python benchmarks/standin.py [--port 0] [--videos N] [--qrcodes N] [--seed N]
+"""
+
+import argparse
+import functools
+import json
+import random
+import re
+import sys
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+# Smallest valid PNG (1x1 pixel)
+PNG = bytes.fromhex("89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+                    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082")
+
+CREATED_AT = "2026-01-01T00:00:00Z"
+
+
+class Dataset:
+    """Seeded videos and QR codes, with their list pages encoded on demand"""
+
+    def __init__(self, videos: int, qrcodes: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.videos = [
+            {"id": str(uuid.UUID(int=rng.getrandbits(128))), "title": f"Benchmark video {i}",
+             "description": "Seeded by benchmarks/standin.py", "filePath": f"/videos/{i}.mp4",
+             "coverPath": None, "duration": "00:01:30", "contentType": "video/mp4",
+             "fileSize": 1024 * 1024 * (1 + i % 50), "isActive": True, "createdAt": CREATED_AT}
+            for i in range(videos)
+        ]
+        self.qrcodes = []
+        for i in range(qrcodes):
+            video = self.videos[i % len(self.videos)]
+            self.qrcodes.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "codeValue": f"{i:08X}",
+                                 "videoId": video["id"], "videoTitle": video["title"], "isActive": True,
+                                 "createdAt": CREATED_AT, "description": f"Batch {i // 100}"})
+        self.video_ids = {video["id"]: video for video in self.videos}
+        self.qrcode_ids = {qr["id"] for qr in self.qrcodes}
+        self.resolved = {
+            qr["codeValue"]: json.dumps({"qrCode": qr, "video": self.video_ids[qr["videoId"]]}).encode()
+            for qr in self.qrcodes
+        }
+
+    @functools.lru_cache(maxsize=4096)
+    def page(self, kind: str, page: int, page_size: int) -> bytes:
+        items = self.videos if kind == "videos" else self.qrcodes
+        first = (page - 1) * page_size
+        return json.dumps({"items": items[first:first + page_size], "page": page, "pageSize": page_size,
+                           "totalCount": len(items)}).encode()
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Request handler answering from the server's dataset"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs stall each response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, obj) -> None:
+        self._send(status, json.dumps(obj).encode())
+
+    def _drain(self) -> int:
+        """Read and discard the request body; returns its length"""
+        remaining = int(self.headers.get("Content-Length") or 0)
+        total = remaining
+        while remaining > 0:
+            block = self.rfile.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            remaining -= len(block)
+        return total
+
+    def _route(self, method: str):
+        dataset: Dataset = self.server.dataset
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path[len("/api"):] if url.path.startswith("/api/") else None
+
+        if path is None:
+            self._drain()
+            return self._send(404)
+        match = re.fullmatch(r"/public/resolve/([^/]+)", path)
+        if match and method == "GET":
+            body = dataset.resolved.get(unquote(match.group(1)))
+            return self._send(200, body) if body else self._send(404)
+        match = re.fullmatch(r"/public/videos/([^/]+)/plays", path)
+        if match and method == "POST":
+            self._drain()
+            return self._send(202 if unquote(match.group(1)) in dataset.video_ids else 404)
+        match = re.fullmatch(r"/qrcodes/([^/]+)/image", path)
+        if match and method == "GET":
+            if match.group(1) not in dataset.qrcode_ids:
+                return self._send(404)
+            return self._send(200, PNG, "image/png")
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._drain()
+            return self._send(401)
+
+        if path in ("/videos", "/qrcodes") and method == "GET":
+            page = int(query.get("page", 1))
+            page_size = int(query.get("pageSize", 20))
+            return self._send(200, dataset.page(path[1:], page, page_size))
+        if path == "/videos" and method == "POST":
+            size = self._drain()
+            return self._send_json(201, {"id": str(uuid.uuid4()), "title": "Uploaded", "description": None,
+                                         "filePath": "/videos/uploaded.mp4", "coverPath": None, "duration": None,
+                                         "contentType": "video/mp4", "fileSize": size, "isActive": True,
+                                         "createdAt": CREATED_AT})
+        if path == "/qrcodes" and method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            data = json.loads(self.rfile.read(length) or b"{}")
+            video = dataset.video_ids.get(data.get("videoId"))
+            if video is None:
+                return self._send_json(400, {"error": "Video not found"})
+            return self._send_json(201, {"id": str(uuid.uuid4()), "codeValue": uuid.uuid4().hex[:8].upper(),
+                                         "videoId": video["id"], "videoTitle": video["title"],
+                                         "isActive": data.get("isActive", True), "createdAt": CREATED_AT,
+                                         "description": data.get("description")})
+        self._drain()
+        return self._send(404)
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+    parser.add_argument("--videos", type=int, default=100)
+    parser.add_argument("--qrcodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StandinHandler)
+    server.daemon_threads = True
+    server.dataset = Dataset(max(1, args.videos), args.qrcodes, args.seed)
+    print(server.server_address[1], flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
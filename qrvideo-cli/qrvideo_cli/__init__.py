@@ -4,5 +4,9 @@ __version__ = "1.0.0"
 __author__ = "QR Video System"
 
 from .api import QRVideoClient
+from .records import PlayLog, QrCode, ScanLog, Video
+from .resolver import CodeResolver, ResolveUnavailable, resolve_code
+from .telemetry import TelemetryReporter
+from .videocache import VideoCache
 
-__all__ = ["QRVideoClient"]
+__all__ = ["QRVideoClient", "Video", "QrCode", "ScanLog", "PlayLog", "CodeResolver", "ResolveUnavailable", "resolve_code", "TelemetryReporter", "VideoCache"]
@@ -2,25 +2,64 @@
 
 import requests
 import json
+import os
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Iterator, Union
 from pathlib import Path
+from urllib.parse import quote, urljoin
+
+from . import jsonstream
+from .jsonstream import PagedStream
+from .multipart import MultipartStream
+from .records import PlayLog, QrCode, ScanLog, Video
+from .throttle import BandwidthLimiter
+from .tracing import Tracer, TracingAdapter, span
+
+if TYPE_CHECKING:
+    # cassette imports this module
+    from .cassette import CassetteRecorder
 
 
 class QRVideoClient:
     """Main API client for QR Video System"""
 
-    def __init__(self, base_url: str = "https://mzfmedia.cn/api"):
+    download_chunk_size = 64 * 1024
+    # Keep-alive connections kept per host for API requests
+    pool_size = 32
+
+    def __init__(
+        self,
+        base_url: str = "https://mzfmedia.cn/api",
+        limiter: Optional[BandwidthLimiter] = None,
+        tracer: Optional[Tracer] = None,
+        recorder: Optional["CassetteRecorder"] = None
+    ):
         """
         Initialize the API client
 
         Args:
             base_url: Base URL of the API (default: https://mzfmedia.cn/api)
+            limiter: Bandwidth limiter shared by all transfers of this client
+            tracer: Records connections, requests and file reads as spans
+            recorder: CassetteRecorder capturing every request and response
         """
         self.base_url = base_url.rstrip('/')
         self.token: Optional[str] = None
         self.token_expires: Optional[datetime] = None
         self.username: Optional[str] = None
+        self.limiter = limiter
+        self.tracer = tracer
+
+        # One connection pool shared by every thread using this client
+        self.session = requests.Session()
+        if tracer is not None:
+            adapter = TracingAdapter(tracer, pool_maxsize=self.pool_size)
+        else:
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if recorder is not None:
+            recorder.attach(self)
 
     def login(self, username: str, password: str) -> bool:
         """
@@ -96,7 +135,9 @@ class QRVideoClient:
         data: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
         require_auth: bool = True,
-        timeout: int = 30
+        timeout: int = 30,
+        extra_headers: Optional[Dict[str, str]] = None,
+        stream: bool = False
     ) -> requests.Response:
         """
         Make an API request
@@ -109,6 +150,8 @@ class QRVideoClient:
             files: Files for multipart upload
             require_auth: Whether authentication is required
             timeout: Request timeout in seconds
+            extra_headers: Additional request headers
+            stream: Whether to defer downloading the response body
 
         Returns:
             Response object
@@ -116,31 +159,101 @@ class QRVideoClient:
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         headers = self._get_headers(include_auth=require_auth)
 
-        # Add Content-Type for JSON requests (unless uploading files)
-        if data and not files:
+        # Add Content-Type for JSON requests (unless uploading files or streaming a body)
+        if data and isinstance(data, dict) and not files:
             headers["Content-Type"] = "application/json"
-            data = json.dumps(data) if isinstance(data, dict) else data
-
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=headers,
-            params=params,
-            data=data,
-            files=files,
-            timeout=timeout
-        )
+            data = json.dumps(data)
+
+        if extra_headers:
+            headers.update(extra_headers)
+
+        # A streamed request's span ends with the response headers
+        with span(self.tracer, f"{method} {endpoint}", "http", stream=stream) as trace_args:
+            response = self.session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                params=params,
+                data=data,
+                files=files,
+                timeout=timeout,
+                stream=stream
+            )
+            trace_args['status'] = response.status_code
 
         return response
 
+    def _iter_body(self, response: requests.Response) -> Iterator[bytes]:
+        """Yield a streamed response body in chunks, applying the download budget"""
+        with response:
+            for chunk in response.iter_content(chunk_size=self.download_chunk_size):
+                if self.limiter:
+                    self.limiter.throttle_download(len(chunk))
+                yield chunk
+
+    def _read_page(
+        self,
+        response: requests.Response,
+        stream: bool,
+        record_type: Optional[type] = None
+    ) -> Union[Dict[str, Any], PagedStream]:
+        """
+        Decode a paged response
+
+        Args:
+            response: Successful response of a list endpoint
+            stream: Whether the response was opened with stream=True
+            record_type: Record class to build the items as, instead of dicts
+
+        Returns:
+            The decoded page, or a PagedStream yielding its items when streaming
+        """
+        convert = record_type.from_dict if record_type else None
+        if stream:
+            return PagedStream(self._iter_body(response), convert=convert)
+        page = jsonstream.loads(response.content)
+        if convert:
+            page['items'] = [convert(item) for item in page['items']]
+        return page
+
+    def _save_stream(
+        self,
+        response: requests.Response,
+        output_path: str,
+        digest: Optional[Any] = None
+    ) -> int:
+        """
+        Write a streamed response body to disk, applying the download budget
+
+        Args:
+            response: Response opened with stream=True
+            output_path: Destination file path
+            digest: Optional hashlib object updated with the body
+
+        Returns:
+            Number of bytes written
+        """
+        written = 0
+        with span(self.tracer, "save", "io", file=os.path.basename(output_path)) as trace_args, \
+                open(output_path, 'wb') as f:
+            for chunk in self._iter_body(response):
+                f.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                written += len(chunk)
+            trace_args['bytes'] = written
+        return written
+
     # Video operations
 
     def list_videos(
         self,
         page: int = 1,
         page_size: int = 20,
-        search: Optional[str] = None
-    ) -> Optional[Dict[str, Any]]:
+        search: Optional[str] = None,
+        stream: bool = False,
+        records: bool = False
+    ) -> Optional[Union[Dict[str, Any], PagedStream]]:
         """
         List videos with pagination and optional search
 
@@ -148,19 +261,23 @@ class QRVideoClient:
             page: Page number (default: 1)
             page_size: Number of items per page (default: 20)
             search: Search term for title/description
+            stream: Yield items while the response downloads (see Returns)
+            records: Return items as compact Video records instead of dicts
 
         Returns:
-            Dictionary with 'items', 'page', 'pageSize', 'totalCount' or None on error
+            Dictionary with 'items', 'page', 'pageSize', 'totalCount' or None on error.
+            With stream=True, a PagedStream of items whose 'meta' holds the other fields.
         """
         params = {"page": page, "pageSize": page_size}
         if search:
             params["search"] = search
 
         try:
-            response = self._make_request("GET", "/videos", params=params)
+            response = self._make_request("GET", "/videos", params=params, stream=stream)
             if response.status_code == 200:
-                return response.json()
+                return self._read_page(response, stream, Video if records else None)
             else:
+                response.close()
                 print(f"Failed to list videos: {response.status_code}")
                 return None
         except Exception as e:
@@ -192,7 +309,9 @@ class QRVideoClient:
         self,
         title: str,
         file_path: str,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        file_name: Optional[str] = None,
+        duration: Optional[float] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Upload a video file
@@ -201,26 +320,73 @@ class QRVideoClient:
             title: Video title
             file_path: Path to video file
             description: Optional video description
+            file_name: File name reported to the server (default: name of file_path)
+            duration: Duration in seconds, sent as metadata (optional)
 
         Returns:
             Uploaded video data or None on error
         """
         try:
-            # Prepare multipart form data
             with open(file_path, 'rb') as f:
-                files = {'File': f}
-                data = {'Title': title}
-                if description:
-                    data['Description'] = description
-
-                # Don't include Content-Type in headers for multipart
-                response = self._make_request(
-                    "POST",
-                    "/videos",
-                    data=data,
-                    files=files,
-                    timeout=1800  # 30 minutes for large files
+                return self.upload_video_stream(
+                    title=title,
+                    source=self.tracer.reader(f, os.path.basename(file_path)) if self.tracer is not None else f,
+                    size=os.fstat(f.fileno()).st_size,
+                    file_name=file_name or os.path.basename(file_path),
+                    description=description,
+                    duration=duration
                 )
+        except Exception as e:
+            print(f"Error uploading video: {e}")
+            return None
+
+    def upload_video_stream(
+        self,
+        title: str,
+        source: Any,
+        size: int,
+        file_name: str,
+        description: Optional[str] = None,
+        duration: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Upload a video from any readable stream of known size
+
+        The multipart body is produced incrementally from source, so the
+        video is never held in memory or written to a temporary file.
+
+        Args:
+            title: Video title
+            source: Object with a read(n) method supplying exactly size bytes
+            size: Number of bytes in the video
+            file_name: File name reported to the server (its extension is kept)
+            description: Optional video description
+            duration: Duration in seconds, sent as metadata (optional)
+
+        Returns:
+            Uploaded video data or None on error
+        """
+        try:
+            body = MultipartStream(
+                fields={
+                    'Title': title,
+                    'Description': description or None,
+                    'Duration': f"{duration:.3f}" if duration else None
+                },
+                file_field='File',
+                file_name=file_name,
+                source=source,
+                size=size,
+                on_read=self.limiter.throttle_upload if self.limiter else None
+            )
+
+            response = self._make_request(
+                "POST",
+                "/videos",
+                data=body,
+                extra_headers={"Content-Type": body.content_type},
+                timeout=1800  # 30 minutes for large files
+            )
 
             if response.status_code == 201:
                 return response.json()
@@ -239,7 +405,8 @@ class QRVideoClient:
         video_id: str,
         title: Optional[str] = None,
         description: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        current: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Update video metadata
@@ -249,12 +416,15 @@ class QRVideoClient:
             title: New title (optional)
             description: New description (optional)
             is_active: Active status (optional)
+            current: Video data already at hand (e.g. from list_videos);
+                fetched with get_video when omitted
 
         Returns:
             Updated video data or None on error
         """
         # Get current video first
-        current = self.get_video(video_id)
+        if current is None:
+            current = self.get_video(video_id)
         if not current:
             return None
 
@@ -303,8 +473,10 @@ class QRVideoClient:
         self,
         page: int = 1,
         page_size: int = 20,
-        video_id: Optional[str] = None
-    ) -> Optional[Dict[str, Any]]:
+        video_id: Optional[str] = None,
+        stream: bool = False,
+        records: bool = False
+    ) -> Optional[Union[Dict[str, Any], PagedStream]]:
         """
         List QR codes with pagination and optional filtering
 
@@ -312,19 +484,23 @@ class QRVideoClient:
             page: Page number (default: 1)
             page_size: Number of items per page (default: 20)
             video_id: Filter by video GUID
+            stream: Yield items while the response downloads (see Returns)
+            records: Return items as compact QrCode records instead of dicts
 
         Returns:
-            Dictionary with 'items', 'page', 'pageSize', 'totalCount' or None on error
+            Dictionary with 'items', 'page', 'pageSize', 'totalCount' or None on error.
+            With stream=True, a PagedStream of items whose 'meta' holds the other fields.
         """
         params = {"page": page, "pageSize": page_size}
         if video_id:
             params["videoId"] = video_id
 
         try:
-            response = self._make_request("GET", "/qrcodes", params=params)
+            response = self._make_request("GET", "/qrcodes", params=params, stream=stream)
             if response.status_code == 200:
-                return response.json()
+                return self._read_page(response, stream, QrCode if records else None)
             else:
+                response.close()
                 print(f"Failed to list QR codes: {response.status_code}")
                 return None
         except Exception as e:
@@ -393,7 +569,8 @@ class QRVideoClient:
         qrcode_id: str,
         video_id: Optional[str] = None,
         description: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        current: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Update QR code
@@ -403,12 +580,15 @@ class QRVideoClient:
             video_id: New video GUID (optional)
             description: New description (optional)
             is_active: Active status (optional)
+            current: QR code data already at hand (e.g. from list_qrcodes);
+                fetched with get_qrcode when omitted
 
         Returns:
             Updated QR code data or None on error
         """
         # Get current QR code first
-        current = self.get_qrcode(qrcode_id)
+        if current is None:
+            current = self.get_qrcode(qrcode_id)
         if not current:
             return None
 
@@ -473,20 +653,170 @@ class QRVideoClient:
             response = self._make_request(
                 "GET",
                 f"/qrcodes/{qrcode_id}/image",
-                require_auth=False
+                require_auth=False,
+                stream=True
             )
 
-            if response.status_code == 200:
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
-                return output_path
-            else:
-                print(f"Failed to download QR image: {response.status_code}")
-                return None
+            with response:
+                if response.status_code == 200:
+                    self._save_stream(response, output_path)
+                    return output_path
+                else:
+                    print(f"Failed to download QR image: {response.status_code}")
+                    return None
         except Exception as e:
             print(f"Error downloading QR image: {e}")
             return None
 
+    # Public operations
+
+    def resolve_code(self, code_value: str, timeout: int = 10) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a scanned code value to its QR code and video (no auth required)
+
+        The server records a scan for every successful call.
+
+        Args:
+            code_value: Code value encoded in the QR image
+            timeout: Request timeout in seconds
+
+        Returns:
+            Dictionary with qrCode and video, or None if the code does not
+            exist or is inactive
+
+        Raises:
+            requests.RequestException: On network errors or unexpected statuses,
+                so that callers can tell an outage from an unknown code
+        """
+        response = self._make_request(
+            "GET",
+            f"/public/resolve/{quote(code_value, safe='')}",
+            require_auth=False,
+            timeout=timeout
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def record_play(
+        self,
+        video_id: str,
+        watched_seconds: Optional[float] = None,
+        completed: bool = False,
+        timeout: int = 10
+    ) -> bool:
+        """
+        Report a play of a video (no auth required)
+
+        Args:
+            video_id: Video GUID
+            watched_seconds: Seconds watched, if known
+            completed: Whether the video was watched to the end
+            timeout: Request timeout in seconds
+
+        Returns:
+            True if the play was accepted, False if the server rejected it
+
+        Raises:
+            requests.RequestException: On network errors or server errors (5xx),
+                which are worth retrying
+        """
+        response = self._make_request(
+            "POST",
+            f"/public/videos/{quote(video_id, safe='')}/plays",
+            data={"watchedDurationSeconds": watched_seconds, "completed": completed},
+            require_auth=False,
+            timeout=timeout
+        )
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response.status_code in (200, 202, 204)
+
+    # File operations
+
+    def file_url(self, file_path: str) -> str:
+        """
+        Absolute URL of a filePath/coverPath returned by the API
+
+        Relative paths are served by the same host as the API, outside /api.
+
+        Args:
+            file_path: Absolute URL or server-relative path
+
+        Returns:
+            Absolute URL
+        """
+        if file_path.startswith(('http://', 'https://')):
+            return file_path
+        origin = self.base_url[:-len('/api')] if self.base_url.endswith('/api') else self.base_url
+        return urljoin(origin + '/', file_path.lstrip('/'))
+
+    def open_file(
+        self,
+        file_path: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: int = 60
+    ) -> Optional[requests.Response]:
+        """
+        Open a static file for streaming (no auth required)
+
+        Args:
+            file_path: filePath/coverPath from the API, or an absolute URL
+            headers: Extra request headers (e.g. Range)
+            timeout: Request timeout in seconds
+
+        Returns:
+            Streaming response with status 200 or 206, or None on error.
+            The caller must close it.
+        """
+        request_headers = {"Accept-Encoding": "identity"}
+        if headers:
+            request_headers.update(headers)
+
+        try:
+            response = self.session.get(
+                self.file_url(file_path),
+                headers=request_headers,
+                stream=True,
+                timeout=timeout
+            )
+            if response.status_code in (200, 206):
+                return response
+            response.close()
+            print(f"Failed to open file: {response.status_code}")
+            return None
+        except Exception as e:
+            print(f"Error opening file: {e}")
+            return None
+
+    def download_file(
+        self,
+        file_path: str,
+        output_path: str,
+        digest: Optional[Any] = None
+    ) -> Optional[int]:
+        """
+        Download a static file such as a video (no auth required)
+
+        Args:
+            file_path: filePath/coverPath from the API, or an absolute URL
+            output_path: Destination file path
+            digest: Optional hashlib object updated with the file content
+
+        Returns:
+            Number of bytes written or None on error
+        """
+        response = self.open_file(file_path)
+        if response is None:
+            return None
+
+        try:
+            return self._save_stream(response, output_path, digest)
+        except Exception as e:
+            print(f"Error downloading file: {e}")
+            return None
+
     # Statistics operations
 
     def get_stats_summary(self) -> Optional[Dict[str, Any]]:
@@ -513,8 +843,10 @@ class QRVideoClient:
         self,
         page: int = 1,
         page_size: int = 50,
-        qrcode_id: Optional[str] = None
-    ) -> Optional[Dict[str, Any]]:
+        qrcode_id: Optional[str] = None,
+        stream: bool = False,
+        records: bool = False
+    ) -> Optional[Union[Dict[str, Any], PagedStream]]:
         """
         List scan logs with pagination and optional filtering
 
@@ -522,19 +854,23 @@ class QRVideoClient:
             page: Page number (default: 1)
             page_size: Number of items per page (default: 50)
             qrcode_id: Filter by QR code GUID
+            stream: Yield items while the response downloads (see Returns)
+            records: Return items as compact ScanLog records instead of dicts
 
         Returns:
-            Dictionary with scan logs or None on error
+            Dictionary with scan logs or None on error.
+            With stream=True, a PagedStream of items whose 'meta' holds the other fields.
         """
         params = {"page": page, "pageSize": page_size}
         if qrcode_id:
             params["qrCodeId"] = qrcode_id
 
         try:
-            response = self._make_request("GET", "/logs/scans", params=params)
+            response = self._make_request("GET", "/logs/scans", params=params, stream=stream)
             if response.status_code == 200:
-                return response.json()
+                return self._read_page(response, stream, ScanLog if records else None)
             else:
+                response.close()
                 print(f"Failed to list scan logs: {response.status_code}")
                 return None
         except Exception as e:
@@ -545,8 +881,10 @@ class QRVideoClient:
         self,
         page: int = 1,
         page_size: int = 50,
-        video_id: Optional[str] = None
-    ) -> Optional[Dict[str, Any]]:
+        video_id: Optional[str] = None,
+        stream: bool = False,
+        records: bool = False
+    ) -> Optional[Union[Dict[str, Any], PagedStream]]:
         """
         List play logs with pagination and optional filtering
 
@@ -554,19 +892,23 @@ class QRVideoClient:
             page: Page number (default: 1)
             page_size: Number of items per page (default: 50)
             video_id: Filter by video GUID
+            stream: Yield items while the response downloads (see Returns)
+            records: Return items as compact PlayLog records instead of dicts
 
         Returns:
-            Dictionary with play logs or None on error
+            Dictionary with play logs or None on error.
+            With stream=True, a PagedStream of items whose 'meta' holds the other fields.
         """
         params = {"page": page, "pageSize": page_size}
         if video_id:
             params["videoId"] = video_id
 
         try:
-            response = self._make_request("GET", "/logs/plays", params=params)
+            response = self._make_request("GET", "/logs/plays", params=params, stream=stream)
             if response.status_code == 200:
-                return response.json()
+                return self._read_page(response, stream, PlayLog if records else None)
             else:
+                response.close()
                 print(f"Failed to list play logs: {response.status_code}")
                 return None
         except Exception as e:
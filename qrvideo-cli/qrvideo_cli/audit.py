@@ -0,0 +1,207 @@
+"""Integrity audit of videos, QR codes and logs"""
+
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .api import QRVideoClient
+from .logarchive import DEFAULT_PAGE_SIZE, LOG_KINDS, MANIFEST_FILE, ArchiveError, LogReader, iter_archive
+from .paging import iter_all_items
+
+
+#: Issue kind -> description, in report order
+ISSUES = {
+    "qr_missing_video": "QR codes bound to a video that does not exist",
+    "qr_inactive_video": "Active QR codes bound to an inactive video",
+    "duplicate_code_value": "Code values used by more than one QR code",
+    "stale_video_title": "QR codes whose videoTitle differs from the video's title",
+    "video_without_qr": "Videos no QR code points at",
+    "scan_missing_qr": "Scans against QR codes that no longer exist",
+    "scan_code_mismatch": "Scans whose codeValue differs from their QR code's",
+    "play_missing_video": "Plays of videos that no longer exist",
+}
+
+
+class _Findings:
+    """Issues found so far; log issues are grouped by the missing ID to keep memory bounded"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.counts: Counter = Counter()
+        self.examples: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in ISSUES}
+        # Log issue kind -> missing ID -> number of log rows
+        self.groups: Dict[str, Counter] = {"scan_missing_qr": Counter(), "scan_code_mismatch": Counter(),
+                                           "play_missing_video": Counter()}
+
+    def add(self, kind: str, example: Dict[str, Any], group: Optional[str] = None):
+        self.counts[kind] += 1
+        if group is not None:
+            groups = self.groups[kind]
+            if group in groups:
+                groups[group] += 1
+                return
+            groups[group] += 1
+        if len(self.examples[kind]) < self.limit:
+            self.examples[kind].append(example)
+
+
+def _log_source(
+    client: QRVideoClient,
+    kind: str,
+    archive_dir: Optional[str],
+    workers: int,
+    page_size: int
+) -> Iterator[Dict[str, Any]]:
+    if archive_dir:
+        return iter_archive(archive_dir, kind)
+    return LogReader(getattr(client, LOG_KINDS[kind]), workers, page_size).read(0)
+
+
+def audit(
+    client: QRVideoClient,
+    logs: Tuple[str, ...] = tuple(LOG_KINDS),
+    archive_dir: Optional[str] = None,
+    workers: int = 8,
+    page_size: Optional[int] = None,
+    limit: int = 20,
+    output: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Cross-check videos, QR codes and logs and report every inconsistency
+
+    Videos and QR codes are loaded once into hash indexes (video ID, QR code
+    ID and code value) held as compact records. Scan and play logs are then
+    streamed past those indexes in a single pass, so memory grows with the
+    catalogue, not with the number of logs. Logs are read from the API with
+    concurrent page requests, or from a 'logs export' archive.
+
+    Args:
+        client: QRVideoClient instance
+        logs: Log kinds to check, 'scans' and/or 'plays' (empty: catalogue only)
+        archive_dir: Read logs from this 'logs export' directory instead of the API
+        workers: Concurrent page requests for logs (default: 8)
+        page_size: Items per list request (default: tuned automatically;
+            logs default to 1000)
+        limit: Examples printed per issue kind (default: 20)
+        output: Write the full report as JSON to this file
+
+    Returns:
+        Dictionary of issue kind -> number found
+
+    Raises:
+        ArchiveError: If the logs cannot be read consistently, or the
+            archive belongs to another server
+        ListingIncomplete: If the videos or QR codes cannot all be listed;
+            partial indexes would turn into false orphans
+    """
+    if archive_dir and logs:
+        manifest_path = Path(archive_dir) / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise ArchiveError(f"{archive_dir} is not a logs archive (no {MANIFEST_FILE})")
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            archived_url = json.load(f).get('apiUrl')
+        if archived_url != client.base_url:
+            raise ArchiveError(f"{archive_dir} archives {archived_url}, not {client.base_url}")
+
+    findings = _Findings(limit)
+    started = time.monotonic()
+
+    print("Loading videos...")
+    videos = {video.id: video for video in iter_all_items(client.list_videos, page_size, strict=True, records=True)}
+    print(f"Loading QR codes ({len(videos)} videos)...")
+
+    qrcodes = {}
+    code_owner: Dict[str, str] = {}
+    qr_per_video: Counter = Counter()
+    for qr in iter_all_items(client.list_qrcodes, page_size, strict=True, records=True):
+        qrcodes[qr.id] = qr
+        qr_per_video[qr.video_id] += 1
+
+        owner = code_owner.setdefault(qr.code_value, qr.id)
+        if owner != qr.id:
+            findings.add("duplicate_code_value", {"codeValue": qr.code_value, "qrCodeIds": [owner, qr.id]})
+
+        video = videos.get(qr.video_id)
+        if video is None:
+            findings.add("qr_missing_video", {"qrCodeId": qr.id, "codeValue": qr.code_value,
+                                              "videoId": qr.video_id})
+            continue
+        if qr.is_active and not video.is_active:
+            findings.add("qr_inactive_video", {"qrCodeId": qr.id, "codeValue": qr.code_value,
+                                               "videoId": video.id, "videoTitle": video.title})
+        if qr.video_title is not None and qr.video_title != video.title:
+            findings.add("stale_video_title", {"qrCodeId": qr.id, "codeValue": qr.code_value,
+                                               "videoTitle": qr.video_title, "currentTitle": video.title})
+
+    for video in videos.values():
+        if not qr_per_video[video.id]:
+            findings.add("video_without_qr", {"videoId": video.id, "title": video.title,
+                                              "isActive": video.is_active})
+
+    log_rows: Counter = Counter()
+    for kind in logs:
+        source = "archive" if archive_dir else "API"
+        index = f"{len(qrcodes)} QR codes" if kind == "scans" else f"{len(videos)} videos"
+        print(f"Checking {kind} from the {source} against {index}...")
+        rows = _log_source(client, kind, archive_dir, workers, page_size or DEFAULT_PAGE_SIZE)
+        if kind == "scans":
+            for log in rows:
+                log_rows[kind] += 1
+                if log.get('qrCodeId') is None:
+                    # Failed scans of unknown codes reference no QR code
+                    continue
+                qr = qrcodes.get(log['qrCodeId'])
+                if qr is None:
+                    findings.add("scan_missing_qr", {"qrCodeId": log['qrCodeId'], "codeValue": log.get('codeValue'),
+                                                     "firstSeen": log['timestamp']}, group=log['qrCodeId'])
+                elif log.get('codeValue') and log['codeValue'] != qr.code_value:
+                    findings.add("scan_code_mismatch", {"qrCodeId": qr.id, "scanned": log['codeValue'],
+                                                        "current": qr.code_value}, group=qr.id)
+        else:
+            for log in rows:
+                log_rows[kind] += 1
+                if log['videoId'] not in videos:
+                    findings.add("play_missing_video", {"videoId": log['videoId'],
+                                                        "videoTitle": log.get('videoTitle'),
+                                                        "firstSeen": log['timestamp']}, group=log['videoId'])
+    elapsed = time.monotonic() - started
+
+    for kind, description in ISSUES.items():
+        count = findings.counts[kind]
+        if not count:
+            continue
+        groups = findings.groups.get(kind)
+        grouped = f" ({len(groups)} distinct IDs)" if groups else ""
+        print(f"\n⚠ {description}: {count}{grouped}")
+        for example in findings.examples[kind]:
+            if groups:
+                key = example.get('qrCodeId') if kind != "play_missing_video" else example['videoId']
+                example = dict(example, rows=groups[key])
+            print(f"  {', '.join(f'{k}={v}' for k, v in example.items())}")
+        if len(findings.examples[kind]) < (len(groups) if groups else count):
+            print(f"  ...")
+
+    print(f"\n{'='*60}")
+    print(f"Audit Summary:")
+    print(f"  Videos: {len(videos)}")
+    print(f"  QR codes: {len(qrcodes)}")
+    for kind in logs:
+        print(f"  {kind.capitalize()}: {log_rows[kind]}")
+    total = sum(findings.counts.values())
+    print(f"  Issues: {total}" + ("" if total else " ✓"))
+    print(f"  Time: {elapsed:.1f}s")
+
+    if output:
+        report = {
+            "apiUrl": client.base_url,
+            "counts": {kind: findings.counts[kind] for kind in ISSUES},
+            "examples": {kind: examples for kind, examples in findings.examples.items() if examples},
+            "groups": {kind: dict(groups) for kind, groups in findings.groups.items() if groups},
+        }
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"  Report: {output}")
+
+    return {kind: findings.counts[kind] for kind in ISSUES}
@@ -0,0 +1,416 @@
+"""Incremental snapshot backup and parallel restore for QR Video CLI"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .api import QRVideoClient
+from .fanout import in_context
+from .paging import iter_all_items
+from .segmented import DEFAULT_CONNECTIONS, download_segmented
+from .throttle import format_bytes
+
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Dataset name -> (client list method name, filter arguments)
+DATASETS = {
+    "videos": ("list_videos", {}),
+    "qrcodes": ("list_qrcodes", {}),
+    "scan_logs": ("list_scan_logs", {}),
+    "play_logs": ("list_play_logs", {}),
+}
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: str, target: str):
+    """Hard-link source to target, copying when links are not possible"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.exists(target):
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _object_path(sha256: str, ext: str) -> str:
+    """Relative path of a content-addressed object"""
+    return f"objects/{sha256[:2]}/{sha256}{ext}"
+
+
+def read_dataset(snapshot_dir: str, name: str) -> Iterable[Dict[str, Any]]:
+    """Yield the rows of a dataset stored in a snapshot"""
+    with gzip.open(os.path.join(snapshot_dir, f"{name}.jsonl.gz"), 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_manifest(snapshot_dir: str) -> Optional[Dict[str, Any]]:
+    """Load a snapshot manifest, or None if the directory is not a complete snapshot"""
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def find_latest_snapshot(root: str, exclude: Optional[str] = None) -> Optional[str]:
+    """Most recent complete snapshot directory under root"""
+    if not os.path.isdir(root):
+        return None
+    names = sorted(
+        (entry.name for entry in os.scandir(root) if entry.is_dir()),
+        reverse=True
+    )
+    for name in names:
+        path = os.path.join(root, name)
+        if path != exclude and os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            return path
+    return None
+
+
+def _create_snapshot_dir(output_dir: str) -> Optional[str]:
+    """
+    Create a new timestamped snapshot directory
+
+    Backups started within the same second (e.g. several profiles writing to
+    one output_dir) get a numbered suffix, which still sorts after the plain
+    name.
+    """
+    name = datetime.now().strftime("%Y%m%d_%H%M%S")
+    for attempt in range(1, 100):
+        path = os.path.join(output_dir, name if attempt == 1 else f"{name}_{attempt:02d}")
+        try:
+            os.makedirs(path, exist_ok=False)
+            return path
+        except FileExistsError:
+            continue
+        except OSError as e:
+            print(f"✗ Failed to create snapshot directory {path}: {e}")
+            return None
+    print(f"✗ Failed to create snapshot directory: too many snapshots named {name}")
+    return None
+
+
+class _TaskGroup:
+    """
+    Thread pool whose tasks may submit more tasks; wait() drains everything
+
+    Tasks run in the submitter's context, so --all-profiles output keeps
+    its label.
+    """
+
+    def __init__(self, workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        future = self.executor.submit(in_context(fn), *args)
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def wait(self):
+        while True:
+            with self._lock:
+                pending = [f for f in self._futures if not f.done()]
+            if not pending:
+                break
+            wait(pending)
+        self.executor.shutdown()
+        for future in self._futures:
+            future.result()
+
+
+def backup_snapshot(
+    client: QRVideoClient,
+    output_dir: str = "backups",
+    workers: int = 8,
+    include_videos: bool = True,
+    connections: int = DEFAULT_CONNECTIONS
+) -> Optional[str]:
+    """
+    Write an incremental snapshot of catalogue, logs, QR images and videos
+
+    The four datasets are paged concurrently; video files and QR images are
+    downloaded as soon as their catalogue arrives. Files are stored by
+    content hash, and anything unchanged since the previous snapshot in
+    output_dir is hard-linked from it instead of being downloaded again.
+    Large video files are fetched as parallel Range segments.
+
+    Args:
+        client: QRVideoClient instance
+        output_dir: Directory holding snapshots (default: backups)
+        workers: Number of parallel transfers (default: 8)
+        include_videos: Whether to back up video files (default: True)
+        connections: Concurrent Range requests per video file (default: 4)
+
+    Returns:
+        Path of the new snapshot, or None on error or if any file failed to
+        download (the snapshot is still written, without those files)
+    """
+    snapshot_dir = _create_snapshot_dir(output_dir)
+    if snapshot_dir is None:
+        return None
+    previous_dir = find_latest_snapshot(output_dir, exclude=snapshot_dir)
+    previous = (load_manifest(previous_dir) or {}) if previous_dir else {}
+    if previous_dir:
+        print(f"Previous snapshot: {previous_dir}")
+
+    manifest: Dict[str, Any] = {
+        "version": MANIFEST_VERSION,
+        "createdAt": datetime.now().isoformat(),
+        "apiUrl": client.base_url,
+        "datasets": {},
+        "videoFiles": {},
+        "qrImages": {},
+    }
+    lock = threading.Lock()
+    stats = {"downloaded": 0, "linked": 0, "bytes": 0, "failed": 0}
+    tasks = _TaskGroup(workers)
+    started = time.monotonic()
+
+    def reuse(kind: str, key: str, matches: Callable[[Dict[str, Any]], bool]) -> Optional[Dict[str, Any]]:
+        """Hard-link an unchanged object from the previous snapshot"""
+        entry = previous.get(kind, {}).get(key)
+        if not entry or not matches(entry):
+            return None
+        source = os.path.join(previous_dir, entry["object"])
+        if not os.path.exists(source):
+            return None
+        _link_or_copy(source, os.path.join(snapshot_dir, entry["object"]))
+        with lock:
+            stats["linked"] += 1
+        return entry
+
+    def store(tmp_path: str, sha256: str, ext: str) -> str:
+        relative = _object_path(sha256, ext)
+        target = os.path.join(snapshot_dir, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp_path, target)
+        return relative
+
+    def backup_video_file(video: Dict[str, Any]):
+        video_id = video["id"]
+        entry = reuse("videoFiles", video_id, lambda e: (
+            e.get("filePath") == video.get("filePath") and e.get("size") == video.get("fileSize")))
+        if entry is None:
+            digest = hashlib.sha256()
+            tmp_path = os.path.join(snapshot_dir, f"video-{video_id}.part")
+            size = download_segmented(client, video["filePath"], tmp_path,
+                                      connections=connections,
+                                      expected_size=video.get("fileSize"),
+                                      digest=digest)
+            if size is None:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                print(f"✗ Video file failed: {video['title']} ({video_id})")
+                with lock:
+                    stats["failed"] += 1
+                return
+            ext = os.path.splitext(video["filePath"])[1]
+            entry = {
+                "object": store(tmp_path, digest.hexdigest(), ext),
+                "sha256": digest.hexdigest(),
+                "size": size,
+                "filePath": video["filePath"],
+            }
+            with lock:
+                stats["downloaded"] += 1
+                stats["bytes"] += size
+        with lock:
+            manifest["videoFiles"][video_id] = entry
+
+    def backup_qr_image(qr: Dict[str, Any]):
+        qr_id = qr["id"]
+        entry = reuse("qrImages", qr_id, lambda e: e.get("codeValue") == qr["codeValue"])
+        if entry is None:
+            tmp_path = os.path.join(snapshot_dir, f"qr-{qr_id}.part")
+            if not client.download_qrcode_image(qr_id, tmp_path):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                with lock:
+                    stats["failed"] += 1
+                return
+            sha256 = _hash_file(tmp_path)
+            entry = {
+                "object": store(tmp_path, sha256, ".png"),
+                "sha256": sha256,
+                "codeValue": qr["codeValue"],
+            }
+            with lock:
+                stats["downloaded"] += 1
+                stats["bytes"] += os.path.getsize(os.path.join(snapshot_dir, entry["object"]))
+        with lock:
+            manifest["qrImages"][qr_id] = entry
+
+    def backup_dataset(name: str):
+        method, filters = DATASETS[name]
+        file_name = f"{name}.jsonl.gz"
+        path = os.path.join(snapshot_dir, file_name)
+        digest = hashlib.sha256()
+        count = 0
+
+        # mtime=0 keeps unchanged datasets byte-identical across snapshots
+        with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            # Strict: a failed page aborts the backup instead of truncating the dataset
+            for item in iter_all_items(getattr(client, method), strict=True, **filters):
+                line = (json.dumps(item, ensure_ascii=False, sort_keys=True) + "\n").encode('utf-8')
+                f.write(line)
+                digest.update(line)
+                count += 1
+                if name == "videos" and include_videos:
+                    tasks.submit(backup_video_file, item)
+                elif name == "qrcodes":
+                    tasks.submit(backup_qr_image, item)
+
+        sha256 = digest.hexdigest()
+        old = previous.get("datasets", {}).get(name)
+        if old and old.get("sha256") == sha256:
+            # Replace the new copy with a link to the identical previous one
+            os.remove(path)
+            _link_or_copy(os.path.join(previous_dir, file_name), path)
+
+        with lock:
+            manifest["datasets"][name] = {"file": file_name, "sha256": sha256, "count": count}
+        print(f"✓ {name}: {count} rows")
+
+    print(f"Backing up to {snapshot_dir}...")
+    for name in DATASETS:
+        tasks.submit(backup_dataset, name)
+
+    try:
+        tasks.wait()
+    except Exception as e:
+        print(f"✗ Backup failed: {e}")
+        return None
+
+    # The manifest is written last; its presence marks a complete snapshot
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{'='*60}")
+    print(f"Backup Summary:")
+    print(f"  Snapshot: {snapshot_dir}")
+    for name, info in manifest["datasets"].items():
+        print(f"  {name}: {info['count']}")
+    print(f"  Files downloaded: {stats['downloaded']} ({format_bytes(stats['bytes'])})")
+    print(f"  Files reused: {stats['linked']}")
+    print(f"  Failed: {stats['failed']}")
+    print(f"  Elapsed: {time.monotonic() - started:.1f}s")
+
+    if stats["failed"]:
+        return None
+    return snapshot_dir
+
+
+def restore_snapshot(
+    client: QRVideoClient,
+    snapshot_dir: str,
+    workers: int = 4
+) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    Replay a snapshot into an (empty) instance
+
+    Videos are uploaded in parallel from the snapshot's files, then QR codes
+    are recreated in parallel against the new video IDs. The API assigns new
+    IDs and code values, so an old-to-new mapping is written to
+    restore_map.json inside the snapshot. Scan and play logs cannot be
+    written through the API and are not restored.
+
+    Args:
+        client: QRVideoClient instance
+        snapshot_dir: Snapshot directory created by backup_snapshot
+        workers: Number of parallel uploads (default: 4)
+
+    Returns:
+        Mapping with 'videos' and 'qrcodes' old-to-new IDs and 'codeValues'
+        old-to-new codes, or None on error
+    """
+    manifest = load_manifest(snapshot_dir)
+    if not manifest:
+        print(f"✗ Not a complete snapshot: {snapshot_dir}")
+        return None
+
+    existing = client.list_videos(page=1, page_size=1)
+    if existing and existing.get('totalCount'):
+        print(f"⚠ Target already has {existing['totalCount']} videos; restored items are added alongside them")
+
+    mapping: Dict[str, Dict[str, str]] = {"videos": {}, "qrcodes": {}, "codeValues": {}}
+    failed: List[str] = []
+    lock = threading.Lock()
+
+    def restore_video(video: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        entry = manifest["videoFiles"].get(video["id"])
+        if not entry:
+            return video["id"], None
+        result = client.upload_video(
+            title=video["title"],
+            file_path=os.path.join(snapshot_dir, entry["object"]),
+            description=video.get("description")
+        )
+        if result and not video.get("isActive", True):
+            client.update_video(result["id"], is_active=False)
+        return video["id"], result
+
+    def restore_qrcode(qr: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        new_video_id = mapping["videos"].get(qr["videoId"])
+        if not new_video_id:
+            return qr, None
+        return qr, client.create_qrcode(new_video_id, qr.get("description"), qr.get("isActive", True))
+
+    videos = list(read_dataset(snapshot_dir, "videos"))
+    print(f"Restoring {len(videos)} videos...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for idx, (old_id, result) in enumerate(executor.map(in_context(restore_video), videos), 1):
+            if result:
+                print(f"[{idx}/{len(videos)}] ✓ {result['title']}")
+                with lock:
+                    mapping["videos"][old_id] = result["id"]
+            else:
+                print(f"[{idx}/{len(videos)}] ✗ video {old_id}")
+                failed.append(f"video {old_id}")
+
+    qrcodes = list(read_dataset(snapshot_dir, "qrcodes"))
+    print(f"\nRestoring {len(qrcodes)} QR codes...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for idx, (qr, result) in enumerate(executor.map(in_context(restore_qrcode), qrcodes), 1):
+            if result:
+                print(f"[{idx}/{len(qrcodes)}] ✓ {qr['codeValue']} -> {result['codeValue']}")
+                mapping["qrcodes"][qr["id"]] = result["id"]
+                mapping["codeValues"][qr["codeValue"]] = result["codeValue"]
+            else:
+                print(f"[{idx}/{len(qrcodes)}] ✗ {qr['codeValue']}")
+                failed.append(f"qrcode {qr['id']}")
+
+    map_file = os.path.join(snapshot_dir, "restore_map.json")
+    with open(map_file, 'w', encoding='utf-8') as f:
+        json.dump(mapping, f, indent=2)
+
+    print(f"\n{'='*60}")
+    print(f"Restore Summary:")
+    print(f"  Videos: {len(mapping['videos'])}/{len(videos)}")
+    print(f"  QR Codes: {len(mapping['qrcodes'])}/{len(qrcodes)}")
+    print(f"  Failed: {len(failed)}")
+    print(f"  ID mapping: {map_file}")
+    print(f"  Note: scan and play logs are kept in the snapshot but cannot be restored via the API")
+
+    return mapping
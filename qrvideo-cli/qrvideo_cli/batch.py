@@ -1,73 +1,355 @@
 """Batch operations for QR Video CLI"""
 
 import csv
+import functools
+import heapq
 import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Sequence, Tuple, Union
 from .api import QRVideoClient
+from .fanout import spawn_in_context
+from .mp4 import MP4_EXTENSIONS, Mp4Error, faststart_copy
+from .preflight import PreflightResult, check_file, format_result
+from .paging import iter_all_items
+from .throttle import format_bytes
+from .tracing import span
+
+
+def _format_duration(seconds: float) -> str:
+    """Format seconds as H:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _matches_any(name: str, rel_path: str, patterns: Sequence[str]) -> bool:
+    """Check a file name or its relative path against glob patterns"""
+    return any(fnmatch(name, p) or fnmatch(rel_path, p) for p in patterns)
+
+
+def scan_video_files(
+    directory: str,
+    include_patterns: Sequence[str] = ("*.mp4",),
+    exclude_patterns: Sequence[str] = (),
+    recursive: bool = False
+) -> Iterator[Tuple[str, int]]:
+    """
+    Stream matching video files from a directory tree
+
+    Uses os.scandir so files are yielded as soon as they are seen instead of
+    collecting the whole tree first.
+
+    Args:
+        directory: Directory path to scan
+        include_patterns: Glob patterns a file must match (any of)
+        exclude_patterns: Glob patterns that skip a file or directory
+        recursive: Whether to descend into subdirectories (default: False)
+
+    Yields:
+        Tuples of (file path, size in bytes)
+    """
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    rel_path = os.path.relpath(entry.path, directory)
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and not _matches_any(entry.name, rel_path, exclude_patterns):
+                                pending.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        if not _matches_any(entry.name, rel_path, include_patterns):
+                            continue
+                        if _matches_any(entry.name, rel_path, exclude_patterns):
+                            continue
+                        yield entry.path, entry.stat().st_size
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"✗ Cannot read directory {current}: {e}")
+
+
+def prepare_upload(file_path: str, tmp_dir: str, pool: Optional[Executor] = None) -> str:
+    """
+    Faststart an MP4 file before upload so playback can begin immediately
+
+    Files whose moov box trails the media data are rewritten into tmp_dir
+    with moov first; the original file is never modified.
+
+    Args:
+        file_path: Video file to upload
+        tmp_dir: Directory for rewritten copies
+        pool: Executor to run the rewrite in (default: current process)
+
+    Returns:
+        Path to upload: a rewritten copy inside tmp_dir, or file_path itself
+    """
+    if not file_path.lower().endswith(MP4_EXTENSIONS):
+        return file_path
+
+    try:
+        if pool is None:
+            remuxed = faststart_copy(file_path, tmp_dir)
+        else:
+            remuxed = pool.submit(faststart_copy, file_path, tmp_dir).result()
+    except (Mp4Error, OSError) as e:
+        print(f"⚠ Cannot faststart {os.path.basename(file_path)}: {e}; uploading as is")
+        return file_path
+
+    if remuxed is None:
+        return file_path
+    print(f"  Moved moov ahead of media data (faststart)")
+    return remuxed
+
+
+class _UploadQueue:
+    """
+    Largest-first work queue fed by a running directory scan
+
+    Workers always take the biggest file discovered so far (LPT scheduling),
+    which keeps a single large file from running alone at the end of a
+    parallel upload. Byte counts are tracked to estimate remaining time.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, int, str]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._seq = 0
+        self.found = 0
+        self.started = 0
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.start_time = time.monotonic()
+
+    def put(self, file_path: str, size: int):
+        with self._cond:
+            heapq.heappush(self._heap, (-size, self._seq, file_path))
+            self._seq += 1
+            self.found += 1
+            self.total_bytes += size
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def scanning(self) -> bool:
+        return not self._closed
+
+    def get(self) -> Optional[Tuple[int, str, int]]:
+        """Return (index, path, size) of the largest queued file, or None when done"""
+        with self._cond:
+            while not self._heap and not self._closed:
+                self._cond.wait()
+            if not self._heap:
+                return None
+            neg_size, _, file_path = heapq.heappop(self._heap)
+            self.started += 1
+            return self.started, file_path, -neg_size
+
+    def complete(self, size: int) -> Optional[float]:
+        """Record a finished file and return the estimated seconds remaining"""
+        with self._cond:
+            self.done_bytes += size
+            elapsed = time.monotonic() - self.start_time
+            if self.done_bytes <= 0 or elapsed <= 0:
+                return None
+            rate = self.done_bytes / elapsed
+            return (self.total_bytes - self.done_bytes) / rate
 
 
 def bulk_upload_videos(
     client: QRVideoClient,
     directory: str,
-    file_pattern: str = "*.mp4",
-    recursive: bool = False
+    file_pattern: Union[str, Sequence[str]] = "*.mp4",
+    recursive: bool = False,
+    exclude_patterns: Optional[Sequence[str]] = None,
+    workers: int = 1,
+    faststart: bool = True,
+    preflight: bool = True
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Upload all videos from a directory
 
+    Files are discovered with a streaming scan and uploads start while the
+    scan is still running. With several workers the largest files are
+    uploaded first so the pool finishes as evenly as possible.
+
+    Each file found is first validated in a process pool (see
+    preflight.check_file); rejected files are never uploaded, and the
+    duration found is sent along with the upload. MP4 files with a trailing
+    moov box are rewritten for faststart in the same pool.
+
     Args:
         client: QRVideoClient instance
         directory: Directory path containing videos
-        file_pattern: File pattern to match (default: *.mp4)
+        file_pattern: File pattern or list of patterns to match (default: *.mp4)
         recursive: Whether to search recursively (default: False)
+        exclude_patterns: Patterns for files or directories to skip
+        workers: Number of parallel uploads (default: 1)
+        faststart: Whether to move moov to the front of MP4 files (default: True)
+        preflight: Whether to validate files before uploading (default: True)
 
     Returns:
-        Dictionary with 'success' and 'failed' lists
+        Dictionary with 'success', 'failed' and 'rejected' lists
     """
-    path = Path(directory)
-
-    # Find video files
-    if recursive:
-        video_files = list(path.rglob(file_pattern))
-    else:
-        video_files = list(path.glob(file_pattern))
-
-    print(f"Found {len(video_files)} video files")
-    results = {"success": [], "failed": []}
-
-    for idx, video_file in enumerate(video_files, 1):
-        title = video_file.stem  # Filename without extension
-        print(f"\n[{idx}/{len(video_files)}] Uploading {video_file.name}...")
-
-        result = client.upload_video(
-            title=title,
-            file_path=str(video_file),
-            description=f"Auto-uploaded from {directory}"
-        )
-
-        if result:
-            print(f"✓ Uploaded: {result['title']} (ID: {result['id']})")
-            results["success"].append({
-                "file": video_file.name,
-                "id": result['id'],
-                "title": result['title']
-            })
-        else:
-            print(f"✗ Failed: {video_file.name}")
-            results["failed"].append(video_file.name)
+    include_patterns = [file_pattern] if isinstance(file_pattern, str) else list(file_pattern)
+    exclude_patterns = list(exclude_patterns or [])
+    results = {"success": [], "failed": [], "rejected": []}
+    results_lock = threading.Lock()
+    upload_queue = _UploadQueue()
+    durations: Dict[str, Optional[float]] = {}
+    tmp_dir = tempfile.mkdtemp(prefix="qrvideo-upload-") if faststart else None
+    media_pool = ProcessPoolExecutor(max_workers=max(1, workers)) if faststart or preflight else None
+    tracer = client.tracer
+
+    def admit(file_path: str, future: Future, trace_id: Optional[int] = None):
+        try:
+            result: PreflightResult = future.result()
+        except Exception as e:
+            result = PreflightResult(file_path, 0, None, [], [f"Preflight failed: {e}"], [])
+        if trace_id is not None:
+            tracer.end_async(trace_id, "preflight", "stage", ok=result.ok)
+        try:
+            name = os.path.basename(result.path)
+            for warning in result.warnings:
+                print(f"⚠ {name}: {warning}")
+            if result.ok:
+                durations[result.path] = result.duration
+                upload_queue.put(result.path, result.size)
+            else:
+                print(format_result(result))
+                with results_lock:
+                    results["rejected"].append({"file": name, "problems": result.problems})
+        finally:
+            checked.release()
+
+    checked = threading.Semaphore(0)
+
+    def discover():
+        submitted = 0
+        try:
+            with span(tracer, "scan directory", "stage", directory=directory):
+                for file_path, size in scan_video_files(
+                    directory, include_patterns, exclude_patterns, recursive
+                ):
+                    if preflight:
+                        # Preflight runs in another process: trace it from submission to result
+                        trace_id = tracer.begin_async("preflight", "stage", file=os.path.basename(file_path)) \
+                            if tracer is not None else None
+                        future = media_pool.submit(check_file, file_path)
+                        future.add_done_callback(functools.partial(admit, file_path, trace_id=trace_id))
+                        submitted += 1
+                    else:
+                        upload_queue.put(file_path, size)
+            with span(tracer, "wait for preflight", "stage"):
+                for _ in range(submitted):
+                    checked.acquire()
+        finally:
+            upload_queue.close()
+            print(f"Found {upload_queue.found} video files "
+                  f"({format_bytes(upload_queue.total_bytes)})")
+
+    def upload_worker():
+        while True:
+            with span(tracer, "wait for file", "queue"):
+                item = upload_queue.get()
+            if item is None:
+                return
+
+            idx, file_path, size = item
+            video_file = Path(file_path)
+            title = video_file.stem  # Filename without extension
+            total = f"{upload_queue.found}+" if upload_queue.scanning else upload_queue.found
+            print(f"\n[{idx}/{total}] Uploading {video_file.name} ({format_bytes(size)})...")
+
+            # Any error fails this file only; the worker moves on to the next one
+            result = None
+            try:
+                with span(tracer, "upload", "stage", file=video_file.name, bytes=size):
+                    upload_path = file_path
+                    if faststart:
+                        with span(tracer, "faststart", "stage"):
+                            upload_path = prepare_upload(file_path, tmp_dir, media_pool)
+                    result = client.upload_video(
+                        title=title,
+                        file_path=upload_path,
+                        description=f"Auto-uploaded from {directory}",
+                        file_name=video_file.name,
+                        duration=durations.get(file_path)
+                    )
+                    if upload_path != file_path:
+                        os.remove(upload_path)
+            except Exception as e:
+                print(f"✗ Error uploading {video_file.name}: {e}")
+            remaining = upload_queue.complete(size)
+
+            with results_lock:
+                if result:
+                    print(f"✓ Uploaded: {result['title']} (ID: {result['id']})")
+                    results["success"].append({
+                        "file": video_file.name,
+                        "id": result['id'],
+                        "title": result['title']
+                    })
+                else:
+                    print(f"✗ Failed: {video_file.name}")
+                    results["failed"].append(video_file.name)
+
+                if remaining is not None:
+                    queued = upload_queue.total_bytes - upload_queue.done_bytes
+                    throughput = f" ({client.limiter.readout()})" if client.limiter else ""
+                    print(f"  Remaining: {format_bytes(queued)}, "
+                          f"ETA {_format_duration(remaining)}{throughput}")
+
+    scanner = spawn_in_context(discover, name="video-scan", daemon=True)
+    scanner.start()
+
+    pool = [
+        spawn_in_context(upload_worker, name=f"upload-{n}", daemon=True)
+        for n in range(max(1, workers))
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    scanner.join()
+    if media_pool:
+        media_pool.shutdown()
+    if tmp_dir:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
 
     # Summary
     print(f"\n{'='*60}")
     print(f"Upload Summary:")
     print(f"  Success: {len(results['success'])}")
     print(f"  Failed: {len(results['failed'])}")
+    if preflight:
+        print(f"  Rejected by preflight: {len(results['rejected'])}")
+    print(f"  Elapsed: {_format_duration(time.monotonic() - upload_queue.start_time)}")
 
     if results['failed']:
         print(f"\nFailed files:")
         for filename in results['failed']:
             print(f"  - {filename}")
 
+    if results['rejected']:
+        print(f"\nRejected files:")
+        for rejected in results['rejected']:
+            print(f"  - {rejected['file']}: {'; '.join(rejected['problems'])}")
+
     return results
 
 
@@ -136,10 +418,38 @@ def bulk_create_qrcodes_from_csv(
     return results
 
 
+def _write_csv(
+    items: Iterable[Dict[str, Any]],
+    output_file: str,
+    fieldnames: List[str]
+) -> int:
+    """
+    Write items to CSV as they arrive, creating the file on the first item
+
+    Returns:
+        Number of rows written
+    """
+    written = 0
+    f = None
+    try:
+        for item in items:
+            if f is None:
+                f = open(output_file, 'w', newline='', encoding='utf-8')
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writeheader()
+            writer.writerow(item)
+            written += 1
+    finally:
+        if f is not None:
+            f.close()
+    return written
+
+
 def export_videos_to_csv(
     client: QRVideoClient,
     output_file: str = "videos_export.csv",
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    page_size: Optional[int] = None
 ) -> Optional[str]:
     """
     Export all videos to CSV file
@@ -148,43 +458,21 @@ def export_videos_to_csv(
         client: QRVideoClient instance
         output_file: Output CSV file path (default: videos_export.csv)
         search: Optional search filter
+        page_size: Number of videos per request (default: tuned automatically)
 
     Returns:
         Path to output file or None on error
     """
-    all_videos = []
-    page = 1
-    page_size = 100
-
     print("Fetching videos...")
-    while True:
-        data = client.list_videos(page=page, page_size=page_size, search=search)
-
-        if not data:
-            print(f"✗ Failed to fetch page {page}")
-            break
-
-        all_videos.extend(data['items'])
-        print(f"  Fetched page {page} ({len(data['items'])} videos)")
-
-        # Check if we've fetched all
-        if len(all_videos) >= data['totalCount']:
-            break
-
-        page += 1
-
-    # Write to CSV
-    if all_videos:
-        with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            fieldnames = [
-                'id', 'title', 'description', 'filePath', 'coverPath',
-                'duration', 'contentType', 'fileSize', 'isActive', 'createdAt'
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_videos)
-
-        print(f"✓ Exported {len(all_videos)} videos to {output_file}")
+    videos = iter_all_items(client.list_videos, page_size, label="videos", search=search)
+    fieldnames = [
+        'id', 'title', 'description', 'filePath', 'coverPath',
+        'duration', 'contentType', 'fileSize', 'isActive', 'createdAt'
+    ]
+    count = _write_csv(videos, output_file, fieldnames)
+
+    if count:
+        print(f"✓ Exported {count} videos to {output_file}")
         return output_file
     else:
         print("✗ No videos to export")
@@ -194,7 +482,8 @@ def export_videos_to_csv(
 def export_qrcodes_to_csv(
     client: QRVideoClient,
     output_file: str = "qrcodes_export.csv",
-    video_id: Optional[str] = None
+    video_id: Optional[str] = None,
+    page_size: Optional[int] = None
 ) -> Optional[str]:
     """
     Export all QR codes to CSV file
@@ -203,43 +492,21 @@ def export_qrcodes_to_csv(
         client: QRVideoClient instance
         output_file: Output CSV file path (default: qrcodes_export.csv)
         video_id: Optional video ID filter
+        page_size: Number of QR codes per request (default: tuned automatically)
 
     Returns:
         Path to output file or None on error
     """
-    all_qrcodes = []
-    page = 1
-    page_size = 100
-
     print("Fetching QR codes...")
-    while True:
-        data = client.list_qrcodes(page=page, page_size=page_size, video_id=video_id)
-
-        if not data:
-            print(f"✗ Failed to fetch page {page}")
-            break
-
-        all_qrcodes.extend(data['items'])
-        print(f"  Fetched page {page} ({len(data['items'])} QR codes)")
-
-        # Check if we've fetched all
-        if len(all_qrcodes) >= data['totalCount']:
-            break
-
-        page += 1
-
-    # Write to CSV
-    if all_qrcodes:
-        with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            fieldnames = [
-                'id', 'codeValue', 'videoId', 'videoTitle',
-                'isActive', 'createdAt', 'description'
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_qrcodes)
-
-        print(f"✓ Exported {len(all_qrcodes)} QR codes to {output_file}")
+    qrcodes = iter_all_items(client.list_qrcodes, page_size, label="QR codes", video_id=video_id)
+    fieldnames = [
+        'id', 'codeValue', 'videoId', 'videoTitle',
+        'isActive', 'createdAt', 'description'
+    ]
+    count = _write_csv(qrcodes, output_file, fieldnames)
+
+    if count:
+        print(f"✓ Exported {count} QR codes to {output_file}")
         return output_file
     else:
         print("✗ No QR codes to export")
@@ -249,7 +516,8 @@ def export_qrcodes_to_csv(
 def download_all_qr_images(
     client: QRVideoClient,
     output_dir: str = "qr_images",
-    video_id: Optional[str] = None
+    video_id: Optional[str] = None,
+    page_size: Optional[int] = None
 ) -> Dict[str, int]:
     """
     Download all QR code images
@@ -258,6 +526,7 @@ def download_all_qr_images(
         client: QRVideoClient instance
         output_dir: Output directory for images (default: qr_images)
         video_id: Optional filter by video ID
+        page_size: Number of QR codes per request (default: tuned automatically)
 
     Returns:
         Dictionary with success and failed counts
@@ -266,20 +535,9 @@ def download_all_qr_images(
     os.makedirs(output_dir, exist_ok=True)
 
     # Get all QR codes
-    all_qrcodes = []
-    page = 1
-    page_size = 100
-
     print("Fetching QR codes...")
-    while True:
-        data = client.list_qrcodes(page=page, page_size=page_size, video_id=video_id)
-        if not data:
-            break
-
-        all_qrcodes.extend(data['items'])
-        if len(all_qrcodes) >= data['totalCount']:
-            break
-        page += 1
+    with span(client.tracer, "list QR codes", "stage"):
+        all_qrcodes = list(iter_all_items(client.list_qrcodes, page_size, video_id=video_id))
 
     print(f"Downloading {len(all_qrcodes)} QR code images...")
 
@@ -290,7 +548,9 @@ def download_all_qr_images(
         output_path = os.path.join(output_dir, f"qr-{qr['codeValue']}.png")
         print(f"[{idx}/{len(all_qrcodes)}] {qr['codeValue']}... ", end="")
 
-        if client.download_qrcode_image(qr['id'], output_path):
+        with span(client.tracer, "download image", "stage", code=qr['codeValue']):
+            saved = client.download_qrcode_image(qr['id'], output_path)
+        if saved:
             print("✓")
             success += 1
         else:
@@ -0,0 +1,307 @@
+"""Filter-driven bulk update and delete of QR codes and videos"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fnmatch import fnmatch
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .api import QRVideoClient
+from .paging import iter_all_items
+from .records import QrCode, Video, parse_timestamp
+from .throttle import format_bytes
+
+
+# Planned items printed by a dry run before the rest is summarised
+PLAN_PREVIEW = 20
+
+
+def _created_within(item: Dict[str, Any], after: Optional[datetime], before: Optional[datetime]) -> bool:
+    if after is None and before is None:
+        return True
+    created = parse_timestamp(item['createdAt'])
+    return (after is None or created >= after) and (before is None or created < before)
+
+
+def select_qrcodes(
+    client: QRVideoClient,
+    video_id: Optional[str] = None,
+    codes: Optional[Iterable[str]] = None,
+    match: Optional[str] = None,
+    active: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    page_size: Optional[int] = None
+) -> List[QrCode]:
+    """
+    List the QR codes matching every given filter
+
+    Args:
+        client: QRVideoClient instance
+        video_id: Only codes of this video (filtered by the server)
+        codes: Only these code values
+        match: Glob pattern the description must match (e.g. "spring-2025*")
+        active: Only active (True) or inactive (False) codes
+        created_after: Only codes created at or after this time
+        created_before: Only codes created before this time
+        page_size: Items per list request (default: tuned automatically)
+
+    Returns:
+        List of QrCode records (read like the API's dictionaries)
+
+    Raises:
+        ListingIncomplete: If any page of the listing failed
+    """
+    wanted = set(codes) if codes is not None else None
+    return [
+        qr for qr in iter_all_items(client.list_qrcodes, page_size, strict=True, video_id=video_id, records=True)
+        if (wanted is None or qr['codeValue'] in wanted)
+        and (match is None or fnmatch(qr.get('description') or '', match))
+        and (active is None or qr.get('isActive', True) == active)
+        and _created_within(qr, created_after, created_before)
+    ]
+
+
+def _videos_played_since(client: QRVideoClient, since: datetime, page_size: Optional[int]) -> Set[str]:
+    """IDs of videos with a play at or after since (play logs are newest first)"""
+    played: Set[str] = set()
+    logs = iter_all_items(client.list_play_logs, page_size, strict=True)
+    try:
+        for log in logs:
+            if parse_timestamp(log['timestamp']) < since:
+                break
+            played.add(log['videoId'])
+    finally:
+        logs.close()
+    return played
+
+
+def select_videos(
+    client: QRVideoClient,
+    search: Optional[str] = None,
+    match: Optional[str] = None,
+    active: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    not_played_since: Optional[datetime] = None,
+    without_qrcodes: bool = False,
+    page_size: Optional[int] = None
+) -> List[Video]:
+    """
+    List the videos matching every given filter
+
+    Args:
+        client: QRVideoClient instance
+        search: Server-side title/description search term
+        match: Glob pattern the title must match
+        active: Only active (True) or inactive (False) videos
+        created_after: Only videos created at or after this time
+        created_before: Only videos created before this time
+        not_played_since: Only videos without plays since this time
+        without_qrcodes: Only videos no QR code points at
+        page_size: Items per list request (default: tuned automatically)
+
+    Returns:
+        List of Video records (read like the API's dictionaries)
+
+    Raises:
+        ListingIncomplete: If any page of the videos, play logs or QR codes
+            failed; a partial listing would select videos that must be kept
+    """
+    videos = [
+        video for video in iter_all_items(client.list_videos, page_size, strict=True, search=search, records=True)
+        if (match is None or fnmatch(video.get('title') or '', match))
+        and (active is None or video.get('isActive', True) == active)
+        and _created_within(video, created_after, created_before)
+    ]
+    if videos and not_played_since is not None:
+        played = _videos_played_since(client, not_played_since, page_size)
+        videos = [video for video in videos if video['id'] not in played]
+    if videos and without_qrcodes:
+        linked = {qr['videoId'] for qr in iter_all_items(client.list_qrcodes, page_size, strict=True)}
+        videos = [video for video in videos if video['id'] not in linked]
+    return videos
+
+
+def qrcode_changes(
+    qr: Dict[str, Any],
+    video_id: Optional[str] = None,
+    description: Optional[str] = None,
+    is_active: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Fields of a QR code an update would change
+
+    Returns:
+        Dictionary of field -> new value; empty if the code already matches
+    """
+    wanted = {"videoId": video_id, "description": description, "isActive": is_active}
+    return {field: value for field, value in wanted.items()
+            if value is not None and qr.get(field) != value}
+
+
+def _print_plan(lines: List[str], total: int):
+    for line in lines[:PLAN_PREVIEW]:
+        print(f"  {line}")
+    if total > PLAN_PREVIEW:
+        print(f"  ... and {total - PLAN_PREVIEW} more")
+
+
+def _run(
+    items: List[Dict[str, Any]],
+    action: Callable[[Dict[str, Any]], bool],
+    name: Callable[[Dict[str, Any]], str],
+    workers: int,
+    title: str
+) -> Dict[str, Any]:
+    """Apply action to every item concurrently and print a summary"""
+    lock = threading.Lock()
+    failed: List[str] = []
+    done = [0]
+    started = time.monotonic()
+
+    def apply(item: Dict[str, Any]):
+        try:
+            ok = action(item)
+        except Exception as e:
+            print(f"✗ {name(item)}: {e}")
+            ok = False
+        with lock:
+            done[0] += 1
+            if not ok:
+                failed.append(name(item))
+            if done[0] % 100 == 0:
+                print(f"  {done[0]}/{len(items)} done, {len(failed)} failed")
+
+    # All workers share the client's keep-alive connection pool
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        list(executor.map(apply, items))
+    elapsed = time.monotonic() - started
+
+    print(f"\n{'='*60}")
+    print(f"{title} Summary:")
+    print(f"  Success: {len(items) - len(failed)}")
+    print(f"  Failed: {len(failed)}")
+    if elapsed > 0 and items:
+        print(f"  Time: {elapsed:.1f}s ({len(items) / elapsed:.0f}/s)")
+    for item_name in failed[:10]:
+        print(f"  ✗ {item_name}")
+
+    return {"succeeded": len(items) - len(failed), "failed": failed}
+
+
+def bulk_update_qrcodes(
+    client: QRVideoClient,
+    qrcodes: List[Dict[str, Any]],
+    video_id: Optional[str] = None,
+    description: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    workers: int = 8,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Apply the same change to many QR codes
+
+    Each PUT payload is built from the listed QR code, so no code is fetched
+    again. Codes that already have the requested values are skipped.
+
+    Args:
+        client: QRVideoClient instance
+        qrcodes: QR codes from select_qrcodes
+        video_id: New video GUID (optional)
+        description: New description (optional)
+        is_active: New active status (optional)
+        workers: Concurrent requests (default: 8)
+        dry_run: Only print what would change
+
+    Returns:
+        Dictionary with planned, unchanged, succeeded and failed (code values)
+    """
+    planned = [(qr, qrcode_changes(qr, video_id, description, is_active)) for qr in qrcodes]
+    planned = [(qr, changes) for qr, changes in planned if changes]
+    print(f"Plan: update {len(planned)} of {len(qrcodes)} matching QR codes "
+          f"({len(qrcodes) - len(planned)} already up to date)")
+    _print_plan([
+        f"{qr['codeValue']} ({qr.get('videoTitle', qr['videoId'])}): "
+        + ", ".join(f"{field} {qr.get(field)!r} -> {value!r}" for field, value in changes.items())
+        for qr, changes in planned[:PLAN_PREVIEW]
+    ], len(planned))
+
+    results = {"planned": len(planned), "unchanged": len(qrcodes) - len(planned), "succeeded": 0, "failed": []}
+    if dry_run or not planned:
+        return results
+
+    def update(qr: Dict[str, Any]) -> bool:
+        return client.update_qrcode(qr['id'], video_id=video_id, description=description,
+                                    is_active=is_active, current=qr) is not None
+
+    print(f"\nUpdating {len(planned)} QR codes with {workers} workers...")
+    results.update(_run([qr for qr, _ in planned], update, lambda qr: qr['codeValue'],
+                        workers, "Bulk Update"))
+    return results
+
+
+def bulk_delete_qrcodes(
+    client: QRVideoClient,
+    qrcodes: List[Dict[str, Any]],
+    workers: int = 8,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Delete many QR codes
+
+    Args:
+        client: QRVideoClient instance
+        qrcodes: QR codes from select_qrcodes
+        workers: Concurrent requests (default: 8)
+        dry_run: Only print what would be deleted
+
+    Returns:
+        Dictionary with planned, succeeded and failed (code values)
+    """
+    print(f"Plan: delete {len(qrcodes)} QR codes")
+    _print_plan([f"{qr['codeValue']} ({qr.get('videoTitle', qr['videoId'])})"
+                 for qr in qrcodes[:PLAN_PREVIEW]], len(qrcodes))
+
+    results = {"planned": len(qrcodes), "succeeded": 0, "failed": []}
+    if dry_run or not qrcodes:
+        return results
+
+    print(f"\nDeleting {len(qrcodes)} QR codes with {workers} workers...")
+    results.update(_run(qrcodes, lambda qr: client.delete_qrcode(qr['id']),
+                        lambda qr: qr['codeValue'], workers, "Bulk Delete"))
+    return results
+
+
+def bulk_delete_videos(
+    client: QRVideoClient,
+    videos: List[Dict[str, Any]],
+    workers: int = 8,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Delete many videos
+
+    Args:
+        client: QRVideoClient instance
+        videos: Videos from select_videos
+        workers: Concurrent requests (default: 8)
+        dry_run: Only print what would be deleted
+
+    Returns:
+        Dictionary with planned, succeeded and failed (video IDs)
+    """
+    total_size = sum(video.get('fileSize') or 0 for video in videos)
+    print(f"Plan: delete {len(videos)} videos ({format_bytes(total_size)})")
+    _print_plan([f"{video['id']}  {video['title']}  (created {video.get('createdAt', '?')})"
+                 for video in videos[:PLAN_PREVIEW]], len(videos))
+
+    results = {"planned": len(videos), "succeeded": 0, "failed": []}
+    if dry_run or not videos:
+        return results
+
+    print(f"\nDeleting {len(videos)} videos with {workers} workers...")
+    results.update(_run(videos, lambda video: client.delete_video(video['id']),
+                        lambda video: video['id'], workers, "Bulk Delete"))
+    return results
@@ -0,0 +1,602 @@
+"""Record-and-replay HTTP cassettes of API traffic"""
+
+import gzip
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from base64 import b64decode, b64encode
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from .videocache import parse_range
+
+
+CASSETTE_VERSION = 1
+
+#: Largest response body stored; larger bodies (videos) keep only their size
+DEFAULT_MAX_BODY = 1024 * 1024
+
+#: Response headers kept in the cassette; everything else is dropped
+KEPT_HEADERS = ('Content-Type', 'Content-Range', 'Accept-Ranges', 'ETag', 'Last-Modified',
+                'Cache-Control', 'Location')
+
+REDACTED = "REDACTED"
+
+_SECRET_KEY = re.compile(r"token|password|secret|authorization|api_?key|credential", re.IGNORECASE)
+_SECRET_JSON_KEY = re.compile(rb'"[^"]*(?:token|password|secret|authorization|api_?key|credential)[^"]*"\s*:',
+                              re.IGNORECASE)
+_JWT = re.compile(rb"eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*")
+
+# Path segments that identify one resource: GUIDs and long numbers
+_ID_SEGMENT = re.compile(r"/(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d{4,})"
+                         r"(?=/|$|\.)")
+
+# Query parameters that select a page of a list endpoint
+_PAGE_PARAMS = ('page', 'pageSize')
+
+# Bytes written per step while pacing a replayed body
+_PACE_BLOCK = 64 * 1024
+
+
+class CassetteError(Exception):
+    """The cassette cannot be read"""
+
+
+def redact_json(value: Any) -> Any:
+    """Replace the values of secret-looking keys in decoded JSON"""
+    if isinstance(value, dict):
+        return {key: REDACTED if _SECRET_KEY.search(key) else redact_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact_json(item) for item in value]
+    return value
+
+
+def _redact_body(body: bytes, content_type: str) -> bytes:
+    """Remove tokens and secrets from a response body"""
+    if 'json' in content_type and _SECRET_JSON_KEY.search(body):
+        try:
+            body = json.dumps(redact_json(json.loads(body)), ensure_ascii=False).encode('utf-8')
+        except ValueError:
+            pass
+    return _JWT.sub(REDACTED.encode(), body)
+
+
+def _redact_target(url: str) -> str:
+    """Path and query of a URL, with secret-looking query parameters redacted"""
+    parts = urlsplit(url)
+    if not parts.query:
+        return parts.path
+    query = [(key, REDACTED if _SECRET_KEY.search(key) else value)
+             for key, value in parse_qsl(parts.query, keep_blank_values=True)]
+    return f"{parts.path}?{urlencode(query)}"
+
+
+def _is_text(content_type: str) -> bool:
+    return content_type.startswith('text/') or 'json' in content_type or 'xml' in content_type
+
+
+class _RecordingBody:
+    """Wraps a response's raw stream and reports the body once it has been read or closed"""
+
+    def __init__(self, raw: Any, on_done, max_body: int):
+        self._raw = raw
+        self._on_done = on_done
+        self._max_body = max_body
+        self._chunks: Optional[List[bytes]] = []
+        self._received = 0
+        self._done = False
+
+    def _take(self, chunk: bytes):
+        self._received += len(chunk)
+        if self._chunks is not None:
+            if self._received > self._max_body:
+                # Too large to store: only the size is recorded
+                self._chunks = None
+            else:
+                self._chunks.append(chunk)
+
+    def _finish(self, complete: bool):
+        if self._done:
+            return
+        self._done = True
+        body = b"".join(self._chunks) if self._chunks is not None else None
+        self._on_done(body, self._received, complete)
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None) -> Iterator[bytes]:
+        complete = False
+        try:
+            for chunk in self._raw.stream(amt, decode_content=decode_content):
+                self._take(chunk)
+                yield chunk
+            complete = True
+        finally:
+            self._finish(complete)
+
+    def read(self, amt: Optional[int] = None, *args, **kwargs) -> bytes:
+        data = self._raw.read(amt, *args, **kwargs)
+        self._take(data)
+        if amt is None or not data:
+            self._finish(True)
+        return data
+
+    def close(self):
+        self._finish(False)
+        self._raw.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+
+class CassetteRecorder:
+    """
+    Records the HTTP traffic of QRVideoClient sessions into a cassette file
+
+    A cassette is a gzipped JSON lines file. Each request/response pair is one
+    line with the method, path and query, status, a few response headers,
+    the time to the response headers and the total time. Bodies are stored
+    once per distinct content and referenced by hash; bodies larger than
+    max_body_bytes (videos) keep only their size. Request headers and bodies
+    are never stored, secret-looking query parameters and JSON keys are
+    replaced with REDACTED, and JWTs are removed from all bodies. Logins do
+    not go through the session and are not recorded at all.
+
+    Pairs are written as their bodies finish; a cassette cut short by an
+    interrupted recording still replays the pairs written before the cut.
+    """
+
+    def __init__(self, path: str, max_body_bytes: int = DEFAULT_MAX_BODY):
+        """
+        Args:
+            path: Cassette file to write (conventionally *.cassette.gz)
+            max_body_bytes: Largest response body stored (default: 1 MB)
+        """
+        self.path = path
+        self.max_body_bytes = max_body_bytes
+        self.interactions = 0
+        self.bodies = 0
+        self._stored: set = set()
+        self._lock = threading.Lock()
+        self._origin = time.monotonic()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._write({"cassette": CASSETTE_VERSION,
+                     "recordedAt": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')})
+
+    def _write(self, line: Dict[str, Any]):
+        self._file.write(json.dumps(line, ensure_ascii=False, separators=(',', ':')) + "\n")
+
+    def attach(self, client: Any):
+        """Record every request made through client's session from now on"""
+        with self._lock:
+            self._write({"apiUrl": client.base_url})
+        client.session.hooks['response'].append(self._on_response)
+
+    def _on_response(self, response: requests.Response, *args, **kwargs) -> requests.Response:
+        started = time.monotonic() - response.elapsed.total_seconds()
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        entry = {
+            "t": round(started - self._origin, 4),
+            "method": response.request.method,
+            "path": _redact_target(response.request.url),
+            "status": response.status_code,
+            "headers": headers,
+            "latency": round(response.elapsed.total_seconds(), 4),
+        }
+        if response.request.headers.get('Range'):
+            entry['range'] = response.request.headers['Range']
+        declared = response.headers.get('Content-Length')
+        encoded = 'Content-Encoding' in response.headers
+
+        def done(body: Optional[bytes], received: int, complete: bool):
+            # Streamed JSON is often parsed to its last item and closed just before the end of stream
+            complete = complete or (declared is not None and not encoded and received == int(declared))
+            if not complete:
+                body = None
+            entry['duration'] = round(time.monotonic() - started, 4)
+            entry['size'] = received if complete or encoded or not declared else int(declared)
+            with self._lock:
+                if self._file is None:
+                    return
+                if body is not None:
+                    body = _redact_body(body, headers.get('Content-Type', ''))
+                    key = hashlib.sha256(body).hexdigest()[:32]
+                    if key not in self._stored:
+                        self._stored.add(key)
+                        self.bodies += 1
+                        if _is_text(headers.get('Content-Type', '')):
+                            try:
+                                self._write({"body": key, "text": body.decode('utf-8')})
+                            except UnicodeDecodeError:
+                                self._write({"body": key, "base64": b64encode(body).decode('ascii')})
+                        else:
+                            self._write({"body": key, "base64": b64encode(body).decode('ascii')})
+                    entry['body'] = key
+                    entry['size'] = len(body)
+                self._write(entry)
+                self.interactions += 1
+
+        response.raw = _RecordingBody(response.raw, done, self.max_body_bytes)
+        return response
+
+    def close(self):
+        """Finish the cassette file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ReplayResponse(NamedTuple):
+    """One response a replay server can send"""
+    status: int
+    headers: Dict[str, str]
+    body: Optional[bytes]
+    size: int
+    latency: float
+    transfer: float
+
+
+def _shape(method: str, target: str) -> Tuple[str, str]:
+    """Request key with resource IDs and the query removed"""
+    return method, _ID_SEGMENT.sub("/{id}", urlsplit(target).path)
+
+
+def _list_key(target: str) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    """List endpoint path and its non-paging query parameters"""
+    parts = urlsplit(target)
+    query = tuple(sorted((key, value) for key, value in parse_qsl(parts.query) if key not in _PAGE_PARAMS))
+    return parts.path, query
+
+
+def _copy_code(code: str, copy: int) -> str:
+    """
+    A code value for a repeated copy of a listed item
+
+    Each character is replaced from a hash of (code, copy) within its own
+    class (digit, upper or lower case letter), so the value keeps its length
+    and alphabet and distinct (code, copy) pairs do not collide in practice.
+    """
+    digest = hashlib.sha256(f"{code}/{copy}".encode('utf-8')).digest()
+    while len(digest) < len(code):
+        digest += hashlib.sha256(digest).digest()
+    chars = []
+    for char, byte in zip(code, digest):
+        if char.isdigit():
+            chars.append(chr(ord('0') + byte % 10))
+        elif 'A' <= char <= 'Z':
+            chars.append(chr(ord('A') + byte % 26))
+        elif 'a' <= char <= 'z':
+            chars.append(chr(ord('a') + byte % 26))
+        else:
+            chars.append(char)
+    return "".join(chars)
+
+
+class Cassette:
+    """
+    A recorded cassette, indexed for replay
+
+    Responses are found by exact request (method, path and query, Range),
+    then by the request's shape (resource IDs replaced, e.g. GET
+    /api/qrcodes/{id}/image), cycling through the recorded responses.
+    Paged JSON lists are pooled per endpoint and filter, so any page at any
+    page size can be served, and the pool can be repeated to replay a
+    dataset several times larger than the one recorded.
+    """
+
+    def __init__(self, path: str):
+        self.api_urls: List[str] = []
+        self.interactions = 0
+        self.exact: Dict[tuple, List[ReplayResponse]] = defaultdict(list)
+        self.shapes: Dict[tuple, List[ReplayResponse]] = defaultdict(list)
+        # Full resources by path, for Range requests not recorded as such
+        self.resources: Dict[str, ReplayResponse] = {}
+        # List key -> items by id in recorded order, recorded total, (items, latency, transfer) samples
+        self.lists: Dict[tuple, Dict[str, Any]] = {}
+        self._cycles: Dict[tuple, Iterator[ReplayResponse]] = {}
+        self._cycle_lock = threading.Lock()
+        self._load(path)
+
+    def _load(self, path: str):
+        bodies: Dict[str, bytes] = {}
+        entries = []
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get('cassette') != CASSETTE_VERSION:
+                    raise CassetteError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+                for line in f:
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    if 'apiUrl' in item:
+                        self.api_urls.append(item['apiUrl'])
+                    elif 'body' in item and 'method' not in item:
+                        bodies[item['body']] = (item['text'].encode('utf-8') if 'text' in item
+                                                else b64decode(item['base64']))
+                    else:
+                        entries.append(item)
+        except (OSError, EOFError, ValueError) as e:
+            # A cassette cut off by an interrupted recording keeps the lines before the cut
+            if not entries:
+                raise CassetteError(f"Failed to read cassette {path}: {e}")
+
+        for entry in sorted(entries, key=lambda item: item['t']):
+            body = bodies.get(entry.get('body'))
+            size = entry.get('size', len(body or b""))
+            transfer = max(0.0, entry.get('duration', entry['latency']) - entry['latency'])
+            response = ReplayResponse(entry['status'], entry['headers'], body, size, entry['latency'], transfer)
+            self.interactions += 1
+            if self._add_list_page(entry, response):
+                continue
+            self.exact[(entry['method'], entry['path'], entry.get('range'))].append(response)
+            self.shapes[_shape(entry['method'], entry['path'])].append(response)
+            self._add_resource(entry, response)
+
+    def _add_list_page(self, entry: Dict[str, Any], response: ReplayResponse) -> bool:
+        if entry['method'] != 'GET' or response.status != 200 or response.body is None \
+                or 'json' not in response.headers.get('Content-Type', ''):
+            return False
+        try:
+            page = json.loads(response.body)
+        except ValueError:
+            return False
+        if not isinstance(page, dict) or not {'items', 'totalCount', 'pageSize'} <= page.keys():
+            return False
+        pool = self.lists.setdefault(_list_key(entry['path']), {"items": {}, "total": 0, "samples": [],
+                                                                  "headers": response.headers})
+        for item in page['items']:
+            pool['items'].setdefault(item.get('id') if isinstance(item, dict) else json.dumps(item), item)
+        pool['total'] = max(pool['total'], page['totalCount'])
+        pool['samples'].append((len(page['items']), response.latency, response.transfer))
+        return True
+
+    def _add_resource(self, entry: Dict[str, Any], response: ReplayResponse):
+        if entry['method'] != 'GET':
+            return
+        target = urlsplit(entry['path']).path
+        if response.status == 200 and not entry.get('range'):
+            self.resources[target] = response
+        elif response.status == 206 and target not in self.resources:
+            match = re.search(r"bytes (\d+)-(\d+)/(\d+)$", response.headers.get('Content-Range', ''))
+            if match:
+                start, end, size = (int(value) for value in match.groups())
+                # A range covering the whole resource is kept; otherwise the rest is synthesised
+                body = response.body if start == 0 and end == size - 1 else None
+                headers = {k: v for k, v in response.headers.items() if k != 'Content-Range'}
+                self.resources[target] = response._replace(status=200, headers=headers, body=body, size=size)
+
+    def next_response(self, key: tuple, table: Dict[tuple, List[ReplayResponse]]) -> Optional[ReplayResponse]:
+        """The next of the responses recorded under key, cycling"""
+        responses = table.get(key)
+        if not responses:
+            return None
+        with self._cycle_lock:
+            cycle = self._cycles.get((id(table), key))
+            if cycle is None:
+                cycle = self._cycles[(id(table), key)] = itertools.cycle(responses)
+            return next(cycle)
+
+    def list_page(self, target: str, volume: int) -> Optional[ReplayResponse]:
+        """A page of a pooled list endpoint, with the dataset repeated volume times"""
+        pool = self.lists.get(_list_key(target))
+        if pool is None or not pool['items']:
+            return None
+        query = dict(parse_qsl(urlsplit(target).query))
+        page = max(1, int(query.get('page', 1)))
+        page_size = max(1, int(query.get('pageSize', 20)))
+        items = list(pool['items'].values())
+        total = max(pool['total'], len(items)) * volume
+        first = (page - 1) * page_size
+        page_items = []
+        for index in range(first, min(first + page_size, total)):
+            item = items[index % len(items)]
+            copy = index // len(items)
+            if copy and isinstance(item, dict) and 'id' in item:
+                # Repeated items get IDs (and code values) of their own, of the same length
+                item = dict(item, id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{item['id']}/{copy}")))
+                if isinstance(item.get('codeValue'), str):
+                    item['codeValue'] = _copy_code(item['codeValue'], copy)
+            page_items.append(item)
+        body = json.dumps({"items": page_items, "page": page, "pageSize": page_size, "totalCount": total},
+                          ensure_ascii=False).encode('utf-8')
+        # Timing of the recorded page closest in length
+        _, latency, transfer = min(pool['samples'], key=lambda sample: abs(sample[0] - len(page_items)))
+        return ReplayResponse(200, pool['headers'], body, len(body), latency, transfer)
+
+    @property
+    def api_path(self) -> str:
+        """Path of the recorded API root (e.g. /api)"""
+        return urlsplit(self.api_urls[0]).path.rstrip('/') if self.api_urls else ""
+
+
+class _ReplayRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "qrvideo-replay"
+    server: "ReplayServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_HEAD(self):
+        self._handle('HEAD')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method: str):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        cassette = self.server.cassette
+        lookup = 'GET' if method == 'HEAD' else method
+        target = _redact_target(self.path)
+        byte_range = self.headers.get('Range')
+
+        if method == 'POST' and urlsplit(target).path == f"{cassette.api_path}/auth/login":
+            # Logins are never recorded; any credentials are accepted
+            expires = datetime.now(timezone.utc) + timedelta(days=1)
+            body = json.dumps({"token": "replay", "username": "replay",
+                               "expiresAt": expires.isoformat().replace('+00:00', 'Z')}).encode()
+            return self._send(ReplayResponse(200, {"Content-Type": "application/json"}, body, len(body), 0, 0),
+                              method, None)
+
+        response = cassette.list_page(target, self.server.volume) if lookup == 'GET' else None
+        if response is None:
+            response = cassette.next_response((lookup, target, byte_range), cassette.exact)
+            if response is not None:
+                byte_range = None
+        if response is None and lookup == 'GET':
+            response = cassette.resources.get(urlsplit(target).path)
+        if response is None:
+            response = cassette.next_response(_shape(lookup, target), cassette.shapes)
+        if response is None:
+            body = b'{"error":"Not in cassette"}'
+            response = ReplayResponse(404, {"Content-Type": "application/json"}, body, len(body), 0, 0)
+        try:
+            self._send(response, method, byte_range)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _body(self, response: ReplayResponse) -> Optional[bytes]:
+        """Body to send, or None for one recorded by size only"""
+        if response.body is None or not _is_text(response.headers.get('Content-Type', '')):
+            return response.body
+        # Links to the recorded server point at this one instead
+        body = response.body
+        origin = f"http://{self.headers.get('Host', '%s:%d' % self.server.server_address[:2])}".encode()
+        for api_url in self.server.cassette.api_urls:
+            parts = urlsplit(api_url)
+            body = body.replace(f"{parts.scheme}://{parts.netloc}".encode(), origin)
+        return body
+
+    def _send(self, response: ReplayResponse, method: str, byte_range: Optional[str]):
+        scale = self.server.latency_scale
+        if scale and response.latency:
+            time.sleep(response.latency * scale)
+
+        body = self._body(response)
+        size = response.size if body is None else len(body)
+        status, headers = response.status, dict(response.headers)
+        start, end = 0, size - 1
+        if byte_range and status == 200 and not _is_text(headers.get('Content-Type', '')):
+            try:
+                span = parse_range(byte_range, size)
+            except ValueError:
+                span = None
+                status = 416
+                headers['Content-Range'] = f"bytes */{size}"
+                start, end = 0, -1
+            if span:
+                start, end = span
+                status = 206
+                headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+        length = end - start + 1
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+        if method == 'HEAD' or length <= 0:
+            return
+
+        # Only the requested span is produced; filler is generated block by block
+        if body is None:
+            blocks = self.server.filler(start, length, _PACE_BLOCK)
+        else:
+            view = memoryview(body)[start:end + 1]
+            blocks = (view[offset:offset + _PACE_BLOCK] for offset in range(0, length, _PACE_BLOCK))
+
+        # Spread the body over the recorded transfer time, scaled
+        transfer = response.transfer * scale * length / response.size if scale and response.size else 0
+        started = time.monotonic()
+        sent = 0
+        for block in blocks:
+            self.wfile.write(block)
+            sent += len(block)
+            if transfer > 0:
+                ahead = started + transfer * sent / length - time.monotonic()
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    HTTP server answering from a cassette
+
+    Responses are delayed by their recorded time to first byte and paced
+    over their recorded transfer time, both multiplied by latency_scale
+    (0 sends them immediately). Bodies recorded by size only are filled
+    with random bytes. Logins always succeed.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], cassette: Cassette, latency_scale: float = 1.0, volume: int = 1):
+        super().__init__(address, _ReplayRequestHandler)
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+        self.volume = max(1, volume)
+        self._filler = random.Random(0).getrandbits(8 * 1024 * 1024).to_bytes(1024 * 1024, 'little')
+
+    def filler(self, start: int, length: int, block_size: int) -> Iterator[bytes]:
+        """
+        Bytes start to start + length of a body recorded by size only
+
+        The body repeats a fixed 1 MB pattern; the span is generated in blocks
+        of at most block_size, without building the body in memory.
+        """
+        pattern = memoryview(self._filler)
+        position = start % len(pattern)
+        while length > 0:
+            block = pattern[position:position + min(block_size, length)]
+            yield block
+            length -= len(block)
+            position = (position + len(block)) % len(pattern)
+
+
+def serve_replay(cassette_path: str, host: str = '127.0.0.1', port: int = 8080,
+                 latency_scale: float = 1.0, volume: int = 1):
+    """
+    Serve a cassette until interrupted
+
+    Args:
+        cassette_path: Cassette file written by CassetteRecorder
+        host: Address to listen on (default: 127.0.0.1)
+        port: Port to listen on (default: 8080)
+        latency_scale: Multiplier of the recorded latencies (default: 1.0; 0 for none)
+        volume: Times to repeat the recorded list data (default: 1)
+
+    Raises:
+        CassetteError: If the cassette cannot be read
+    """
+    cassette = Cassette(cassette_path)
+    server = ReplayServer((host, port), cassette, latency_scale, volume)
+    print(f"Replaying {cassette.interactions} recorded requests ({len(cassette.lists)} list endpoints, "
+          f"{volume}x volume, {latency_scale:g}x latency)")
+    print(f"  API URL: http://{host}:{server.server_port}{cassette.api_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        server.server_close()
@@ -3,38 +3,86 @@
 QR Video CLI - Command-line tool for QR Video System management
 
 Usage:
-    qrvideo login <username> <password>
+    qrvideo [--max-bandwidth RATE] [--max-upload-bandwidth RATE] [--max-download-bandwidth RATE] ...
+    qrvideo [--profile NAME | --all-profiles] <command> ...
+    qrvideo [--record CASSETTE] <command> ...
+    qrvideo [--profile NAME] login <username> <password>
     qrvideo videos list [--page PAGE] [--size SIZE] [--search TERM]
-    qrvideo videos upload <title> <file> [--description DESC]
-    qrvideo videos bulk-upload <directory> [--pattern PATTERN] [--recursive]
-    qrvideo videos export [--output FILE] [--search TERM]
+    qrvideo videos upload <title> <file> [--description DESC] [--no-faststart]
+    qrvideo videos bulk-upload <directory> [--pattern PATTERN]... [--exclude PATTERN]...
+                               [--recursive] [--workers N] [--no-faststart] [--no-preflight]
+                               [--trace FILE]
+    qrvideo videos preflight <path>... [--pattern PATTERN]... [--exclude PATTERN]...
+                             [--recursive] [--workers N]
+    qrvideo videos export [--output FILE] [--search TERM] [--page-size N]
     qrvideo videos delete <video_id>
+    qrvideo videos bulk-delete [--search TERM] [--match GLOB] [--active | --inactive]
+                               [--created-before DATE] [--created-after DATE] [--not-played-since DATE]
+                               [--without-qrcodes] [--all] [--dry-run] [--yes] [--workers N]
     qrvideo qrcodes list [--page PAGE] [--size SIZE] [--video-id ID]
     qrvideo qrcodes create <video_id> [--description DESC] [--inactive]
     qrvideo qrcodes bulk-create <csv_file> [--download-images] [--output-dir DIR]
-    qrvideo qrcodes export [--output FILE] [--video-id ID]
-    qrvideo qrcodes download-all [--output-dir DIR] [--video-id ID]
+    qrvideo qrcodes export [--output FILE] [--video-id ID] [--page-size N]
+    qrvideo qrcodes download-all [--output-dir DIR] [--video-id ID] [--page-size N] [--trace FILE]
+    qrvideo qrcodes verify <directory> [--base-url URL] [--workers N] [--recursive]
+    qrvideo qrcodes sheets [--image-dir DIR] [--csv FILE] [--format pdf|png] [--output PATH]
+                           [--paper a4|a3|letter] [--dpi 300] [--grid 4x6] [--margin MM]
     qrvideo qrcodes delete <qrcode_id>
-    qrvideo stats
+    qrvideo qrcodes bulk-update [FILTERS] [--set-active | --set-inactive] [--set-description TEXT]
+                                [--set-video-id ID] [--dry-run] [--yes] [--workers N]
+    qrvideo qrcodes bulk-delete [FILTERS] [--dry-run] [--yes] [--workers N]
+        FILTERS: [--video-id ID] [--codes FILE] [--match GLOB] [--active | --inactive]
+                 [--created-before DATE] [--created-after DATE] [--all]
+    qrvideo stats [--watch] [--interval SECONDS] [--window SAMPLES]
+    qrvideo backup [--output-dir DIR] [--workers N] [--connections N] [--no-videos]
+    qrvideo restore <snapshot> [--workers N]
+    qrvideo replicate --from PROFILE --to PROFILE [--workers N] [--connections N]
+                      [--mapping-file FILE] [--search TERM]
+    qrvideo loadtest [--rps N] [--duration SECONDS] [--ramp SPEC] [--codes FILE] [--zipf S]
+                     [--invalid-ratio R] [--play-ratio R] [--connections N] [--output FILE]
+    qrvideo warm [--workers N] [--first-mb MB] [--scan-window N] [--video-id ID]
+    qrvideo cache prefetch [--max-gb GB] [--policy lru|lfu] [--max-plays N] [--limit N]
+    qrvideo cache serve [--host HOST] [--port PORT] [--max-gb GB] [--policy lru|lfu]
+    qrvideo cache status [--cache-dir DIR]
     qrvideo logs scans [--page PAGE] [--size SIZE] [--qrcode-id ID]
     qrvideo logs plays [--page PAGE] [--size SIZE] [--video-id ID]
+    qrvideo logs export [--output-dir DIR] [--kind scans|plays|all] [--workers N] [--page-size N]
+    qrvideo audit [--logs scans|plays|all|none] [--archive DIR] [--workers N] [--page-size N]
+                  [--limit N] [--output FILE]
+    qrvideo replay <cassette> [--host HOST] [--port PORT] [--latency-scale X] [--volume N]
 """
 
 import sys
 import argparse
+import configparser
+import copy
 import os
+import shutil
+import tempfile
+import time
 from pathlib import Path
+from typing import Dict, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from qrvideo_cli.api import QRVideoClient
-from qrvideo_cli import batch
+from qrvideo_cli import audit, backup, cassette, batch, bulk, loadtest, logarchive, preflight, replicate, videocache, warm
+from qrvideo_cli.fanout import fan_out
+from qrvideo_cli.paging import ListingIncomplete, iter_all_items
+from qrvideo_cli.stats import StatsMonitor, SummaryCache
+from qrvideo_cli.throttle import BandwidthLimiter, format_bytes, parse_bandwidth
+from qrvideo_cli.tracing import Tracer
 
 
 # Configuration
 DEFAULT_API_URL = os.environ.get('QRVIDEO_API_URL', 'https://mzfmedia.cn/api')
 CONFIG_FILE = Path.home() / '.qrvideo_cli' / 'config'
+PROFILES_FILE = Path.home() / '.qrvideo_cli' / 'profiles'
+
+# Output arguments that get a per-profile name under --all-profiles
+PROFILE_OUTPUT_FILES = ('output', 'trace')
+PROFILE_OUTPUT_DIRS = ('output_dir',)
 
 
 def save_credentials(username: str, token: str):
@@ -68,17 +116,109 @@ def load_credentials():
     return username, token
 
 
-def get_client(api_url: str = DEFAULT_API_URL, require_auth: bool = True):
+def load_profiles() -> Dict[str, Dict[str, str]]:
+    """Load deployment profiles (api_url, username, token per section)"""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(PROFILES_FILE, encoding='utf-8')
+    return {name: dict(parser[name]) for name in parser.sections()}
+
+
+def save_profile(name: str, api_url: str, username: str, token: str):
+    """Save a deployment's URL and credentials to the profiles file"""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(PROFILES_FILE, encoding='utf-8')
+    parser[name] = {"api_url": api_url, "username": username, "token": token}
+
+    PROFILES_FILE.parent.mkdir(exist_ok=True)
+    with open(PROFILES_FILE, 'w', encoding='utf-8') as f:
+        parser.write(f)
+
+    # Set restrictive permissions
+    os.chmod(PROFILES_FILE, 0o600)
+
+
+def parse_date_arg(value: str):
+    """argparse type for ISO 8601 dates and timestamps (UTC unless given)"""
+    try:
+        return bulk.parse_timestamp(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value!r} (expected e.g. 2025-06-30 or 2025-06-30T12:00)")
+
+
+def parse_seconds_arg(value: str) -> float:
+    """argparse type for a positive number of seconds"""
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = 0
+    if not seconds > 0:
+        raise argparse.ArgumentTypeError(f"invalid interval: {value!r} (expected seconds > 0)")
+    return seconds
+
+
+def confirm_bulk(args, prompt: str) -> bool:
+    """Ask before a destructive bulk operation unless --yes or --dry-run is given"""
+    if args.dry_run or args.yes:
+        return True
+    if args.all_profiles or not sys.stdin.isatty():
+        print("✗ Pass --yes to confirm, or --dry-run to only show the plan")
+        return False
+    try:
+        return input(f"{prompt} [y/N] ").strip().lower() in ('y', 'yes')
+    except EOFError:
+        return False
+
+
+def build_limiter(args) -> BandwidthLimiter:
+    """Build the bandwidth limiter shared by all transfers of a command"""
+    try:
+        upload = args.max_upload_bandwidth or args.max_bandwidth
+        download = args.max_download_bandwidth or args.max_bandwidth
+        return BandwidthLimiter(
+            upload_rate=parse_bandwidth(upload) if upload else None,
+            download_rate=parse_bandwidth(download) if download else None
+        )
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+
+def get_profile(args) -> Optional[Dict[str, str]]:
+    """Settings of the selected deployment profile, if any"""
+    if getattr(args, 'profile_settings', None) is not None:
+        return args.profile_settings
+    if not args.profile:
+        return None
+
+    profiles = load_profiles()
+    if args.profile not in profiles:
+        print(f"✗ Unknown profile: {args.profile} (see {PROFILES_FILE})")
+        sys.exit(1)
+    return profiles[args.profile]
+
+
+def get_client(args, require_auth: bool = True):
     """Get API client with authentication"""
-    client = QRVideoClient(api_url)
+    profile = get_profile(args)
+    api_url = profile.get('api_url', args.api_url) if profile else args.api_url
+    limiter = getattr(args, 'limiter', None) or build_limiter(args)
+    tracer = Tracer() if getattr(args, 'trace', None) else None
+    client = QRVideoClient(api_url, limiter=limiter, tracer=tracer, recorder=getattr(args, 'recorder', None))
 
     if require_auth:
         # Try to load saved credentials
-        username, token = load_credentials()
+        if profile:
+            username, token = profile.get('username'), profile.get('token')
+        else:
+            username, token = load_credentials()
         if username and token:
             client.username = username
             client.token = token
             print(f"Using saved credentials for {username}")
+        elif profile:
+            print(f"Not authenticated. Please run: qrvideo --profile {args.profile} "
+                  f"--api-url <url> login <username> <password>")
+            sys.exit(1)
         else:
             print("Not authenticated. Please run: qrvideo login <username> <password>")
             sys.exit(1)
@@ -86,6 +226,96 @@ def get_client(api_url: str = DEFAULT_API_URL, require_auth: bool = True):
     return client
 
 
+def save_trace(client: QRVideoClient, path: Optional[str]):
+    """Write the client's trace, if --trace was given"""
+    if not path or client.tracer is None:
+        return
+    try:
+        client.tracer.save(path)
+        print(f"✓ Trace with {client.tracer.event_count} events written to {path} "
+              f"(open in https://ui.perfetto.dev or chrome://tracing)")
+    except OSError as e:
+        print(f"✗ Failed to write trace: {e}")
+
+
+def profile_path(path: str, profile: str, is_dir: bool = False) -> str:
+    """Give each profile its own output file or directory"""
+    if is_dir:
+        return os.path.join(path, profile)
+    root, ext = os.path.splitext(path)
+    return f"{root}.{profile}{ext}"
+
+
+def run_all_profiles(args):
+    """Run the selected command against every profile concurrently"""
+    profiles = load_profiles()
+    if not profiles:
+        print(f"✗ No profiles configured in {PROFILES_FILE}")
+        sys.exit(1)
+
+    # One bandwidth budget shared by all deployments
+    args.limiter = build_limiter(args)
+
+    if args.func is cmd_stats:
+        stats_all_profiles(args, profiles)
+        return
+
+    def work(name, settings):
+        profile_args = copy.copy(args)
+        profile_args.profile = name
+        profile_args.profile_settings = settings
+        for attr in PROFILE_OUTPUT_FILES:
+            if getattr(profile_args, attr, None):
+                setattr(profile_args, attr, profile_path(getattr(profile_args, attr), name))
+        for attr in PROFILE_OUTPUT_DIRS:
+            if getattr(profile_args, attr, None):
+                setattr(profile_args, attr, profile_path(getattr(profile_args, attr), name, is_dir=True))
+        args.func(profile_args)
+
+    results = fan_out(profiles, work)
+
+    failed = []
+    print(f"\n{'='*60}")
+    print(f"Profiles Summary:")
+    for name, (_, error) in results.items():
+        if error is None or (isinstance(error, SystemExit) and not error.code):
+            print(f"  ✓ {name}")
+        else:
+            reason = f"exit code {error.code}" if isinstance(error, SystemExit) else error
+            print(f"  ✗ {name}: {reason}")
+            failed.append(name)
+
+    if failed:
+        sys.exit(1)
+
+
+def stats_all_profiles(args, profiles: Dict[str, Dict[str, str]]):
+    """Fetch summaries from every profile concurrently and print a merged table"""
+    def work(name, settings):
+        profile_args = copy.copy(args)
+        profile_args.profile = name
+        profile_args.profile_settings = settings
+        return get_client(profile_args).get_stats_summary()
+
+    results = fan_out(profiles, work)
+
+    columns = [('videoCount', 'Videos'), ('qrCodeCount', 'QR Codes'),
+               ('scanCount', 'Scans'), ('playCount', 'Plays')]
+    width = max(len(name) for name in list(profiles) + ['TOTAL'])
+    totals = {key: 0 for key, _ in columns}
+
+    print("\nDashboard Summary:")
+    print(f"  {'Profile':<{width}}" + "".join(f"{title:>12}" for _, title in columns))
+    for name, (stats, _) in results.items():
+        if not stats:
+            print(f"  {name:<{width}}  ✗ unavailable")
+            continue
+        for key, _ in columns:
+            totals[key] += stats[key]
+        print(f"  {name:<{width}}" + "".join(f"{stats[key]:>12}" for key, _ in columns))
+    print(f"  {'TOTAL':<{width}}" + "".join(f"{totals[key]:>12}" for key, _ in columns))
+
+
 def cmd_login(args):
     """Handle login command"""
     client = QRVideoClient(args.api_url)
@@ -95,8 +325,12 @@ def cmd_login(args):
         print(f"  Token expires: {client.token_expires}")
 
         # Save credentials
-        save_credentials(client.username, client.token)
-        print(f"  Credentials saved to {CONFIG_FILE}")
+        if args.profile:
+            save_profile(args.profile, client.base_url, client.username, client.token)
+            print(f"  Credentials saved to profile '{args.profile}' in {PROFILES_FILE}")
+        else:
+            save_credentials(client.username, client.token)
+            print(f"  Credentials saved to {CONFIG_FILE}")
     else:
         print("✗ Login failed")
         sys.exit(1)
@@ -104,7 +338,7 @@ def cmd_login(args):
 
 def cmd_videos_list(args):
     """List videos"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     data = client.list_videos(
         page=args.page,
@@ -132,17 +366,23 @@ def cmd_videos_list(args):
 
 def cmd_videos_upload(args):
     """Upload a video"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     if not os.path.exists(args.file):
         print(f"✗ File not found: {args.file}")
         sys.exit(1)
 
-    result = client.upload_video(
-        title=args.title,
-        file_path=args.file,
-        description=args.description
-    )
+    tmp_dir = tempfile.mkdtemp(prefix="qrvideo-upload-")
+    try:
+        upload_path = args.file if args.no_faststart else batch.prepare_upload(args.file, tmp_dir)
+        result = client.upload_video(
+            title=args.title,
+            file_path=upload_path,
+            description=args.description,
+            file_name=os.path.basename(args.file)
+        )
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
 
     if result:
         print(f"✓ Video uploaded successfully!")
@@ -155,34 +395,76 @@ def cmd_videos_upload(args):
 
 def cmd_videos_bulk_upload(args):
     """Bulk upload videos"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     if not os.path.exists(args.directory):
         print(f"✗ Directory not found: {args.directory}")
         sys.exit(1)
 
-    batch.bulk_upload_videos(
-        client=client,
-        directory=args.directory,
-        file_pattern=args.pattern,
-        recursive=args.recursive
-    )
+    try:
+        batch.bulk_upload_videos(
+            client=client,
+            directory=args.directory,
+            file_pattern=args.pattern or ['*.mp4'],
+            recursive=args.recursive,
+            exclude_patterns=args.exclude,
+            workers=args.workers,
+            faststart=not args.no_faststart,
+            preflight=not args.no_preflight
+        )
+    finally:
+        save_trace(client, args.trace)
+
+
+def cmd_videos_preflight(args):
+    """Validate video files before uploading them"""
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(file_path for file_path, _ in batch.scan_video_files(
+                path, args.pattern or ['*.mp4'], args.exclude, args.recursive))
+        elif os.path.exists(path):
+            paths.append(path)
+        else:
+            print(f"✗ File not found: {path}")
+            sys.exit(1)
+
+    print(f"Checking {len(paths)} files...")
+    passed = 0
+    total_duration = 0.0
+    for result in preflight.check_files(paths, workers=args.workers):
+        print(preflight.format_result(result))
+        for warning in result.warnings:
+            print(f"  ⚠ {warning}")
+        if result.ok:
+            passed += 1
+            total_duration += result.duration or 0
+
+    print(f"\n{'='*60}")
+    print(f"Preflight Summary:")
+    print(f"  Passed: {passed}")
+    print(f"  Rejected: {len(paths) - passed}")
+    print(f"  Total duration: {total_duration:.1f}s")
+
+    if passed < len(paths):
+        sys.exit(1)
 
 
 def cmd_videos_export(args):
     """Export videos to CSV"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     batch.export_videos_to_csv(
         client=client,
         output_file=args.output,
-        search=args.search
+        search=args.search,
+        page_size=args.page_size
     )
 
 
 def cmd_videos_delete(args):
     """Delete a video"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     if client.delete_video(args.video_id):
         print(f"✓ Video deleted: {args.video_id}")
@@ -191,9 +473,107 @@ def cmd_videos_delete(args):
         sys.exit(1)
 
 
+def cmd_videos_bulk_delete(args):
+    """Delete every video matching the filters"""
+    filters = (args.search, args.match, args.active, args.created_before, args.created_after,
+               args.not_played_since)
+    if all(f is None for f in filters) and not args.without_qrcodes and not args.all:
+        print("✗ Give at least one filter, or --all to select every video")
+        sys.exit(1)
+
+    client = get_client(args)
+    print("Selecting videos...")
+    try:
+        videos = bulk.select_videos(
+            client=client,
+            search=args.search,
+            match=args.match,
+            active=args.active,
+            created_after=args.created_after,
+            created_before=args.created_before,
+            not_played_since=args.not_played_since,
+            without_qrcodes=args.without_qrcodes,
+            page_size=args.page_size
+        )
+    except ListingIncomplete as e:
+        print(f"✗ Could not list every item ({e}); nothing was deleted")
+        sys.exit(1)
+
+    bulk.bulk_delete_videos(client, videos, workers=args.workers, dry_run=True)
+    if args.dry_run or not videos:
+        return
+    if not confirm_bulk(args, f"Delete {len(videos)} videos?"):
+        sys.exit(1)
+
+    results = bulk.bulk_delete_videos(client, videos, workers=args.workers)
+    if results['failed']:
+        sys.exit(1)
+
+
+def select_bulk_qrcodes(args, client: QRVideoClient):
+    """QR codes matching the filter arguments of qrcodes bulk-update/bulk-delete"""
+    filters = (args.video_id, args.codes, args.match, args.active, args.created_before, args.created_after)
+    if all(f is None for f in filters) and not args.all:
+        print("✗ Give at least one filter, or --all to select every QR code")
+        sys.exit(1)
+
+    print("Selecting QR codes...")
+    try:
+        return bulk.select_qrcodes(
+            client=client,
+            video_id=args.video_id,
+            codes=loadtest.load_codes(args.codes, include_inactive=True) if args.codes else None,
+            match=args.match,
+            active=args.active,
+            created_after=args.created_after,
+            created_before=args.created_before,
+            page_size=args.page_size
+        )
+    except ListingIncomplete as e:
+        print(f"✗ Could not list every item ({e}); nothing was changed")
+        sys.exit(1)
+
+
+def cmd_qrcodes_bulk_update(args):
+    """Apply the same change to every QR code matching the filters"""
+    if args.set_active is None and args.set_description is None and args.set_video_id is None:
+        print("✗ Nothing to change: give --set-active, --set-inactive, --set-description or --set-video-id")
+        sys.exit(1)
+
+    client = get_client(args)
+    qrcodes = select_bulk_qrcodes(args, client)
+    changes = dict(video_id=args.set_video_id, description=args.set_description, is_active=args.set_active)
+
+    plan = bulk.bulk_update_qrcodes(client, qrcodes, workers=args.workers, dry_run=True, **changes)
+    if args.dry_run or not plan['planned']:
+        return
+    if not confirm_bulk(args, f"Update {plan['planned']} QR codes?"):
+        sys.exit(1)
+
+    results = bulk.bulk_update_qrcodes(client, qrcodes, workers=args.workers, **changes)
+    if results['failed']:
+        sys.exit(1)
+
+
+def cmd_qrcodes_bulk_delete(args):
+    """Delete every QR code matching the filters"""
+    client = get_client(args)
+    qrcodes = select_bulk_qrcodes(args, client)
+
+    bulk.bulk_delete_qrcodes(client, qrcodes, workers=args.workers, dry_run=True)
+    if args.dry_run or not qrcodes:
+        return
+    if not confirm_bulk(args, f"Delete {len(qrcodes)} QR codes?"):
+        sys.exit(1)
+
+    results = bulk.bulk_delete_qrcodes(client, qrcodes, workers=args.workers)
+    if results['failed']:
+        sys.exit(1)
+
+
 def cmd_qrcodes_list(args):
     """List QR codes"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     data = client.list_qrcodes(
         page=args.page,
@@ -220,7 +600,7 @@ def cmd_qrcodes_list(args):
 
 def cmd_qrcodes_create(args):
     """Create a QR code"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     result = client.create_qrcode(
         video_id=args.video_id,
@@ -239,7 +619,7 @@ def cmd_qrcodes_create(args):
 
 def cmd_qrcodes_bulk_create(args):
     """Bulk create QR codes from CSV"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     if not os.path.exists(args.csv_file):
         print(f"✗ CSV file not found: {args.csv_file}")
@@ -255,29 +635,103 @@ def cmd_qrcodes_bulk_create(args):
 
 def cmd_qrcodes_export(args):
     """Export QR codes to CSV"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     batch.export_qrcodes_to_csv(
         client=client,
         output_file=args.output,
-        video_id=args.video_id
+        video_id=args.video_id,
+        page_size=args.page_size
     )
 
 
 def cmd_qrcodes_download_all(args):
     """Download all QR code images"""
-    client = get_client(args.api_url)
+    client = get_client(args)
+
+    try:
+        batch.download_all_qr_images(
+            client=client,
+            output_dir=args.output_dir,
+            video_id=args.video_id,
+            page_size=args.page_size
+        )
+    finally:
+        save_trace(client, args.trace)
+
+
+def cmd_qrcodes_verify(args):
+    """Decode QR images offline and check them against their code values"""
+    try:
+        from qrvideo_cli import qrverify
+    except ImportError:
+        print("✗ qrcodes verify requires numpy: pip install numpy")
+        sys.exit(1)
 
-    batch.download_all_qr_images(
-        client=client,
-        output_dir=args.output_dir,
-        video_id=args.video_id
+    if not os.path.isdir(args.directory):
+        print(f"✗ Directory not found: {args.directory}")
+        sys.exit(1)
+
+    results = qrverify.verify_directory(
+        directory=args.directory,
+        workers=args.workers,
+        base_url=args.base_url,
+        recursive=args.recursive
     )
 
+    if results['mismatched'] or results['unreadable']:
+        sys.exit(1)
+
+
+def cmd_qrcodes_sheets(args):
+    """Compose printable sheets of labelled QR code images"""
+    try:
+        from qrvideo_cli import sheets
+    except ImportError:
+        print("✗ qrcodes sheets requires numpy: pip install numpy")
+        sys.exit(1)
+
+    try:
+        layout = sheets.make_layout(
+            paper=args.paper,
+            dpi=args.dpi,
+            grid=sheets.parse_grid(args.grid),
+            margin_mm=args.margin
+        )
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    if args.csv:
+        if not os.path.exists(args.csv):
+            print(f"✗ File not found: {args.csv}")
+            sys.exit(1)
+        labels = list(sheets.read_label_csv(args.csv))
+    else:
+        client = get_client(args)
+        print("Fetching QR codes...")
+        labels = [
+            (qr['codeValue'], qr.get('videoTitle') or '')
+            for qr in iter_all_items(client.list_qrcodes, args.page_size, video_id=args.video_id)
+        ]
+
+    output = args.output or ('qr_sheets.pdf' if args.format == 'pdf' else 'qr_sheets')
+    results = sheets.compose_sheets(
+        labels=labels,
+        image_dir=args.image_dir,
+        output=output,
+        fmt=args.format,
+        layout=layout,
+        workers=args.workers
+    )
+
+    if results['missing'] or results['unreadable']:
+        sys.exit(1)
+
 
 def cmd_qrcodes_delete(args):
     """Delete a QR code"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     if client.delete_qrcode(args.qrcode_id):
         print(f"✓ QR code deleted: {args.qrcode_id}")
@@ -286,23 +740,235 @@ def cmd_qrcodes_delete(args):
         sys.exit(1)
 
 
+def print_summary(stats):
+    """Print dashboard summary totals"""
+    print("Dashboard Summary:")
+    print(f"  Videos: {stats['videoCount']}")
+    print(f"  QR Codes: {stats['qrCodeCount']}")
+    print(f"  Total Scans: {stats['scanCount']}")
+    print(f"  Total Plays: {stats['playCount']}")
+
+
 def cmd_stats(args):
     """Show statistics"""
-    client = get_client(args.api_url)
+    client = get_client(args)
+
+    if args.watch:
+        watch_stats(client, args.interval, args.window)
+        return
 
     stats = client.get_stats_summary()
 
     if stats:
-        print("Dashboard Summary:")
-        print(f"  Videos: {stats['videoCount']}")
-        print(f"  QR Codes: {stats['qrCodeCount']}")
-        print(f"  Total Scans: {stats['scanCount']}")
-        print(f"  Total Plays: {stats['playCount']}")
+        print_summary(stats)
+
+
+def watch_stats(client: QRVideoClient, interval: float, window: int):
+    """Redraw the summary with client-side rates until interrupted"""
+    monitor = StatsMonitor(SummaryCache(client, ttl=interval), window=window)
+    redraw = min(1.0, interval)
+    clear = sys.stdout.isatty()
+
+    try:
+        while True:
+            new_sample = monitor.poll()
+            if monitor.summary and (clear or new_sample):
+                if clear:
+                    print("\033[H\033[J", end="")
+                print_summary(monitor.summary)
+
+                current = monitor.current_rates()
+                average = monitor.average_rates()
+                if current and average:
+                    span = monitor.samples[-1].at - monitor.samples[0].at
+                    print(f"  Scans/sec: {current[0]:.2f} (avg {average[0]:.2f} over {span:.0f}s)")
+                    print(f"  Plays/sec: {current[1]:.2f} (avg {average[1]:.2f} over {span:.0f}s)")
+                else:
+                    print("  Rates: waiting for second sample...")
+                print(f"  Updated {monitor.age():.0f}s ago, refresh every {interval:g}s "
+                      f"({monitor.cache.requests} requests) - Ctrl+C to stop")
+                if not clear:
+                    print()
+            time.sleep(redraw)
+    except KeyboardInterrupt:
+        print()
+
+
+def cmd_backup(args):
+    """Create an incremental snapshot"""
+    client = get_client(args)
+
+    if not backup.backup_snapshot(
+        client=client,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        include_videos=not args.no_videos,
+        connections=args.connections
+    ):
+        sys.exit(1)
+
+
+def cmd_restore(args):
+    """Restore a snapshot"""
+    client = get_client(args)
+
+    if not os.path.isdir(args.snapshot):
+        print(f"✗ Snapshot not found: {args.snapshot}")
+        sys.exit(1)
+
+    if not backup.restore_snapshot(
+        client=client,
+        snapshot_dir=args.snapshot,
+        workers=args.workers
+    ):
+        sys.exit(1)
+
+
+def profile_client(args, name: str) -> QRVideoClient:
+    """Get an authenticated client for a named profile"""
+    profile_args = copy.copy(args)
+    profile_args.profile = name
+    profile_args.profile_settings = None
+    return get_client(profile_args)
+
+
+def cmd_replicate(args):
+    """Replicate videos and QR codes between two profiles"""
+    if args.source == args.target:
+        print("✗ Source and target profiles must differ")
+        sys.exit(1)
+
+    # Both sides share one bandwidth budget
+    args.limiter = build_limiter(args)
+    source = profile_client(args, args.source)
+    target = profile_client(args, args.target)
+
+    results = replicate.replicate(
+        source=source,
+        target=target,
+        mapping_file=args.mapping_file,
+        workers=args.workers,
+        search=args.search,
+        connections=args.connections
+    )
+
+    if results['failed']:
+        sys.exit(1)
+
+
+def cmd_loadtest(args):
+    """Generate scan/play load against the public endpoints"""
+    try:
+        stages = loadtest.parse_ramp(args.ramp) if args.ramp else [(0.0, args.rps), (args.duration, args.rps)]
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    if args.codes:
+        if not os.path.exists(args.codes):
+            print(f"✗ File not found: {args.codes}")
+            sys.exit(1)
+        client = get_client(args, require_auth=False)
+        codes = loadtest.load_codes(args.codes)
+    else:
+        client = get_client(args)
+        print("Fetching QR codes...")
+        codes = [
+            qr['codeValue']
+            for qr in iter_all_items(client.list_qrcodes, args.page_size)
+            if qr.get('isActive', True)
+        ]
+    if not codes and args.invalid_ratio < 1:
+        print("⚠ No active QR codes found; every scan will use an invalid code")
+
+    loadtest.run_loadtest(
+        base_url=client.base_url,
+        codes=codes,
+        stages=stages,
+        zipf_s=args.zipf,
+        invalid_ratio=args.invalid_ratio,
+        play_ratio=args.play_ratio,
+        play_delay=args.play_delay,
+        connections=args.connections,
+        max_in_flight=args.max_in_flight,
+        timeout=args.timeout,
+        seed=args.seed,
+        output=args.output
+    )
+
+
+def cmd_warm(args):
+    """Warm resolve lookups and video first bytes for all active QR codes"""
+    client = get_client(args)
+
+    results = warm.warm_caches(
+        client=client,
+        workers=args.workers,
+        first_bytes=int(args.first_mb * 1024 * 1024),
+        scan_window=args.scan_window,
+        video_id=args.video_id,
+        page_size=args.page_size
+    )
+
+    if results['failed']:
+        sys.exit(1)
+
+
+def open_video_cache(args, client: QRVideoClient) -> videocache.VideoCache:
+    """Open the video cache configured by the cache command arguments"""
+    return videocache.VideoCache(
+        client=client,
+        cache_dir=args.cache_dir or videocache.DEFAULT_CACHE_DIR,
+        max_bytes=int(args.max_gb * 1024 ** 3),
+        policy=args.policy,
+        connections=args.connections
+    )
+
+
+def cmd_cache_prefetch(args):
+    """Download the most played videos into the local cache"""
+    client = get_client(args)
+
+    with open_video_cache(args, client) as cache:
+        results = cache.prefetch_popular(
+            max_plays=args.max_plays,
+            limit=args.limit,
+            page_size=args.page_size
+        )
+
+    if results['failed']:
+        sys.exit(1)
+
+
+def cmd_cache_serve(args):
+    """Serve cached videos to a local player"""
+    client = get_client(args, require_auth=False)
+
+    with open_video_cache(args, client) as cache:
+        videocache.serve_cache(cache, host=args.host, port=args.port)
+
+
+def cmd_cache_status(args):
+    """Show the videos in the local cache"""
+    client = get_client(args, require_auth=False)
+
+    with open_video_cache(args, client) as cache:
+        entries = cache.entries()
+        print(f"Video Cache ({cache.cache_dir}):")
+        print(f"Used: {format_bytes(cache.used_bytes())} of {format_bytes(cache.max_bytes)}\n")
+
+        for entry in entries:
+            last_played = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.used_at))
+            print(f"• {entry.title or entry.video_id}")
+            print(f"  ID: {entry.video_id}")
+            print(f"  Size: {format_bytes(entry.size)}, {entry.hits} plays, last {last_played}")
+            print(f"  SHA-256: {entry.sha256}")
+            print()
 
 
 def cmd_logs_scans(args):
     """View scan logs"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     data = client.list_scan_logs(
         page=args.page,
@@ -327,7 +993,7 @@ def cmd_logs_scans(args):
 
 def cmd_logs_plays(args):
     """View play logs"""
-    client = get_client(args.api_url)
+    client = get_client(args)
 
     data = client.list_play_logs(
         page=args.page,
@@ -350,6 +1016,75 @@ def cmd_logs_plays(args):
             print()
 
 
+def cmd_logs_export(args):
+    """Archive scan and play logs into day-partitioned files"""
+    client = get_client(args)
+
+    kinds = tuple(logarchive.LOG_KINDS) if args.kind == 'all' else (args.kind,)
+    try:
+        results = logarchive.export_logs(
+            client=client,
+            output_dir=args.output_dir,
+            kinds=kinds,
+            workers=args.workers,
+            page_size=args.page_size
+        )
+    except logarchive.ArchiveError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    if any(result['error'] for result in results.values()):
+        sys.exit(1)
+
+
+def cmd_audit(args):
+    """Cross-check videos, QR codes and logs for orphans and inconsistencies"""
+    client = get_client(args)
+
+    logs = {'all': tuple(logarchive.LOG_KINDS), 'none': ()}.get(args.logs, (args.logs,))
+    try:
+        counts = audit.audit(
+            client=client,
+            logs=logs,
+            archive_dir=args.archive,
+            workers=args.workers,
+            page_size=args.page_size,
+            limit=args.limit,
+            output=args.output
+        )
+    except logarchive.ArchiveError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    except ListingIncomplete as e:
+        print(f"✗ Could not list every item ({e}); audit aborted")
+        sys.exit(1)
+
+    if any(counts.values()):
+        sys.exit(1)
+
+
+def cmd_replay(args):
+    """Serve a recorded cassette as a stand-in API server"""
+    try:
+        cassette.serve_replay(
+            args.cassette,
+            host=args.host,
+            port=args.port,
+            latency_scale=args.latency_scale,
+            volume=args.volume
+        )
+    except cassette.CassetteError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+
+# Commands that only make sense against one deployment at a time
+SINGLE_PROFILE_COMMANDS = frozenset({
+    cmd_login, cmd_replicate, cmd_loadtest, cmd_qrcodes_verify, cmd_qrcodes_sheets,
+    cmd_cache_serve, cmd_replay,
+})
+
+
 def main():
     """Main CLI entry point"""
     parser = argparse.ArgumentParser(
@@ -357,6 +1092,15 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument('--api-url', default=DEFAULT_API_URL, help='API base URL')
+    parser.add_argument('--profile', help=f'Use a deployment profile from {PROFILES_FILE}')
+    parser.add_argument('--all-profiles', action='store_true',
+                        help='Run the command against every profile concurrently')
+    parser.add_argument('--max-bandwidth',
+                        help='Limit uploads and downloads, each shared by all workers (e.g. 50M)')
+    parser.add_argument('--max-upload-bandwidth', help='Upload limit, overrides --max-bandwidth')
+    parser.add_argument('--max-download-bandwidth', help='Download limit, overrides --max-bandwidth')
+    parser.add_argument('--record', metavar='CASSETTE',
+                        help='Record all API traffic, tokens redacted, into a cassette file for replay')
 
     subparsers = parser.add_subparsers(dest='command', help='Commands')
 
@@ -382,19 +1126,44 @@ def main():
     vupload.add_argument('title', help='Video title')
     vupload.add_argument('file', help='Video file path')
     vupload.add_argument('--description', help='Video description')
+    vupload.add_argument('--no-faststart', action='store_true',
+                         help='Upload MP4 files as is, without moving moov to the front')
     vupload.set_defaults(func=cmd_videos_upload)
 
     # videos bulk-upload
     vbulk = videos_sub.add_parser('bulk-upload', help='Bulk upload videos')
     vbulk.add_argument('directory', help='Directory containing videos')
-    vbulk.add_argument('--pattern', default='*.mp4', help='File pattern (default: *.mp4)')
+    vbulk.add_argument('--pattern', action='append',
+                       help='File pattern, repeatable (default: *.mp4)')
+    vbulk.add_argument('--exclude', action='append', default=[],
+                       help='Pattern of files or directories to skip, repeatable')
     vbulk.add_argument('--recursive', action='store_true', help='Search recursively')
+    vbulk.add_argument('--workers', type=int, default=4,
+                       help='Parallel uploads, largest files first (default: 4)')
+    vbulk.add_argument('--no-faststart', action='store_true',
+                       help='Upload MP4 files as is, without moving moov to the front')
+    vbulk.add_argument('--no-preflight', action='store_true',
+                       help='Skip validating files before uploading')
+    vbulk.add_argument('--trace', metavar='FILE',
+                       help='Write a Chrome trace-event timeline of the run to FILE')
     vbulk.set_defaults(func=cmd_videos_bulk_upload)
 
+    # videos preflight
+    vpreflight = videos_sub.add_parser('preflight', help='Validate video files before upload')
+    vpreflight.add_argument('paths', nargs='+', help='Video files or directories')
+    vpreflight.add_argument('--pattern', action='append',
+                            help='File pattern for directories, repeatable (default: *.mp4)')
+    vpreflight.add_argument('--exclude', action='append', default=[],
+                            help='Pattern of files or directories to skip, repeatable')
+    vpreflight.add_argument('--recursive', action='store_true', help='Search directories recursively')
+    vpreflight.add_argument('--workers', type=int, help='Parallel checks (default: CPU count)')
+    vpreflight.set_defaults(func=cmd_videos_preflight)
+
     # videos export
     vexport = videos_sub.add_parser('export', help='Export videos to CSV')
     vexport.add_argument('--output', default='videos_export.csv', help='Output file')
     vexport.add_argument('--search', help='Filter by search term')
+    vexport.add_argument('--page-size', type=int, help='Videos per request (default: tuned automatically)')
     vexport.set_defaults(func=cmd_videos_export)
 
     # videos delete
@@ -402,6 +1171,15 @@ def main():
     vdelete.add_argument('video_id', help='Video GUID')
     vdelete.set_defaults(func=cmd_videos_delete)
 
+    # videos bulk-delete
+    vbulkdel = videos_sub.add_parser('bulk-delete', help='Delete all videos matching filters')
+    vbulkdel.add_argument('--search', help='Server-side title/description search term')
+    vbulkdel.add_argument('--match', help='Glob pattern the title must match')
+    vbulkdel.add_argument('--not-played-since', type=parse_date_arg, metavar='DATE',
+                          help='Only videos without plays since DATE')
+    vbulkdel.add_argument('--without-qrcodes', action='store_true', help='Only videos no QR code points at')
+    vbulkdel.set_defaults(func=cmd_videos_bulk_delete)
+
     # QR codes commands
     qr_parser = subparsers.add_parser('qrcodes', help='QR code management')
     qr_sub = qr_parser.add_subparsers(dest='qrcodes_command')
@@ -431,23 +1209,186 @@ def main():
     qexport = qr_sub.add_parser('export', help='Export QR codes to CSV')
     qexport.add_argument('--output', default='qrcodes_export.csv', help='Output file')
     qexport.add_argument('--video-id', help='Filter by video ID')
+    qexport.add_argument('--page-size', type=int, help='QR codes per request (default: tuned automatically)')
     qexport.set_defaults(func=cmd_qrcodes_export)
 
     # qrcodes download-all
     qdownload = qr_sub.add_parser('download-all', help='Download all QR code images')
     qdownload.add_argument('--output-dir', default='qr_images', help='Output directory')
     qdownload.add_argument('--video-id', help='Filter by video ID')
+    qdownload.add_argument('--page-size', type=int, help='QR codes per request (default: tuned automatically)')
+    qdownload.add_argument('--trace', metavar='FILE',
+                           help='Write a Chrome trace-event timeline of the run to FILE')
     qdownload.set_defaults(func=cmd_qrcodes_download_all)
 
+    # qrcodes verify
+    qverify = qr_sub.add_parser('verify', help='Decode QR images and check their code values')
+    qverify.add_argument('directory', help='Directory containing qr-<codeValue>.png images')
+    qverify.add_argument('--base-url', help='Require content to be exactly <URL>/play/<codeValue>')
+    qverify.add_argument('--workers', type=int, help='Parallel decoders (default: CPU count)')
+    qverify.add_argument('--recursive', action='store_true', help='Search subdirectories')
+    qverify.set_defaults(func=cmd_qrcodes_verify)
+
+    # qrcodes sheets
+    qsheets = qr_sub.add_parser('sheets', help='Compose printable sheets of labelled QR codes')
+    qsheets.add_argument('--image-dir', default='qr_images', help='Directory of qr-<codeValue>.png images')
+    qsheets.add_argument('--csv', help="Take labels from a 'qrcodes export' CSV instead of the API")
+    qsheets.add_argument('--video-id', help='Filter by video ID')
+    qsheets.add_argument('--page-size', type=int, help='QR codes per request (default: tuned automatically)')
+    qsheets.add_argument('--format', choices=['pdf', 'png'], default='pdf', help='Output format (default: pdf)')
+    qsheets.add_argument('--output', help='PDF file or PNG directory (default: qr_sheets.pdf / qr_sheets)')
+    qsheets.add_argument('--paper', default='a4', help='Paper size: a4, a3 or letter (default: a4)')
+    qsheets.add_argument('--dpi', type=int, default=300, help='Resolution (default: 300)')
+    qsheets.add_argument('--grid', default='4x6', help='Codes per page as COLUMNSxROWS (default: 4x6)')
+    qsheets.add_argument('--margin', type=float, default=10.0, help='Page margin in mm (default: 10)')
+    qsheets.add_argument('--workers', type=int, help='Parallel page renderers (default: CPU count)')
+    qsheets.set_defaults(func=cmd_qrcodes_sheets)
+
     # qrcodes delete
     qdelete = qr_sub.add_parser('delete', help='Delete a QR code')
     qdelete.add_argument('qrcode_id', help='QR code GUID')
     qdelete.set_defaults(func=cmd_qrcodes_delete)
 
+    # qrcodes bulk-update
+    qbulkupd = qr_sub.add_parser('bulk-update', help='Update all QR codes matching filters')
+    qset_active = qbulkupd.add_mutually_exclusive_group()
+    qset_active.add_argument('--set-active', dest='set_active', action='store_const', const=True,
+                             help='Activate the selected codes')
+    qset_active.add_argument('--set-inactive', dest='set_active', action='store_const', const=False,
+                             help='Deactivate the selected codes')
+    qbulkupd.add_argument('--set-description', help='New description')
+    qbulkupd.add_argument('--set-video-id', help='Point the selected codes at another video')
+    qbulkupd.set_defaults(func=cmd_qrcodes_bulk_update)
+
+    # qrcodes bulk-delete
+    qbulkdel = qr_sub.add_parser('bulk-delete', help='Delete all QR codes matching filters')
+    qbulkdel.set_defaults(func=cmd_qrcodes_bulk_delete)
+
+    for bulk_cmd in (qbulkupd, qbulkdel):
+        bulk_cmd.add_argument('--video-id', help='Only codes of this video')
+        bulk_cmd.add_argument('--codes', metavar='FILE',
+                              help='Only code values listed in FILE (one per line, or a qrcodes export CSV)')
+        bulk_cmd.add_argument('--match', help='Glob pattern the description must match')
+
+    # Filters, planning and concurrency shared by the bulk commands
+    for bulk_cmd in (vbulkdel, qbulkupd, qbulkdel):
+        state = bulk_cmd.add_mutually_exclusive_group()
+        state.add_argument('--active', dest='active', action='store_const', const=True,
+                           help='Only active items')
+        state.add_argument('--inactive', dest='active', action='store_const', const=False,
+                           help='Only inactive items')
+        bulk_cmd.add_argument('--created-before', type=parse_date_arg, metavar='DATE',
+                              help='Only items created before DATE (ISO 8601, UTC unless given)')
+        bulk_cmd.add_argument('--created-after', type=parse_date_arg, metavar='DATE',
+                              help='Only items created at or after DATE')
+        bulk_cmd.add_argument('--all', action='store_true', help='Select every item when no filter is given')
+        bulk_cmd.add_argument('--dry-run', action='store_true', help='Only show what would change')
+        bulk_cmd.add_argument('--yes', action='store_true', help='Do not ask for confirmation')
+        bulk_cmd.add_argument('--workers', type=int, default=8, help='Concurrent requests (default: 8)')
+        bulk_cmd.add_argument('--page-size', type=int, help='Items per list request (default: tuned automatically)')
+
     # Stats command
     stats_parser = subparsers.add_parser('stats', help='Show statistics')
+    stats_parser.add_argument('--watch', action='store_true',
+                              help='Keep refreshing and show scans/sec and plays/sec')
+    stats_parser.add_argument('--interval', type=parse_seconds_arg, default=5,
+                              help='Seconds between summary requests (default: 5)')
+    stats_parser.add_argument('--window', type=int, default=12,
+                              help='Samples in the moving average (default: 12)')
     stats_parser.set_defaults(func=cmd_stats)
 
+    # Backup command
+    backup_parser = subparsers.add_parser('backup', help='Incremental snapshot of all data')
+    backup_parser.add_argument('--output-dir', default='backups', help='Snapshot directory (default: backups)')
+    backup_parser.add_argument('--workers', type=int, default=8, help='Parallel transfers (default: 8)')
+    backup_parser.add_argument('--connections', type=int, default=4,
+                               help='Parallel Range requests per video file (default: 4)')
+    backup_parser.add_argument('--no-videos', action='store_true', help='Skip video files')
+    backup_parser.set_defaults(func=cmd_backup)
+
+    # Restore command
+    restore_parser = subparsers.add_parser('restore', help='Restore a snapshot into an empty instance')
+    restore_parser.add_argument('snapshot', help='Snapshot directory')
+    restore_parser.add_argument('--workers', type=int, default=4, help='Parallel uploads (default: 4)')
+    restore_parser.set_defaults(func=cmd_restore)
+
+    # Replicate command
+    replicate_parser = subparsers.add_parser('replicate', help='Copy videos and QR codes between profiles')
+    replicate_parser.add_argument('--from', dest='source', required=True, help='Source profile')
+    replicate_parser.add_argument('--to', dest='target', required=True, help='Target profile')
+    replicate_parser.add_argument('--workers', type=int, default=4, help='Parallel transfers (default: 4)')
+    replicate_parser.add_argument('--connections', type=int, default=4,
+                                  help='Parallel Range requests per video (default: 4)')
+    replicate_parser.add_argument('--mapping-file', default='replicate_map.json',
+                                  help='Old-to-new ID mapping, also used to resume (default: replicate_map.json)')
+    replicate_parser.add_argument('--search', help='Only replicate matching videos')
+    replicate_parser.set_defaults(func=cmd_replicate)
+
+    # Load test command
+    loadtest_parser = subparsers.add_parser('loadtest', help='Generate scan/play load against the public endpoints')
+    loadtest_parser.add_argument('--rps', type=float, default=20, help='Target scans per second (default: 20)')
+    loadtest_parser.add_argument('--duration', type=float, default=60, help='Seconds to run (default: 60)')
+    loadtest_parser.add_argument('--ramp', help="Rate profile as SECONDS:RPS points, e.g. '0:10,30:200,90:200' "
+                                                "(overrides --rps/--duration)")
+    loadtest_parser.add_argument('--codes', help="Code values to scan: one per line or a 'qrcodes export' CSV "
+                                                 "(default: all active codes from the API)")
+    loadtest_parser.add_argument('--page-size', type=int, help='QR codes per request (default: tuned automatically)')
+    loadtest_parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent of code popularity (default: 1.1)')
+    loadtest_parser.add_argument('--invalid-ratio', type=float, default=0.05,
+                                 help='Share of scans with nonexistent codes (default: 0.05)')
+    loadtest_parser.add_argument('--play-ratio', type=float, default=0.5,
+                                 help='Share of successful scans followed by a play report (default: 0.5)')
+    loadtest_parser.add_argument('--play-delay', type=float, default=5.0,
+                                 help='Longest delay between scan and play report in seconds (default: 5)')
+    loadtest_parser.add_argument('--connections', type=int, default=64, help='Maximum open connections (default: 64)')
+    loadtest_parser.add_argument('--max-in-flight', type=int, default=2000,
+                                 help='Scans in flight before new arrivals are dropped (default: 2000)')
+    loadtest_parser.add_argument('--timeout', type=float, default=10.0, help='Seconds per request (default: 10)')
+    loadtest_parser.add_argument('--seed', type=int, help='Random seed for a reproducible scan sequence')
+    loadtest_parser.add_argument('--output', help='Write the report as JSON')
+    loadtest_parser.set_defaults(func=cmd_loadtest)
+
+    # Warm command
+    warm_parser = subparsers.add_parser('warm', help='Warm resolve lookups and video first bytes')
+    warm_parser.add_argument('--workers', type=int, default=8, help='Concurrent requests (default: 8)')
+    warm_parser.add_argument('--first-mb', type=float, default=2,
+                             help='MB to fetch from the start of each video; 0 skips videos (default: 2)')
+    warm_parser.add_argument('--scan-window', type=int, default=100000,
+                             help='Recent scans used to order codes by popularity; 0 disables (default: 100000)')
+    warm_parser.add_argument('--video-id', help='Only warm the QR codes of one video')
+    warm_parser.add_argument('--page-size', type=int, help='Items per list request (default: tuned automatically)')
+    warm_parser.set_defaults(func=cmd_warm)
+
+    # Cache commands
+    cache_parser = subparsers.add_parser('cache', help='Local video cache for kiosks')
+    cache_sub = cache_parser.add_subparsers(dest='cache_command')
+
+    # cache prefetch
+    cprefetch = cache_sub.add_parser('prefetch', help='Download the most played videos')
+    cprefetch.add_argument('--max-plays', type=int, default=100000,
+                           help='Recent plays used to rank videos (default: 100000)')
+    cprefetch.add_argument('--limit', type=int, help='Most videos to prefetch')
+    cprefetch.add_argument('--page-size', type=int, help='Items per list request (default: tuned automatically)')
+    cprefetch.set_defaults(func=cmd_cache_prefetch)
+
+    # cache serve
+    cserve = cache_sub.add_parser('serve', help='Serve cached videos over HTTP with Range support')
+    cserve.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    cserve.add_argument('--port', type=int, default=8090, help='Port to listen on (default: 8090)')
+    cserve.set_defaults(func=cmd_cache_serve)
+
+    # cache status
+    cstatus = cache_sub.add_parser('status', help='List cached videos')
+    cstatus.set_defaults(func=cmd_cache_status)
+
+    for cache_cmd in (cprefetch, cserve, cstatus):
+        cache_cmd.add_argument('--cache-dir', help='Cache directory (default: ~/.qrvideo_cli/video_cache)')
+        cache_cmd.add_argument('--max-gb', type=float, default=10, help='Cache size budget in GB (default: 10)')
+        cache_cmd.add_argument('--policy', choices=videocache.EVICTION_POLICIES, default='lru',
+                               help='Eviction order (default: lru)')
+        cache_cmd.add_argument('--connections', type=int, default=4,
+                               help='Range requests per download (default: 4)')
+
     # Logs commands
     logs_parser = subparsers.add_parser('logs', help='View logs')
     logs_sub = logs_parser.add_subparsers(dest='logs_command')
@@ -466,6 +1407,39 @@ def main():
     lplays.add_argument('--video-id', help='Filter by video ID')
     lplays.set_defaults(func=cmd_logs_plays)
 
+    # logs export
+    lexport = logs_sub.add_parser('export', help='Archive logs into day-partitioned .jsonl.gz files')
+    lexport.add_argument('--output-dir', default='logs_archive', help='Archive directory (default: logs_archive)')
+    lexport.add_argument('--kind', choices=('scans', 'plays', 'all'), default='all',
+                         help='Logs to export (default: all)')
+    lexport.add_argument('--workers', type=int, default=8, help='Concurrent page requests (default: 8)')
+    lexport.add_argument('--page-size', type=int, default=logarchive.DEFAULT_PAGE_SIZE,
+                         help=f'Logs per request (default: {logarchive.DEFAULT_PAGE_SIZE})')
+    lexport.set_defaults(func=cmd_logs_export)
+
+    # Audit command
+    audit_parser = subparsers.add_parser('audit', help='Find orphaned and inconsistent videos, QR codes and logs')
+    audit_parser.add_argument('--logs', choices=('scans', 'plays', 'all', 'none'), default='all',
+                              help='Logs to check against the catalogue (default: all)')
+    audit_parser.add_argument('--archive', metavar='DIR',
+                              help="Read logs from a 'logs export' directory instead of the API")
+    audit_parser.add_argument('--workers', type=int, default=8, help='Concurrent page requests for logs (default: 8)')
+    audit_parser.add_argument('--page-size', type=int, help='Items per list request (default: tuned automatically)')
+    audit_parser.add_argument('--limit', type=int, default=20, help='Examples shown per issue (default: 20)')
+    audit_parser.add_argument('--output', help='Write the full report as JSON to this file')
+    audit_parser.set_defaults(func=cmd_audit)
+
+    # Replay command
+    replay_parser = subparsers.add_parser('replay', help='Serve a recorded cassette as a stand-in API server')
+    replay_parser.add_argument('cassette', help='Cassette file written with --record')
+    replay_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    replay_parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    replay_parser.add_argument('--latency-scale', type=float, default=1.0,
+                               help='Multiply the recorded latencies (default: 1.0; 0 for none)')
+    replay_parser.add_argument('--volume', type=int, default=1,
+                               help='Repeat the recorded list data N times (default: 1)')
+    replay_parser.set_defaults(func=cmd_replay)
+
     # Parse arguments
     args = parser.parse_args()
 
@@ -474,7 +1448,20 @@ def main():
         sys.exit(1)
 
     # Execute command
-    if hasattr(args, 'func'):
+    if hasattr(args, 'func') and args.all_profiles:
+        if args.func in SINGLE_PROFILE_COMMANDS or getattr(args, 'watch', False) or args.record:
+            print("✗ This command cannot be used with --all-profiles")
+            sys.exit(1)
+        run_all_profiles(args)
+    elif hasattr(args, 'func') and args.record:
+        args.recorder = cassette.CassetteRecorder(args.record)
+        try:
+            args.func(args)
+        finally:
+            args.recorder.close()
+            print(f"✓ Recorded {args.recorder.interactions} requests "
+                  f"({args.recorder.bodies} distinct bodies) to {args.record}")
+    elif hasattr(args, 'func'):
         args.func(args)
     else:
         parser.print_help()
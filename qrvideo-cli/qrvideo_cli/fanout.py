@@ -0,0 +1,122 @@
+"""Run work concurrently across several QR Video deployments"""
+
+import contextvars
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TextIO, Tuple
+
+
+#: Label of the deployment the current thread or task is working for
+current_label = contextvars.ContextVar('current_label', default=None)
+
+
+class LabelledOutput:
+    """
+    stdout replacement that prefixes each line with the current label
+
+    Lines written while current_label is set are emitted as '[label] line'
+    once complete, so concurrent deployments never interleave mid-line.
+    Threads must be started from a copied context (see spawn_in_context and
+    in_context) to keep their label.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._partial: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        label = current_label.get()
+        if label is None:
+            with self._lock:
+                return self.stream.write(text)
+
+        with self._lock:
+            pending = self._partial.pop(label, "") + text
+            *lines, rest = pending.split("\n")
+            for line in lines:
+                self.stream.write(f"[{label}] {line}\n")
+            if rest:
+                self._partial[label] = rest
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self.stream.flush()
+
+    def close_label(self, label: str):
+        """Emit any unterminated line left by a label"""
+        with self._lock:
+            rest = self._partial.pop(label, "")
+            if rest:
+                self.stream.write(f"[{label}] {rest}\n")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+def spawn_in_context(target: Callable[..., Any], *args: Any, **kwargs: Any) -> threading.Thread:
+    """Create a thread that runs target in a copy of the caller's context"""
+    context = contextvars.copy_context()
+    return threading.Thread(target=context.run, args=(target,) + args, **kwargs)
+
+
+def in_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap fn so that every call runs in a copy of the caller's context (for thread pools)"""
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+def fan_out(
+    targets: Dict[str, Any],
+    work: Callable[[str, Any], Any],
+    max_workers: Optional[int] = None
+) -> Dict[str, Tuple[Any, Optional[BaseException]]]:
+    """
+    Run work(label, target) for every target concurrently
+
+    Output printed by each run is prefixed with its label. A failing run
+    (including sys.exit) does not stop the others.
+
+    Args:
+        targets: Mapping of label to target (e.g. profile name to settings)
+        work: Callable invoked once per target
+        max_workers: Concurrency limit (default: one thread per target)
+
+    Returns:
+        Mapping of label to (result, exception or None)
+    """
+    results: Dict[str, Tuple[Any, Optional[BaseException]]] = {}
+    if not targets:
+        return results
+
+    output = LabelledOutput(sys.stdout)
+
+    def run(label: str, target: Any):
+        current_label.set(label)
+        try:
+            return work(label, target), None
+        except BaseException as e:  # SystemExit from command handlers included
+            return None, e
+        finally:
+            output.close_label(label)
+
+    original_stdout = sys.stdout
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or len(targets)) as executor:
+            futures = {
+                label: executor.submit(contextvars.copy_context().run, run, label, target)
+                for label, target in targets.items()
+            }
+            for label, future in futures.items():
+                results[label] = future.result()
+    finally:
+        sys.stdout = original_stdout
+
+    return results
@@ -0,0 +1,198 @@
+"""Incremental JSON parsing for paged API responses"""
+
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+#: Name of the JSON backend in use ('orjson' when installed, else 'json')
+BACKEND = "orjson" if orjson else "json"
+
+
+def loads(data) -> Any:
+    """Decode JSON from bytes using the fastest available backend"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode compact UTF-8 JSON using the fastest available backend"""
+    if orjson:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+_WHITESPACE = b" \t\r\n"
+_STRUCTURAL = re.compile(rb'["\[\]{}]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_SCALAR_END = re.compile(rb'[,\]}\s]')
+
+
+def _string_end(buf: bytearray, start: int) -> int:
+    """End offset (exclusive) of the string opening at start, or -1 if incomplete"""
+    pos = start + 1
+    while True:
+        match = _STRING_SPECIAL.search(buf, pos)
+        if not match:
+            return -1
+        if buf[match.start()] == ord("\\"):
+            pos = match.start() + 2
+            continue
+        return match.start() + 1
+
+
+def _value_end(buf: bytearray, start: int) -> int:
+    """End offset (exclusive) of the JSON value at start, or -1 if incomplete"""
+    first = buf[start]
+    if first == ord('"'):
+        return _string_end(buf, start)
+
+    if first not in b"{[":
+        match = _SCALAR_END.search(buf, start)
+        return match.start() if match else -1
+
+    depth = 0
+    pos = start
+    while True:
+        match = _STRUCTURAL.search(buf, pos)
+        if not match:
+            return -1
+        char = buf[match.start()]
+        if char == ord('"'):
+            pos = _string_end(buf, match.start())
+            if pos < 0:
+                return -1
+            continue
+        depth += 1 if char in b"{[" else -1
+        pos = match.start() + 1
+        if depth == 0:
+            return pos
+
+
+class PagedStream:
+    """
+    Iterate the 'items' of a paged response while it is still downloading
+
+    Each item is decoded on its own as soon as its bytes have arrived, and
+    consumed bytes are discarded, so memory stays flat for any page size.
+    The remaining top-level fields (page, pageSize, totalCount) are collected
+    into ``meta``; fields sent after the items are available once iteration
+    has finished.
+
+    Example:
+        page = PagedStream(response.iter_content(65536))
+        for item in page:
+            ...
+        total = page.meta['totalCount']
+    """
+
+    compact_threshold = 1024 * 1024
+
+    def __init__(self, chunks: Iterable[bytes], items_key: str = "items",
+                 convert: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            chunks: Iterable of raw response body chunks
+            items_key: Top-level key holding the item array (default: items)
+            convert: Optional function applied to each decoded item
+        """
+        self.meta: Dict[str, Any] = {}
+        self.count = 0
+        self.bytes_read = 0
+        self._items_key = items_key
+        self._convert = convert
+        self._chunks = iter(chunks)
+        self._buf = bytearray()
+        self._pos = 0
+        self._eof = False
+        self._iterator: Optional[Iterator[Any]] = None
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._iterator is None:
+            self._iterator = self._parse()
+        return self._iterator
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer, returning False at end of stream"""
+        if self._eof:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += chunk
+                self.bytes_read += len(chunk)
+                return True
+        self._eof = True
+        return False
+
+    def _peek(self) -> int:
+        """Skip whitespace and return the next byte without consuming it"""
+        while True:
+            buf = self._buf
+            while self._pos < len(buf) and buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(buf):
+                return buf[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def _expect(self, char: bytes):
+        if self._peek() != char[0]:
+            raise ValueError(f"Expected {char!r} at offset {self._pos} of JSON stream")
+        self._pos += 1
+
+    def _read_value(self) -> Any:
+        """Decode the complete JSON value at the current position"""
+        self._peek()
+        end = _value_end(self._buf, self._pos)
+        while end < 0:
+            if self._fill():
+                end = _value_end(self._buf, self._pos)
+            elif self._buf[self._pos] in b'"{[':
+                raise ValueError("Truncated JSON stream")
+            else:
+                # A bare scalar may legitimately run to the end of the stream
+                end = len(self._buf)
+
+        value = loads(self._buf[self._pos:end])
+        self._pos = end
+        if self._pos >= self.compact_threshold:
+            del self._buf[:self._pos]
+            self._pos = 0
+        return value
+
+    def _parse(self) -> Iterator[Any]:
+        self._expect(b"{")
+        while True:
+            char = self._peek()
+            if char == ord("}"):
+                self._pos += 1
+                return
+            if char == ord(","):
+                self._pos += 1
+                continue
+
+            key = self._read_value()
+            self._expect(b":")
+
+            if key != self._items_key or self._peek() != ord("["):
+                self.meta[key] = self._read_value()
+                continue
+
+            self._pos += 1
+            while True:
+                char = self._peek()
+                if char == ord("]"):
+                    self._pos += 1
+                    break
+                if char == ord(","):
+                    self._pos += 1
+                    continue
+                item = self._read_value()
+                self.count += 1
+                yield self._convert(item) if self._convert else item
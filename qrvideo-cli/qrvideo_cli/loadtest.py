@@ -0,0 +1,487 @@
+"""Open-loop scan/play load generation against the public endpoints"""
+
+import asyncio
+import csv
+import json
+import random
+import ssl
+import time
+from collections import Counter
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import quote, urlsplit
+
+
+USER_AGENT = "qrvideo-cli-loadtest"
+
+# Seconds between progress lines
+REPORT_INTERVAL = 5.0
+
+# Response statuses each operation is expected to return
+_EXPECTED = {
+    "resolve": (200,),
+    "resolve-invalid": (404,),
+    "play": (200, 202, 204),
+}
+
+
+class AsyncHttpPool:
+    """
+    Keep-alive HTTP/1.1 connections to one origin, shared by asyncio tasks
+
+    At most `connections` requests are in flight; further requests wait for
+    a free connection. A request on a reused connection that the server has
+    closed in the meantime is retried once on a new connection.
+    """
+
+    def __init__(self, base_url: str, connections: int = 64, timeout: float = 10.0):
+        """
+        Args:
+            base_url: API base URL, e.g. https://example.com/api
+            connections: Maximum number of open connections
+            timeout: Seconds allowed for one request/response exchange
+        """
+        parts = urlsplit(base_url)
+        self.tls = parts.scheme == "https"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if self.tls else 80)
+        self.host_header = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.opened = 0
+        self._ssl = ssl.create_default_context() if self.tls else None
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(connections)
+
+    async def request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        """
+        Send one request
+
+        Args:
+            method: HTTP method
+            path: Path below the base URL, e.g. /public/resolve/ABC
+            body: JSON request body
+
+        Returns:
+            (status, response body)
+
+        Raises:
+            OSError, asyncio.IncompleteReadError or asyncio.TimeoutError on failure
+        """
+        async with self._slots:
+            for attempt in range(2):
+                reused = bool(self._idle)
+                conn = self._idle.pop() if reused else await self._connect()
+                try:
+                    status, data, keep_alive = await asyncio.wait_for(
+                        self._exchange(conn, method, path, body), self.timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn[1].close()
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return status, data
+        raise AssertionError("unreachable")
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        conn = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self._ssl), self.timeout
+        )
+        self.opened += 1
+        return conn
+
+    async def _exchange(
+        self,
+        conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter],
+        method: str,
+        path: str,
+        body: Optional[bytes]
+    ) -> Tuple[int, bytes, bool]:
+        reader, writer = conn
+        head = (f"{method} {self.prefix}{path} HTTP/1.1\r\n"
+                f"Host: {self.host_header}\r\n"
+                f"User-Agent: {USER_AGENT}\r\n"
+                f"Accept: application/json\r\n")
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + (body or b""))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in (204, 304):
+            data = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            data = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return status, data, keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Skip trailers up to the blank line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+    def close(self):
+        """Close all idle connections"""
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+def parse_ramp(spec: str) -> List[Tuple[float, float]]:
+    """
+    Parse a ramp profile of 'SECONDS:RPS' points, e.g. '0:10,30:200,90:200'
+
+    The target rate is interpolated linearly between points and the test
+    ends at the last point.
+
+    Raises:
+        ValueError: If the profile is malformed
+    """
+    stages = []
+    for part in spec.split(","):
+        at, _, rps = part.strip().partition(":")
+        try:
+            stages.append((float(at), float(rps)))
+        except ValueError:
+            raise ValueError(f"Invalid ramp point '{part}' (expected SECONDS:RPS)")
+    stages.sort()
+    if len(stages) < 2 or stages[0][0] != 0 or stages[-1][0] <= 0:
+        raise ValueError("A ramp needs at least two points, starting at 0 seconds")
+    if any(rps < 0 for _, rps in stages):
+        raise ValueError("Ramp rates must not be negative")
+    return stages
+
+
+def rate_at(stages: Sequence[Tuple[float, float]], t: float) -> float:
+    """Target requests/second at t seconds into a ramp profile"""
+    for (t0, r0), (t1, r1) in zip(stages, stages[1:]):
+        if t < t1:
+            return r0 + (r1 - r0) * (t - t0) / (t1 - t0) if t1 > t0 else r1
+    return stages[-1][1]
+
+
+def load_codes(path: str, include_inactive: bool = False) -> List[str]:
+    """
+    Read code values from a text file (one per line) or a 'qrcodes export' CSV
+
+    Inactive codes in a CSV export are left out unless include_inactive is set.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        first = f.readline()
+        f.seek(0)
+        if "codeValue" in first:
+            return [
+                row["codeValue"] for row in csv.DictReader(f)
+                if row.get("codeValue")
+                and (include_inactive or row.get("isActive", "True").lower() != "false")
+            ]
+        return [line.strip() for line in f if line.strip()]
+
+
+class ScanMix:
+    """
+    Source of scanned codes with Zipf-distributed popularity
+
+    The code at popularity rank k is scanned with weight 1 / k^s. Ranks are
+    assigned by a seeded shuffle, so popularity does not follow list order.
+    """
+
+    def __init__(self, codes: Sequence[str], zipf_s: float = 1.1, invalid_ratio: float = 0.05,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            codes: Valid code values
+            zipf_s: Zipf exponent; higher concentrates scans on fewer codes
+            invalid_ratio: Share of scans using codes that do not exist
+            rng: Random source (default: unseeded)
+        """
+        self.rng = rng or random.Random()
+        self.codes = list(codes)
+        self.rng.shuffle(self.codes)
+        self.invalid_ratio = invalid_ratio if self.codes else 1.0
+        self._cum_weights = list(accumulate(1.0 / rank ** zipf_s for rank in range(1, len(self.codes) + 1)))
+
+    def next_code(self) -> Tuple[str, bool]:
+        """Return (code value, whether it is expected to resolve)"""
+        if self.rng.random() < self.invalid_ratio:
+            return f"invalid-{self.rng.getrandbits(48):012x}", False
+        return self.rng.choices(self.codes, cum_weights=self._cum_weights)[0], True
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending sequence (0 if empty)"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class OpStats:
+    """Latencies and outcomes of one operation type"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.ok = 0
+        self.errors: Counter = Counter()
+
+    def record(self, latency: float, outcome: Any, expected: Tuple[int, ...]):
+        self.latencies.append(latency)
+        if outcome in expected:
+            self.ok += 1
+        else:
+            self.errors[str(outcome)] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        values = sorted(self.latencies)
+        return {
+            "count": len(values),
+            "ok": self.ok,
+            "errors": dict(self.errors),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": (values[-1] if values else 0.0) * 1000,
+        }
+
+
+class LoadGenerator:
+    """
+    Open-loop scan/play traffic against /public/resolve and /public/videos/{id}/plays
+
+    Scans arrive as a Poisson process whose rate follows the ramp profile,
+    independent of how fast the server answers. Latency is measured from
+    each request's scheduled start, so time spent waiting for a connection
+    counts against the server instead of silently lowering the offered load.
+    A successful scan is followed by a play report with probability
+    play_ratio, after a random viewing delay.
+    """
+
+    def __init__(
+        self,
+        pool: AsyncHttpPool,
+        mix: ScanMix,
+        stages: Sequence[Tuple[float, float]],
+        play_ratio: float = 0.5,
+        play_delay: float = 5.0,
+        max_in_flight: int = 2000,
+        rng: Optional[random.Random] = None
+    ):
+        self.pool = pool
+        self.mix = mix
+        self.stages = stages
+        self.duration = stages[-1][0]
+        self.play_ratio = play_ratio
+        self.play_delay = play_delay
+        self.max_in_flight = max_in_flight
+        self.rng = rng or random.Random()
+        self.stats = {name: OpStats() for name in _EXPECTED}
+        self.scheduled = 0
+        self.dropped = 0
+        self.in_flight = 0
+
+    async def _timed(self, name: str, intended: float, method: str, path: str,
+                     body: Optional[bytes] = None) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        try:
+            status, data = await self.pool.request(method, path, body)
+        except asyncio.TimeoutError:
+            self.stats[name].record(loop.time() - intended, "timeout", _EXPECTED[name])
+            return None
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            self.stats[name].record(loop.time() - intended, type(e).__name__, _EXPECTED[name])
+            return None
+        self.stats[name].record(loop.time() - intended, status, _EXPECTED[name])
+        return data if status == 200 else None
+
+    async def _scan(self, intended: float):
+        self.in_flight += 1
+        try:
+            code, valid = self.mix.next_code()
+            name = "resolve" if valid else "resolve-invalid"
+            data = await self._timed(name, intended, "GET", f"/public/resolve/{quote(code, safe='')}")
+            if data is None or self.rng.random() >= self.play_ratio:
+                return
+            try:
+                video_id = json.loads(data)["video"]["id"]
+            except (ValueError, KeyError, TypeError):
+                return
+            await asyncio.sleep(self.rng.uniform(0, self.play_delay))
+            watched = self.rng.uniform(1.0, 120.0)
+            body = json.dumps({
+                "watchedDurationSeconds": round(watched, 1),
+                "completed": self.rng.random() < 0.3
+            }).encode()
+            loop = asyncio.get_running_loop()
+            await self._timed("play", loop.time(), "POST", f"/public/videos/{video_id}/plays", body)
+        finally:
+            self.in_flight -= 1
+
+    async def _report(self, start: float):
+        loop = asyncio.get_running_loop()
+        resolve_stats = [self.stats["resolve"], self.stats["resolve-invalid"]]
+        # Offsets into each list separately; they grow at different rates
+        offsets = [0] * len(resolve_stats)
+        last_at = start
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            now = loop.time()
+            window = sorted(latency for stats, offset in zip(resolve_stats, offsets)
+                            for latency in stats.latencies[offset:])
+            offsets = [len(stats.latencies) for stats in resolve_stats]
+            errors = sum(sum(s.errors.values()) for s in self.stats.values())
+            print(f"  [{now - start:5.0f}s] target {rate_at(self.stages, now - start):.0f}/s, "
+                  f"done {len(window) / (now - last_at):.0f}/s, "
+                  f"in flight {self.in_flight}, p95 {percentile(window, 95) * 1000:.1f} ms, "
+                  f"errors {errors}, dropped {self.dropped}")
+            last_at = now
+
+    async def run(self):
+        """Generate load for the whole ramp profile and wait for outstanding requests"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        reporter = asyncio.ensure_future(self._report(start))
+        tasks: Set[asyncio.Future] = set()
+        t = 0.0
+        try:
+            while True:
+                rate = rate_at(self.stages, t)
+                if rate <= 0:
+                    t += 0.05
+                    if t >= self.duration:
+                        break
+                    continue
+                t += self.rng.expovariate(rate)
+                if t >= self.duration:
+                    break
+                delay = start + t - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.scheduled += 1
+                if self.in_flight >= self.max_in_flight:
+                    self.dropped += 1
+                    continue
+                task = asyncio.ensure_future(self._scan(start + t))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            reporter.cancel()
+            self.pool.close()
+        self.elapsed = loop.time() - start
+
+
+def run_loadtest(
+    base_url: str,
+    codes: Sequence[str],
+    stages: Sequence[Tuple[float, float]],
+    zipf_s: float = 1.1,
+    invalid_ratio: float = 0.05,
+    play_ratio: float = 0.5,
+    play_delay: float = 5.0,
+    connections: int = 64,
+    max_in_flight: int = 2000,
+    timeout: float = 10.0,
+    seed: Optional[int] = None,
+    output: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run a scan/play load test and print latency percentiles
+
+    Args:
+        base_url: API base URL
+        codes: Valid code values to scan
+        stages: Ramp profile from parse_ramp
+        zipf_s: Zipf exponent of code popularity (default: 1.1)
+        invalid_ratio: Share of scans with nonexistent codes (default: 0.05)
+        play_ratio: Share of successful scans followed by a play (default: 0.5)
+        play_delay: Longest delay before the play report in seconds (default: 5)
+        connections: Maximum open connections (default: 64)
+        max_in_flight: Scans allowed in flight before arrivals are dropped (default: 2000)
+        timeout: Seconds per request (default: 10)
+        seed: Random seed for a reproducible scan sequence
+        output: Optional JSON file for the report
+
+    Returns:
+        Report dictionary with per-operation counts and latency percentiles
+    """
+    rng = random.Random(seed)
+    mix = ScanMix(codes, zipf_s=zipf_s, invalid_ratio=invalid_ratio, rng=rng)
+
+    async def main() -> LoadGenerator:
+        pool = AsyncHttpPool(base_url, connections=connections, timeout=timeout)
+        generator = LoadGenerator(pool, mix, stages, play_ratio=play_ratio, play_delay=play_delay,
+                                  max_in_flight=max_in_flight, rng=rng)
+        await generator.run()
+        return generator
+
+    peak = max(rps for _, rps in stages)
+    print(f"Load testing {base_url} for {stages[-1][0]:.0f}s (peak {peak:.0f} scans/s, "
+          f"{len(codes)} codes, {invalid_ratio:.0%} invalid)...")
+    print("⚠ Every scan and play is recorded in the target's logs")
+
+    generator = asyncio.run(main())
+    report = {
+        "base_url": base_url,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "duration_s": generator.elapsed,
+        "stages": [list(stage) for stage in stages],
+        "scheduled": generator.scheduled,
+        "dropped": generator.dropped,
+        "connections_opened": generator.pool.opened,
+        "operations": {name: stats.summary() for name, stats in generator.stats.items()},
+    }
+
+    print(f"\n{'='*60}")
+    print(f"Load Test Summary:")
+    print(f"  Duration: {generator.elapsed:.1f}s")
+    print(f"  Scans scheduled: {generator.scheduled} "
+          f"({generator.scheduled / max(generator.elapsed, 1e-9):.1f}/s)")
+    print(f"  Dropped (client saturated): {generator.dropped}")
+    print(f"  Connections opened: {generator.pool.opened}")
+    print(f"\n  {'Operation':<16} {'Count':>8} {'OK':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9}")
+    for name, summary in report["operations"].items():
+        print(f"  {name:<16} {summary['count']:>8} {summary['ok']:>8} {summary['p50_ms']:>9.1f} "
+              f"{summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f} {summary['max_ms']:>9.1f}")
+        for outcome, count in sorted(summary["errors"].items()):
+            print(f"    ✗ {outcome}: {count}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {output}")
+
+    return report
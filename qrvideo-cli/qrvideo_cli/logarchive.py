@@ -0,0 +1,387 @@
+"""Incremental day-partitioned archive of scan and play logs"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from . import jsonstream
+from .api import QRVideoClient
+
+
+#: Log kind -> client list method
+LOG_KINDS = {"scans": "list_scan_logs", "plays": "list_play_logs"}
+
+MANIFEST_FILE = "manifest.json"
+DEFAULT_PAGE_SIZE = 1000
+
+# Attempts to fill one gap left by logs arriving during the export
+_GAP_RETRIES = 5
+
+# Longest seconds between manifest saves while days are being sealed
+_SAVE_INTERVAL = 2.0
+
+
+class ArchiveError(Exception):
+    """The logs could not be archived consistently"""
+
+
+def _load_manifest(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(path: Path, manifest: Dict[str, Any]):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _write_partition(path: Path, lines: List[bytes]) -> str:
+    """Write one day of JSON lines as gzip atomically and return its SHA-256"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    # mtime=0 keeps the file identical for identical content
+    with open(tmp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+        if lines:
+            f.write(b"\n".join(lines) + b"\n")
+    os.replace(tmp_path, path)
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LogReader:
+    """
+    Reads the logs newer than a position, oldest first, with concurrent page requests
+
+    The API lists logs newest first with offset paging, so new logs shift
+    every page. A log's position counted from the oldest one is
+    totalCount - 1 - offset, which new logs leave unchanged. Pages are
+    planned by that position, fetched workers at a time, and consumed in
+    order; logs already seen are dropped, and a page that starts past the
+    expected position (because logs arrived in between) is followed by a
+    fetch of the gap.
+
+    Deleting older logs moves every later log down, though: scan logs are
+    deleted with their QR code and play logs with their video. A resumed
+    export therefore re-locates its starting position (see locate), and a
+    shift while reading raises ArchiveError rather than skipping logs.
+    """
+
+    def __init__(self, fetch: Callable[..., Any], workers: int, page_size: int):
+        self.fetch = fetch
+        self.workers = max(1, workers)
+        self.page_size = page_size
+        self.total = 0
+        self.pages = 0
+        self.gap_fetches = 0
+        self._opened = False
+
+    def _get(self, page: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Fetch one page as (totalCount, items)"""
+        data = self.fetch(page=page, page_size=self.page_size)
+        if data is None:
+            raise ArchiveError(f"Failed to fetch page {page}")
+        self.pages += 1
+        if data.get('pageSize', self.page_size) != self.page_size:
+            raise ArchiveError(f"Server paged by {data['pageSize']}, not {self.page_size}")
+        return data['totalCount'], data['items']
+
+    def _open(self):
+        """Fetch the first page once, for the real page size and the log count"""
+        if self._opened:
+            return
+        data = self.fetch(page=1, page_size=self.page_size)
+        if data is None:
+            raise ArchiveError("Failed to fetch page 1")
+        self.pages += 1
+        # Positions depend on the real page size; servers may cap it
+        self.page_size = data.get('pageSize') or self.page_size
+        self.total = data['totalCount']
+        self._opened = True
+
+    def _page_of(self, position: int) -> int:
+        return (self.total - 1 - position) // self.page_size + 1
+
+    def _positioned(self, page: int, total: int, items: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Items of a page with their positions, oldest first"""
+        first_offset = (page - 1) * self.page_size
+        return [(total - 1 - (first_offset + i), item) for i, item in reversed(list(enumerate(items)))]
+
+    def _rows_at(self, position: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Positioned logs of the page holding position"""
+        page = self._page_of(position)
+        total, items = self._get(page)
+        return self._positioned(page, total, items)
+
+    def locate(self, archived: int, last_id: Optional[str], last_day: str) -> int:
+        """
+        Position of the first log after those already archived
+
+        The archived count is still right if the log just before it is the
+        last one archived (last_id). Otherwise older logs were deleted since
+        and the position is found again by binary search, as that of the
+        first log dated after last_day (archives end at a day boundary).
+
+        Args:
+            archived: Number of logs archived by earlier runs
+            last_id: ID of the last archived log, if known
+            last_day: Last archived UTC day (YYYY-MM-DD)
+
+        Returns:
+            Position to pass to read
+
+        Raises:
+            ArchiveError: If a page cannot be fetched
+        """
+        if archived <= 0:
+            return 0
+        self._open()
+        if last_id is not None and archived <= self.total:
+            rows = dict(self._rows_at(archived - 1))
+            if archived - 1 in rows and rows[archived - 1]['id'] == last_id:
+                return archived
+
+        # First position dated after last_day, within [low, high]
+        low, high = 0, min(archived, self.total)
+        while low < high:
+            rows = [row for row in self._rows_at((low + high) // 2) if low <= row[0] < high]
+            after = [position for position, item in rows if item['timestamp'][:10] > last_day]
+            if not rows:
+                raise ArchiveError("Logs changed while locating the last archived day; run it again")
+            if after:
+                high = after[0]
+            if len(after) < len(rows):
+                low = rows[len(rows) - len(after) - 1][0] + 1
+        return low
+
+    def read(self, start: int, after_day: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every log at or after position start, oldest first
+
+        Args:
+            start: Position of the first log to yield
+            after_day: UTC day (YYYY-MM-DD) the logs before start end with, as
+                found by locate; a log before start dated later shows that
+                older logs were deleted since
+
+        Raises:
+            ArchiveError: If a page cannot be fetched, a gap cannot be filled
+                or older logs are deleted while reading
+        """
+        self._open()
+        total = self.total
+        if total < start:
+            raise ArchiveError(f"Server lists {total} logs but {start} are already archived")
+        if total == start:
+            return
+
+        next_position = start
+        # IDs of recently yielded logs, to drop repeats from shifted pages
+        recent: Deque[str] = deque()
+        recent_ids: Set[str] = set()
+        planned = start
+        pending: Deque[Tuple[int, Future]] = deque()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="log-archive") as executor:
+            while True:
+                while len(pending) < self.workers * 2 and planned < self.total:
+                    page = self._page_of(planned)
+                    pending.append((page, executor.submit(self._get, page)))
+                    planned = self.total - (page - 1) * self.page_size
+                if not pending:
+                    return
+
+                page, future = pending.popleft()
+                total, items = future.result()
+                self.total = max(self.total, total)
+                rows = self._positioned(page, total, items)
+
+                for attempt in range(_GAP_RETRIES + 1):
+                    if after_day is not None and any(position < start and item['timestamp'][:10] > after_day
+                                                     for position, item in rows):
+                        raise ArchiveError("Logs were deleted during the export; run it again")
+                    fresh = [row for row in rows if row[0] >= start and row[1]['id'] not in recent_ids]
+                    if fresh and fresh[0][0] < next_position:
+                        # Positions only move down when older logs are deleted
+                        raise ArchiveError("Logs were deleted during the export; run it again")
+                    if not fresh or fresh[0][0] == next_position:
+                        break
+                    if attempt == _GAP_RETRIES:
+                        raise ArchiveError(f"Could not fetch logs at position {next_position}")
+                    # Logs arrived since this page was planned: fetch the skipped ones first
+                    self.gap_fetches += 1
+                    gap_page = self._page_of(next_position)
+                    gap_total, gap_items = self._get(gap_page)
+                    self.total = max(self.total, gap_total)
+                    gap_rows = self._positioned(gap_page, gap_total, gap_items)
+                    rows = [row for row in gap_rows if row[0] < fresh[0][0]] + rows
+
+                for position, item in rows:
+                    if item['id'] in recent_ids:
+                        continue
+                    if position < start:
+                        # Already archived (the older part of the first page)
+                        continue
+                    if position != next_position:
+                        raise ArchiveError(f"Could not fetch logs at position {next_position}")
+                    recent.append(item['id'])
+                    recent_ids.add(item['id'])
+                    if len(recent) > 4 * self.page_size:
+                        recent_ids.discard(recent.popleft())
+                    next_position += 1
+                    yield item
+
+
+def iter_archive(output_dir: str, kind: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the logs of one kind from an archive written by export_logs, oldest first
+
+    Args:
+        output_dir: Archive directory
+        kind: 'scans' or 'plays'
+    """
+    for path in sorted((Path(output_dir) / kind).glob("*.jsonl.gz")):
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield jsonstream.loads(line)
+
+
+def export_logs(
+    client: QRVideoClient,
+    output_dir: str = "logs_archive",
+    kinds: Tuple[str, ...] = tuple(LOG_KINDS),
+    workers: int = 8,
+    page_size: int = DEFAULT_PAGE_SIZE
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Archive logs into one gzipped JSON lines file per UTC day
+
+    Files are written as <output_dir>/<kind>/<YYYY-MM-DD>.jsonl.gz, oldest
+    log first. A day is sealed once a log of a later day has been seen:
+    its file is final, recorded with its row count and checksum in
+    manifest.json, and never fetched again. Each run fetches only the logs
+    after the last sealed day, so the newest (open) day is rewritten on
+    every run until it is sealed. The manifest also records the last sealed
+    log, so logs deleted on the server since (with their QR code or video)
+    do not make the next run skip any. The manifest is saved every few seconds
+    while days are sealed, so an interrupted export resumes close to where
+    it stopped.
+
+    Args:
+        client: QRVideoClient instance
+        output_dir: Archive directory (default: logs_archive)
+        kinds: Log kinds to export, 'scans' and/or 'plays'
+        workers: Concurrent page requests (default: 8)
+        page_size: Logs per request (default: 1000)
+
+    Returns:
+        Dictionary of kind -> {"rows", "sealed", "open", "pages", "error"}
+    """
+    root = Path(output_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path = root / MANIFEST_FILE
+    manifest = _load_manifest(manifest_path)
+    if manifest.get('apiUrl', client.base_url) != client.base_url:
+        raise ArchiveError(f"{output_dir} archives {manifest['apiUrl']}, not {client.base_url}")
+    manifest['apiUrl'] = client.base_url
+
+    results: Dict[str, Dict[str, Any]] = {}
+    started = time.monotonic()
+
+    for kind in kinds:
+        state = manifest.setdefault(kind, {"sealedRows": 0, "days": {}, "open": None})
+        sealed_days = state['days']
+        last_sealed = max(sealed_days) if sealed_days else ""
+        result = results[kind] = {"rows": 0, "sealed": 0, "open": None, "pages": 0, "late": 0, "error": None}
+
+        reader = LogReader(getattr(client, LOG_KINDS[kind]), workers, page_size)
+        print(f"Exporting {kind} after {state['sealedRows']} archived logs...")
+
+        day: Optional[str] = None
+        lines: List[bytes] = []
+        last_item: Optional[Dict[str, Any]] = None
+        last_save = [time.monotonic()]
+
+        def seal(day: str, lines: List[bytes], last_item: Dict[str, Any]):
+            sha256 = _write_partition(root / kind / f"{day}.jsonl.gz", lines)
+            sealed_days[day] = {"rows": len(lines), "sha256": sha256}
+            state['sealedRows'] += len(lines)
+            state['last'] = {"id": last_item['id'], "timestamp": last_item['timestamp']}
+            result['sealed'] += 1
+            if time.monotonic() - last_save[0] >= _SAVE_INTERVAL:
+                _save_manifest(manifest_path, manifest)
+                last_save[0] = time.monotonic()
+            print(f"  ✓ {kind}/{day}.jsonl.gz ({len(lines)} logs, sealed)")
+
+        try:
+            last = state.get('last') or {}
+            start = reader.locate(state['sealedRows'], last.get('id'), last_sealed)
+            if start != state['sealedRows']:
+                print(f"⚠ {kind}: {state['sealedRows'] - start} archived logs were deleted on the server; "
+                      f"resuming after {start}")
+                state['sealedRows'] = start
+            for item in reader.read(start, last_sealed or None):
+                # Timestamps are UTC; the partition is the date part
+                item_day = item['timestamp'][:10]
+                if item_day <= last_sealed:
+                    # Cannot happen for logs timestamped on arrival; keep sealed files final
+                    result['late'] += 1
+                    continue
+                if item_day != day:
+                    if day is not None:
+                        seal(day, lines, last_item)
+                    day, lines = item_day, []
+                lines.append(jsonstream.dumps(item))
+                last_item = item
+                result['rows'] += 1
+        except ArchiveError as e:
+            result['error'] = str(e)
+            print(f"✗ {kind}: {e}")
+            # What was read before the error is still written as the open day
+
+        if day is not None:
+            _write_partition(root / kind / f"{day}.jsonl.gz", lines)
+            previous_open = state.get('open')
+            state['open'] = day
+            result['open'] = day
+            print(f"  • {kind}/{day}.jsonl.gz ({len(lines)} logs, open)")
+            if previous_open and previous_open != day and previous_open not in sealed_days:
+                # An open day that turned out to have no logs after all
+                try:
+                    os.remove(root / kind / f"{previous_open}.jsonl.gz")
+                except FileNotFoundError:
+                    pass
+        _save_manifest(manifest_path, manifest)
+        result['pages'] = reader.pages
+        result['gap_fetches'] = reader.gap_fetches
+
+    elapsed = time.monotonic() - started
+    print(f"\n{'='*60}")
+    print(f"Logs Export Summary:")
+    for kind, result in results.items():
+        state = manifest[kind]
+        print(f"  {kind}: {result['rows']} logs fetched in {result['pages']} pages, "
+              f"{result['sealed']} days sealed ({len(state['days'])} total), open day {result['open'] or '-'}")
+        if result.get('gap_fetches'):
+            print(f"    Gap fetches for logs arriving during export: {result['gap_fetches']}")
+        if result['late']:
+            print(f"    ⚠ {result['late']} logs dated in already sealed days were skipped")
+        if result['error']:
+            print(f"    ✗ {result['error']}")
+    print(f"  Time: {elapsed:.1f}s")
+    print(f"  Archive: {root}")
+    return results
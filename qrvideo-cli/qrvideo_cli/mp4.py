@@ -0,0 +1,383 @@
+"""MP4 (ISO base media) box parsing and faststart remuxing"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# Boxes whose payload is a plain sequence of child boxes, on the way to stco/co64
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf", b"mvex"}
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# Extensions of files that use the MP4 box structure
+MP4_EXTENSIONS = ('.mp4', '.m4v', '.mov')
+
+_UINT32_MAX = 0xFFFFFFFF
+
+
+class Mp4Error(Exception):
+    """The file is not a well-formed MP4"""
+
+
+class Box(NamedTuple):
+    """Location of one box inside a buffer"""
+    type: bytes
+    offset: int
+    size: int
+    header_size: int
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+    @property
+    def payload_offset(self) -> int:
+        return self.offset + self.header_size
+
+
+def iter_boxes(buf: Any, start: int = 0, end: Optional[int] = None) -> Iterator[Box]:
+    """
+    Yield the boxes laid out between start and end of a buffer
+
+    Args:
+        buf: bytes, memoryview or mmap holding the file
+        start: Offset of the first box
+        end: Offset the boxes end at (default: end of buf)
+
+    Yields:
+        Box entries in file order
+
+    Raises:
+        Mp4Error: If a box header is truncated or a size points past end
+    """
+    end = len(buf) if end is None else end
+    offset = start
+    while offset < end:
+        if end - offset < 8:
+            raise Mp4Error(f"Truncated box header at offset {offset}")
+        size, box_type = struct.unpack_from(">I4s", buf, offset)
+        header_size = 8
+        if size == 1:
+            if end - offset < 16:
+                raise Mp4Error(f"Truncated box header at offset {offset}")
+            size = struct.unpack_from(">Q", buf, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise Mp4Error(f"Box '{box_type.decode('latin-1')}' at offset {offset} "
+                           f"runs past the end of its parent")
+        yield Box(box_type, offset, size, header_size)
+        offset += size
+
+
+def _box_header(box_type: bytes, payload_size: int) -> bytes:
+    if payload_size + 8 <= _UINT32_MAX:
+        return struct.pack(">I4s", payload_size + 8, box_type)
+    return struct.pack(">I4sQ", 1, box_type, payload_size + 16)
+
+
+def _unpack(fmt: str, buf: Any, box: Box, offset: int) -> Tuple[Any, ...]:
+    """struct.unpack_from that raises Mp4Error when the fields run past the box"""
+    if offset + struct.calcsize(fmt) > box.end:
+        raise Mp4Error(f"Truncated '{box.type.decode('latin-1')}' box")
+    return struct.unpack_from(fmt, buf, offset)
+
+
+def _read_offsets(buf: Any, box: Box, wide: bool) -> array:
+    count = _unpack(">I", buf, box, box.payload_offset + 4)[0]
+    start = box.payload_offset + 8
+    item_size = 8 if wide else 4
+    if start + count * item_size > box.end:
+        raise Mp4Error(f"Truncated '{box.type.decode('latin-1')}' table")
+    offsets = array("Q" if wide else "I")
+    offsets.frombytes(bytes(buf[start:start + count * item_size]))
+    if sys.byteorder == "little":
+        offsets.byteswap()
+    return offsets
+
+
+def _rebuild(
+    buf: Any,
+    box: Box,
+    shift: Callable[[int], int],
+    use_co64: bool,
+    overflow: List[bool]
+) -> bytes:
+    """Serialize a moov subtree with every chunk offset passed through shift"""
+    if box.type in CONTAINER_BOXES:
+        payload = b"".join(
+            _rebuild(buf, child, shift, use_co64, overflow)
+            for child in iter_boxes(buf, box.payload_offset, box.end)
+        )
+        return _box_header(box.type, len(payload)) + payload
+
+    if box.type in (b"stco", b"co64"):
+        offsets = [shift(o) for o in _read_offsets(buf, box, box.type == b"co64")]
+        wide = box.type == b"co64" or use_co64
+        if not wide and offsets and max(offsets) > _UINT32_MAX:
+            overflow[0] = True
+            wide = True
+        table = array("Q" if wide else "I", offsets)
+        if sys.byteorder == "little":
+            table.byteswap()
+        version_flags = bytes(buf[box.payload_offset:box.payload_offset + 4])
+        payload = version_flags + struct.pack(">I", len(offsets)) + table.tobytes()
+        return _box_header(b"co64" if wide else b"stco", len(payload)) + payload
+
+    return bytes(buf[box.offset:box.end])
+
+
+def find_child(buf: Any, parent: Box, box_type: bytes) -> Optional[Box]:
+    """Return the first child box of a given type, or None"""
+    return next((b for b in iter_boxes(buf, parent.payload_offset, parent.end) if b.type == box_type), None)
+
+
+def _find_path(buf: Any, parent: Box, *path: bytes) -> Optional[Box]:
+    box: Optional[Box] = parent
+    for box_type in path:
+        box = find_child(buf, box, box_type)
+        if box is None:
+            return None
+    return box
+
+
+class TrackInfo(NamedTuple):
+    """Summary of one trak box"""
+    handler: str
+    codec: Optional[str]
+    duration: Optional[float]
+    chunk_count: int
+
+
+class MovieInfo(NamedTuple):
+    """Summary of a parsed MP4 file"""
+    brand: Optional[str]
+    duration: Optional[float]
+    tracks: List[TrackInfo]
+    faststart: bool
+    fragmented: bool
+    data_end: int
+
+
+def _read_duration(buf: Any, box: Box) -> Tuple[int, int]:
+    """Return (timescale, duration) of an mvhd/mdhd box"""
+    start = box.payload_offset
+    version = _unpack(">B", buf, box, start)[0]
+    if version == 1:
+        timescale, duration = _unpack(">IQ", buf, box, start + 4 + 16)
+    else:
+        timescale, duration = _unpack(">II", buf, box, start + 4 + 8)
+    return timescale, duration
+
+
+def _track_info(buf: Any, trak: Box) -> Tuple[TrackInfo, int]:
+    """Return the track summary and the end of its last chunk offset"""
+    mdia = find_child(buf, trak, b"mdia")
+    if mdia is None:
+        raise Mp4Error("Track without 'mdia' box")
+
+    hdlr = find_child(buf, mdia, b"hdlr")
+    handler = (bytes(buf[hdlr.payload_offset + 8:hdlr.payload_offset + 12]).decode('latin-1')
+               if hdlr is not None else "????")
+
+    duration = None
+    mdhd = find_child(buf, mdia, b"mdhd")
+    if mdhd is not None:
+        timescale, units = _read_duration(buf, mdhd)
+        if timescale:
+            duration = units / timescale
+
+    codec = None
+    chunk_count = 0
+    last_offset = 0
+    stbl = _find_path(buf, mdia, b"minf", b"stbl")
+    if stbl is not None:
+        stsd = find_child(buf, stbl, b"stsd")
+        if stsd is not None:
+            entry = next(iter_boxes(buf, stsd.payload_offset + 8, stsd.end), None)
+            if entry is not None:
+                codec = entry.type.decode('latin-1')
+        table = find_child(buf, stbl, b"stco") or find_child(buf, stbl, b"co64")
+        if table is not None:
+            offsets = _read_offsets(buf, table, table.type == b"co64")
+            chunk_count = len(offsets)
+            last_offset = max(offsets) if offsets else 0
+
+    return TrackInfo(handler, codec, duration, chunk_count), last_offset
+
+
+def read_movie_info(buf: Any) -> MovieInfo:
+    """
+    Parse the structure of an MP4 file
+
+    Args:
+        buf: bytes, memoryview or mmap holding the whole file
+
+    Returns:
+        MovieInfo with the movie duration in seconds, per-track handler and
+        codec, and data_end, the largest chunk offset any track refers to
+
+    Raises:
+        Mp4Error: If boxes are truncated or the moov box is missing or malformed
+    """
+    boxes = list(iter_boxes(buf))
+    moov = next((b for b in boxes if b.type == b"moov"), None)
+    if moov is None:
+        raise Mp4Error("No 'moov' box")
+
+    brand = None
+    if boxes[0].type == b"ftyp" and boxes[0].size >= 12:
+        brand = bytes(buf[boxes[0].payload_offset:boxes[0].payload_offset + 4]).decode('latin-1')
+
+    duration = None
+    mvhd = find_child(buf, moov, b"mvhd")
+    if mvhd is None:
+        raise Mp4Error("No 'mvhd' box")
+    try:
+        timescale, units = _read_duration(buf, mvhd)
+    except struct.error:
+        raise Mp4Error("Truncated 'mvhd' box")
+    if timescale:
+        duration = units / timescale
+
+    tracks = []
+    data_end = 0
+    for trak in iter_boxes(buf, moov.payload_offset, moov.end):
+        if trak.type != b"trak":
+            continue
+        try:
+            track, last_offset = _track_info(buf, trak)
+        except struct.error:
+            raise Mp4Error("Truncated track boxes")
+        tracks.append(track)
+        data_end = max(data_end, last_offset)
+
+    mdat = next((b for b in boxes if b.type == b"mdat"), None)
+    return MovieInfo(
+        brand=brand,
+        duration=duration,
+        tracks=tracks,
+        faststart=mdat is None or moov.offset < mdat.offset,
+        fragmented=any(b.type == b"moof" for b in boxes),
+        data_end=data_end
+    )
+
+
+def needs_faststart(path: str) -> bool:
+    """
+    Whether the moov box of an MP4 file comes after its media data
+
+    Raises:
+        Mp4Error: If the file has no moov box or is malformed
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise Mp4Error("Empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return _layout(buf)[0] is not None
+
+
+def _layout(buf: Any):
+    """Return (first mdat, moov, top-level boxes); first mdat is None if already faststart"""
+    boxes = list(iter_boxes(buf))
+    moov = next((b for b in boxes if b.type == b"moov"), None)
+    if moov is None:
+        raise Mp4Error("No 'moov' box")
+    mdat = next((b for b in boxes if b.type == b"mdat"), None)
+    if mdat is None or mdat.offset > moov.offset:
+        return None, moov, boxes
+    return mdat, moov, boxes
+
+
+def faststart(path: str, output_path: str) -> bool:
+    """
+    Rewrite an MP4 file with its moov box ahead of the media data
+
+    The file is read through mmap and copied block by block, so only the moov
+    box is held in memory. Every stco/co64 chunk offset is moved by the size
+    of the relocated moov; a stco table whose offsets no longer fit in 32 bits
+    is converted to co64.
+
+    Args:
+        path: Source MP4 file
+        output_path: Destination for the rewritten file
+
+    Returns:
+        True if output_path was written, False if the file already starts
+        with moov (nothing is written)
+
+    Raises:
+        Mp4Error: If the file has no moov box or is malformed
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise Mp4Error("Empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            mdat, moov, boxes = _layout(buf)
+            if mdat is None:
+                return False
+
+            insert_at = mdat.offset
+
+            def build(new_size: int, use_co64: bool, overflow: List[bool]) -> bytes:
+                def shift(offset: int) -> int:
+                    if offset >= moov.end:
+                        offset -= moov.size
+                    if offset >= insert_at:
+                        offset += new_size
+                    return offset
+                return _rebuild(buf, moov, shift, use_co64, overflow)
+
+            # The moov size only depends on whether offsets need 64 bits
+            use_co64 = False
+            while True:
+                overflow = [False]
+                size = len(build(0, use_co64, [False]))
+                new_moov = build(size, use_co64, overflow)
+                if not overflow[0] or use_co64:
+                    break
+                use_co64 = True
+
+            with open(output_path, 'wb') as out:
+                for box in boxes:
+                    if box.type == b"moov":
+                        continue
+                    if box.offset == insert_at:
+                        out.write(new_moov)
+                    for pos in range(box.offset, box.end, COPY_BLOCK_SIZE):
+                        out.write(buf[pos:min(pos + COPY_BLOCK_SIZE, box.end)])
+    return True
+
+
+def faststart_copy(path: str, tmp_dir: str) -> Optional[str]:
+    """
+    Faststart a file into a private copy, leaving the original untouched
+
+    Runs in worker processes, so it only takes and returns plain paths.
+
+    Args:
+        path: Source MP4 file
+        tmp_dir: Directory for the rewritten copy
+
+    Returns:
+        Path of the rewritten copy, or None if the file is already faststart
+
+    Raises:
+        Mp4Error: If the file has no moov box or is malformed
+    """
+    fd, output_path = tempfile.mkstemp(suffix=os.path.splitext(path)[1], dir=tmp_dir)
+    os.close(fd)
+    try:
+        if faststart(path, output_path):
+            return output_path
+    except BaseException:
+        os.remove(output_path)
+        raise
+    os.remove(output_path)
+    return None
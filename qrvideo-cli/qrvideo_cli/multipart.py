@@ -0,0 +1,102 @@
+"""Streaming multipart/form-data bodies for QR Video CLI uploads"""
+
+import mimetypes
+import uuid
+from typing import Optional, Dict, Callable, BinaryIO
+
+
+class MultipartStream:
+    """
+    File-like multipart/form-data body with a single file part
+
+    The file part is read from its source in small blocks as the HTTP layer
+    consumes the body, so uploads never hold the whole file in memory. The
+    total length is known up front, which lets requests send Content-Length.
+    """
+
+    block_size = 64 * 1024
+
+    def __init__(
+        self,
+        fields: Dict[str, Optional[str]],
+        file_field: str,
+        file_name: str,
+        source: BinaryIO,
+        size: int,
+        content_type: Optional[str] = None,
+        on_read: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Args:
+            fields: Plain form fields sent before the file
+            file_field: Form field name of the file part
+            file_name: File name reported to the server
+            source: Object with a read(n) method supplying exactly size bytes
+            size: Number of bytes the source will supply
+            content_type: MIME type of the file (guessed from file_name if omitted)
+            on_read: Called with the byte count of every block read (e.g. a throttle)
+        """
+        self.boundary = uuid.uuid4().hex
+        self._source = source
+        self._remaining = size
+        self._on_read = on_read
+
+        if content_type is None:
+            content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+        head = b"".join(
+            self._field_header(name) + value.encode("utf-8") + b"\r\n"
+            for name, value in fields.items()
+            if value is not None
+        )
+        head += self._field_header(file_field, file_name, content_type)
+        self._head = head
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("ascii")
+        self.length = len(head) + size + len(self._tail)
+
+    @property
+    def content_type(self) -> str:
+        """Content-Type header value including the boundary"""
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def _field_header(self, name: str, file_name: Optional[str] = None,
+                      content_type: Optional[str] = None) -> bytes:
+        disposition = f'form-data; name="{name}"'
+        if file_name is not None:
+            safe_name = file_name.replace('"', "%22")
+            disposition += f'; filename="{safe_name}"'
+        header = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self):
+        while True:
+            block = self.read(self.block_size)
+            if not block:
+                return
+            yield block
+
+    def read(self, size: int = -1) -> bytes:
+        """Return the next part of the body (at most size bytes for the file part)"""
+        if size is None or size < 0:
+            size = self.block_size
+
+        if self._head:
+            block, self._head = self._head, b""
+            return block
+
+        if self._remaining > 0:
+            block = self._source.read(min(size, self._remaining))
+            if not block:
+                raise IOError(f"Upload source ended with {self._remaining} bytes missing")
+            self._remaining -= len(block)
+            if self._on_read:
+                self._on_read(len(block))
+            return block
+
+        block, self._tail = self._tail, b""
+        return block
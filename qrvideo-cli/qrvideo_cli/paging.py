@@ -0,0 +1,287 @@
+"""Adaptive pagination for QR Video CLI list endpoints"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+
+#: Where tuned page sizes are remembered between runs
+STATE_FILE = Path.home() / '.qrvideo_cli' / 'page_sizes.json'
+
+DEFAULT_PAGE_SIZE = 100
+
+_state_lock = threading.Lock()
+
+
+class ListingIncomplete(Exception):
+    """A strict listing could not fetch every item of the endpoint"""
+
+
+class PageSizeTuner:
+    """
+    Hill-climbing page size controller for one endpoint
+
+    Every page reports its row count, bytes and latency. The tuner keeps a
+    smoothed rows/second figure per page size and doubles the size while that
+    keeps improving, halving it again once a larger size turns out slower.
+    Sizes stay within [min_size, max_size], below any server-side cap and
+    below the row count that fits into max_page_bytes.
+
+    Because the API pages by number, a new size is only adopted when the rows
+    fetched so far are a whole number of pages of that size.
+    """
+
+    smoothing = 0.5
+    improvement = 1.05
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_PAGE_SIZE,
+        min_size: int = 20,
+        max_size: int = 10000,
+        max_page_bytes: int = 16 * 1024 * 1024,
+        cap: Optional[int] = None
+    ):
+        """
+        Args:
+            initial: Page size to start with
+            min_size: Smallest page size to use
+            max_size: Largest page size to use
+            max_page_bytes: Upper bound on the estimated size of one page
+            cap: Page size limit the server is known to enforce
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_page_bytes = max_page_bytes
+        self.cap = cap
+        self.rates: Dict[int, float] = {}
+        self.row_bytes: Optional[float] = None
+        self.size = self._clamp(initial)
+        # Sizes the server honoured in this run; a cap can change between runs
+        self.confirmed: Set[int] = set()
+
+    def _clamp(self, size: int) -> int:
+        upper = self.max_size
+        if self.cap:
+            upper = min(upper, self.cap)
+        if self.row_bytes:
+            upper = min(upper, max(1, int(self.max_page_bytes / self.row_bytes)))
+        return max(min(size, upper), min(self.min_size, upper))
+
+    def is_probe(self, size: int) -> bool:
+        """Whether size has not been confirmed as honoured by the server yet"""
+        return size not in self.confirmed
+
+    def record(self, requested: int, returned_size: int, rows: int, nbytes: int, seconds: float):
+        """
+        Record one fetched page
+
+        Args:
+            requested: pageSize that was requested
+            returned_size: pageSize reported by the server
+            rows: Number of items received
+            nbytes: Size of the response body
+            seconds: Time taken to fetch the page
+        """
+        if returned_size and returned_size < requested:
+            self.cap = returned_size
+            self.size = self._clamp(returned_size)
+            return
+
+        self.confirmed.add(requested)
+        if rows <= 0:
+            return
+
+        per_row = nbytes / rows
+        self.row_bytes = per_row if self.row_bytes is None else (
+            self.smoothing * per_row + (1 - self.smoothing) * self.row_bytes)
+
+        # A short final page says nothing about the throughput of its size
+        if rows < requested:
+            return
+
+        rate = rows / max(seconds, 1e-6)
+        previous = self.rates.get(requested)
+        self.rates[requested] = rate if previous is None else (
+            self.smoothing * rate + (1 - self.smoothing) * previous)
+
+    def next_size(self, fetched: int) -> int:
+        """
+        Choose the page size for the next request
+
+        Args:
+            fetched: Number of rows fetched so far
+
+        Returns:
+            Page size whose page boundaries line up with fetched
+        """
+        current = self._clamp(self.size)
+        smaller = self.rates.get(current // 2)
+        larger = self.rates.get(current * 2)
+        rate = self.rates.get(current)
+
+        candidate = current
+        if rate is not None:
+            if smaller is not None and rate * self.improvement < smaller:
+                candidate = current // 2
+            elif larger is None or larger > rate * self.improvement:
+                candidate = current * 2
+        candidate = self._clamp(candidate)
+
+        if candidate != current and fetched % candidate == 0:
+            self.size = candidate
+        elif fetched % current != 0:
+            # Cap or byte bound changed the size; fall back to one that aligns
+            self.size = next(
+                (s for s in range(current, 0, -1) if fetched % s == 0), 1)
+        else:
+            self.size = current
+        return self.size
+
+
+def _load_state() -> Dict[str, Any]:
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(key: str, tuner: PageSizeTuner):
+    with _state_lock:
+        state = _load_state()
+        state[key] = {"size": tuner.size, "cap": tuner.cap}
+        try:
+            STATE_FILE.parent.mkdir(exist_ok=True)
+            tmp_file = STATE_FILE.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_file, STATE_FILE)
+        except OSError:
+            pass
+
+
+def _endpoint_key(fetch: Callable[..., Any]) -> str:
+    client = getattr(fetch, '__self__', None)
+    base_url = getattr(client, 'base_url', '')
+    return f"{base_url} {getattr(fetch, '__name__', repr(fetch))}"
+
+
+def load_tuner(fetch: Callable[..., Any], **kwargs: Any) -> PageSizeTuner:
+    """Create a tuner for a client list method, starting from the remembered size"""
+    saved = _load_state().get(_endpoint_key(fetch), {})
+    return PageSizeTuner(
+        initial=saved.get("size", DEFAULT_PAGE_SIZE),
+        cap=saved.get("cap"),
+        **kwargs
+    )
+
+
+def iter_all_items(
+    fetch: Callable[..., Any],
+    page_size: Optional[int] = None,
+    label: Optional[str] = None,
+    strict: bool = False,
+    **filters: Any
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every item of a paged list endpoint
+
+    Each page is requested with stream=True, so items are parsed and yielded
+    while the page is still downloading and large page sizes keep flat memory.
+    Without an explicit page_size the size is tuned per endpoint for the most
+    rows per second and remembered in STATE_FILE for the next run.
+
+    A page that fails ends the listing early with a message, which suits
+    exports. Callers that draw conclusions from what is absent (deletions,
+    integrity checks) pass strict=True instead.
+
+    Args:
+        fetch: Client list method, e.g. client.list_videos
+        page_size: Fixed number of items per page (default: tuned automatically)
+        label: Item name for per-page progress output (silent if None)
+        strict: Raise instead of stopping early when a page fails or fewer
+            items than the server's totalCount arrive
+        **filters: Extra filter arguments passed to fetch
+
+    Yields:
+        Item dictionaries in server order
+
+    Raises:
+        ListingIncomplete: In strict mode, if the listing is incomplete
+    """
+    tuner = load_tuner(fetch) if page_size is None else None
+    size = page_size or tuner.size
+    saved = (tuner.size, tuner.cap) if tuner else None
+    fetched = 0
+
+    while True:
+        if tuner:
+            size = tuner.next_size(fetched)
+        page = fetched // size + 1
+        probe = tuner is not None and tuner.is_probe(size)
+
+        started = time.monotonic()
+        data = fetch(page=page, page_size=size, stream=True, **filters)
+        if data is None:
+            if strict:
+                raise ListingIncomplete(f"Failed to fetch page {page}")
+            print(f"✗ Failed to fetch page {page}")
+            return
+
+        # Pages of an unconfirmed size are held back until the server's
+        # pageSize shows it was not capped (and the rows are the right ones).
+        # The clock is paused while the caller handles a yielded item, so the
+        # tuner measures the endpoint rather than the consumer.
+        count = 0
+        held = []
+        elapsed = 0.0
+        try:
+            for item in data:
+                count += 1
+                if probe:
+                    held.append(item)
+                else:
+                    elapsed += time.monotonic() - started
+                    yield item
+                    started = time.monotonic()
+            elapsed += time.monotonic() - started
+        except Exception as e:
+            if strict:
+                raise ListingIncomplete(f"Failed to read page {page}: {e}") from e
+            print(f"✗ Failed to read page {page}: {e}")
+            return
+
+        returned_size = data.meta.get('pageSize', size)
+        if not tuner and returned_size < size:
+            # Fixed size above the server cap: the server paged by its own size
+            size = returned_size
+        elif tuner:
+            tuner.record(size, returned_size, count, data.bytes_read, elapsed)
+            if returned_size < size:
+                if label:
+                    print(f"  Server caps page size at {returned_size}")
+                if page > 1:
+                    continue
+            if (tuner.size, tuner.cap) != saved:
+                saved = (tuner.size, tuner.cap)
+                _save_state(_endpoint_key(fetch), tuner)
+
+        for item in held:
+            yield item
+
+        fetched += count
+        if label:
+            print(f"  Fetched page {page} ({count} {label}, page size {size})")
+
+        # Check if we've fetched all
+        total = data.meta.get('totalCount', 0)
+        if fetched >= total:
+            return
+        if count == 0:
+            if strict:
+                raise ListingIncomplete(f"Listing ended after {fetched} of {total} items")
+            return
@@ -0,0 +1,208 @@
+"""Minimal PNG reading and writing on NumPy arrays"""
+
+import struct
+import zlib
+from typing import Union
+
+import numpy as np
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Colour type -> samples per pixel
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+class PngError(Exception):
+    """The data is not a PNG this reader supports"""
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter(rows: np.ndarray, bpp: int) -> np.ndarray:
+    """Undo per-scanline filters (rows include the leading filter byte)"""
+    filters = rows[:, 0]
+    data = rows[:, 1:].copy()
+    height, stride = data.shape
+    previous = np.zeros(stride, dtype=np.uint8)
+
+    for y in range(height):
+        row = data[y]
+        kind = filters[y]
+        if kind == 1:
+            # Sub: running sum per byte lane, vectorised by lanes of bpp bytes
+            padded = np.zeros(-(-stride // bpp) * bpp, dtype=np.uint8)
+            padded[:stride] = row
+            row[:] = np.cumsum(padded.reshape(-1, bpp), axis=0, dtype=np.uint8).reshape(-1)[:stride]
+        elif kind == 2:
+            row += previous
+        elif kind == 3:
+            out = row.astype(np.int32)
+            up = previous.astype(np.int32)
+            for i in range(stride):
+                left = out[i - bpp] if i >= bpp else 0
+                out[i] = (out[i] + ((left + up[i]) >> 1)) & 0xFF
+            row[:] = out
+        elif kind == 4:
+            out = row.astype(np.int32)
+            up = previous.astype(np.int32)
+            for i in range(stride):
+                left = out[i - bpp] if i >= bpp else 0
+                upper_left = up[i - bpp] if i >= bpp else 0
+                out[i] = (out[i] + _paeth(left, up[i], upper_left)) & 0xFF
+            row[:] = out
+        elif kind != 0:
+            raise PngError(f"Unknown filter type {kind}")
+        previous = row
+    return data
+
+
+def read_png(source: Union[str, bytes]) -> np.ndarray:
+    """
+    Decode a PNG image to 8-bit grayscale
+
+    Colour images are converted to luma and transparent pixels are composited
+    over white. Interlaced images are not supported.
+
+    Args:
+        source: File path or PNG bytes
+
+    Returns:
+        uint8 array of shape (height, width)
+
+    Raises:
+        PngError: If the data is not a supported PNG
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            source = f.read()
+    if source[:8] != PNG_SIGNATURE:
+        raise PngError("Not a PNG file")
+
+    header = None
+    palette = None
+    transparency = None
+    idat = []
+    pos = 8
+    while pos + 8 <= len(source):
+        length, kind = struct.unpack_from(">I4s", source, pos)
+        body = source[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE":
+            palette = np.frombuffer(body, dtype=np.uint8).reshape(-1, 3)
+        elif kind == b"tRNS":
+            transparency = np.frombuffer(body, dtype=np.uint8)
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+
+    if header is None or not idat:
+        raise PngError("Missing IHDR or IDAT chunk")
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if color_type not in _CHANNELS or bit_depth not in (1, 2, 4, 8, 16):
+        raise PngError(f"Unsupported colour type {color_type} / bit depth {bit_depth}")
+    if interlace:
+        raise PngError("Interlaced PNG is not supported")
+
+    channels = _CHANNELS[color_type]
+    bits_per_pixel = channels * bit_depth
+    stride = (width * bits_per_pixel + 7) // 8
+    try:
+        raw = zlib.decompress(b"".join(idat))
+    except zlib.error as e:
+        raise PngError(f"Corrupt image data: {e}")
+    if len(raw) < height * (stride + 1):
+        raise PngError("Truncated image data")
+
+    rows = np.frombuffer(raw, dtype=np.uint8)[:height * (stride + 1)].reshape(height, stride + 1)
+    data = _unfilter(rows, max(1, bits_per_pixel // 8))
+
+    if bit_depth < 8:
+        bits = np.unpackbits(data, axis=1)[:, :width * bit_depth].reshape(height, width, bit_depth)
+        weights = (1 << np.arange(bit_depth - 1, -1, -1)).astype(np.uint8)
+        samples = (bits * weights).sum(axis=2).astype(np.uint8)[:, :, None]
+        max_value = (1 << bit_depth) - 1
+    elif bit_depth == 16:
+        samples = data.reshape(height, width, channels, 2)[..., 0]
+        max_value = 255
+    else:
+        samples = data.reshape(height, width, channels)
+        max_value = 255
+
+    if color_type == 3:
+        if palette is None:
+            raise PngError("Missing palette")
+        index = samples[:, :, 0]
+        rgb = palette[np.minimum(index, len(palette) - 1)].astype(np.float32)
+        alpha = None
+        if transparency is not None:
+            table = np.full(256, 255, dtype=np.uint8)
+            table[:len(transparency)] = transparency
+            alpha = table[index].astype(np.float32)
+    else:
+        scaled = samples.astype(np.float32) * (255.0 / max_value)
+        rgb = scaled[:, :, :3] if color_type in (2, 6) else scaled[:, :, :1]
+        alpha = scaled[:, :, -1] if color_type in (4, 6) else None
+
+    if rgb.shape[2] == 3:
+        gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    else:
+        gray = rgb[:, :, 0]
+    if alpha is not None:
+        gray = gray * (alpha / 255.0) + 255.0 * (1.0 - alpha / 255.0)
+
+    return np.clip(gray + 0.5, 0, 255).astype(np.uint8)
+
+
+def _chunk(kind: bytes, body: bytes) -> bytes:
+    return (struct.pack(">I", len(body)) + kind + body
+            + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF))
+
+
+def encode_png(image: np.ndarray, dpi: int = 0, compression: int = 6) -> bytes:
+    """
+    Encode a grayscale (H, W) or RGB (H, W, 3) array as PNG
+
+    Boolean arrays are written as 1-bit grayscale, with True as white.
+
+    Args:
+        image: uint8 or bool array
+        dpi: Resolution stored in the pHYs chunk (omitted if 0)
+        compression: zlib level (default: 6)
+
+    Returns:
+        PNG file content
+    """
+    height, width = image.shape[:2]
+    color_type = 2 if image.ndim == 3 else 0
+    if image.dtype == np.bool_:
+        bit_depth = 1
+        rows = np.packbits(image, axis=1)
+    else:
+        bit_depth = 8
+        rows = np.ascontiguousarray(image, dtype=np.uint8).reshape(height, -1)
+
+    scanlines = np.zeros((height, rows.shape[1] + 1), dtype=np.uint8)
+    scanlines[:, 1:] = rows
+
+    png = PNG_SIGNATURE + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0))
+    if dpi:
+        per_metre = int(round(dpi / 0.0254))
+        png += _chunk(b"pHYs", struct.pack(">IIB", per_metre, per_metre, 1))
+    png += _chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compression))
+    return png + _chunk(b"IEND", b"")
+
+
+def write_png(path: str, image: np.ndarray, dpi: int = 0):
+    """Write an array to a PNG file (see encode_png)"""
+    with open(path, 'wb') as f:
+        f.write(encode_png(image, dpi))
@@ -0,0 +1,144 @@
+"""Pre-upload validation of video files for QR Video CLI"""
+
+import mmap
+import os
+import struct
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from .mp4 import MP4_EXTENSIONS, Mp4Error, read_movie_info
+
+
+#: Request size limit of POST /api/videos (RequestSizeLimit on VideosController)
+MAX_UPLOAD_BYTES = 2_147_483_648
+
+# Room left for the multipart headers of the upload request
+_MULTIPART_OVERHEAD = 64 * 1024
+
+# Sample entries browsers can decode from an MP4 container
+PLAYABLE_VIDEO_CODECS = {"avc1", "avc3", "hvc1", "hev1", "vp09", "av01"}
+PLAYABLE_AUDIO_CODECS = {"mp4a", "Opus", "fLaC", "ac-3", "ec-3"}
+
+
+class PreflightResult(NamedTuple):
+    """Outcome of validating one file"""
+    path: str
+    size: int
+    duration: Optional[float]
+    codecs: List[str]
+    problems: List[str]
+    warnings: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+def check_file(path: str, max_size: int = MAX_UPLOAD_BYTES) -> PreflightResult:
+    """
+    Validate a video file without sending it anywhere
+
+    MP4-family files are parsed through mmap: the box structure must be
+    complete, moov must describe a positive duration and at least one video
+    or audio track, and no chunk offset may point past the end of the file.
+    Other formats only get the size checks.
+
+    Runs in worker processes, so it never raises; failures are reported as
+    problems.
+
+    Args:
+        path: Video file path
+        max_size: Largest file the server accepts (default: MAX_UPLOAD_BYTES)
+
+    Returns:
+        PreflightResult; the file should not be uploaded unless result.ok
+    """
+    problems: List[str] = []
+    warnings: List[str] = []
+    codecs: List[str] = []
+    duration = None
+
+    try:
+        size = os.path.getsize(path)
+    except OSError as e:
+        return PreflightResult(path, 0, None, codecs, [f"Cannot read file: {e}"], warnings)
+
+    if size == 0:
+        return PreflightResult(path, size, None, codecs, ["Empty file"], warnings)
+    if size + _MULTIPART_OVERHEAD > max_size:
+        problems.append(f"File exceeds the {max_size // 1024 ** 2} MB upload limit")
+
+    if not path.lower().endswith(MP4_EXTENSIONS):
+        warnings.append("Container not checked (not an MP4 file)")
+        return PreflightResult(path, size, None, codecs, problems, warnings)
+
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            info = read_movie_info(buf)
+    except (Mp4Error, struct.error) as e:
+        problems.append(f"Invalid MP4: {e}")
+        return PreflightResult(path, size, None, codecs, problems, warnings)
+    except (OSError, ValueError) as e:
+        problems.append(f"Cannot read file: {e}")
+        return PreflightResult(path, size, None, codecs, problems, warnings)
+
+    duration = info.duration
+    codecs = [t.codec for t in info.tracks if t.codec]
+
+    if not info.duration and not info.fragmented:
+        problems.append("Movie duration is zero")
+    media = [t for t in info.tracks if t.handler in ("vide", "soun")]
+    if not media:
+        problems.append("No video or audio track")
+    if info.data_end >= size:
+        problems.append("Chunk offsets point past the end of the file (truncated?)")
+
+    for track in media:
+        playable = PLAYABLE_VIDEO_CODECS if track.handler == "vide" else PLAYABLE_AUDIO_CODECS
+        if track.codec is None:
+            problems.append(f"Track '{track.handler}' has no sample description")
+        elif track.codec not in playable:
+            warnings.append(f"Codec '{track.codec}' may not play in browsers")
+    if not any(t.handler == "vide" for t in media) and media:
+        warnings.append("No video track")
+    if not info.faststart:
+        warnings.append("moov after media data (not faststart)")
+
+    return PreflightResult(path, size, duration, codecs, problems, warnings)
+
+
+def check_files(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    pool: Optional[Executor] = None
+) -> Iterator[PreflightResult]:
+    """
+    Validate files in a process pool
+
+    Args:
+        paths: Video file paths
+        workers: Number of processes (default: CPU count)
+        pool: Existing executor to use instead of a new process pool
+
+    Yields:
+        PreflightResult per file, in input order
+    """
+    if pool is not None:
+        yield from pool.map(check_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(check_file, paths, chunksize=4)
+
+
+def format_result(result: PreflightResult) -> str:
+    """One-line description of a result for progress output"""
+    name = os.path.basename(result.path)
+    details = []
+    if result.duration:
+        details.append(f"{result.duration:.1f}s")
+    if result.codecs:
+        details.append("/".join(result.codecs))
+    summary = f" ({', '.join(details)})" if details else ""
+    if result.ok:
+        return f"✓ {name}{summary}"
+    return f"✗ {name}{summary}: {'; '.join(result.problems)}"
@@ -0,0 +1,597 @@
+"""QR code detection and decoding with NumPy
+
+Built for clean, generated code images such as those served by the QR image
+endpoint or rendered into print sheets: the code may be scaled or rotated,
+but the three finder patterns must be visible and the image free of
+perspective distortion.
+"""
+
+from functools import lru_cache
+from itertools import combinations
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class QrDecodeError(Exception):
+    """No QR code could be found or decoded"""
+
+
+# Error correction level by the two format bits
+_FORMAT_LEVELS = {1: "L", 0: "M", 3: "Q", 2: "H"}
+
+# Per version (index 1..40), from the QR specification tables
+_ECC_CODEWORDS_PER_BLOCK = {
+    "L": (-1, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28,
+          28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    "M": (-1, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26,
+          26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28),
+    "Q": (-1, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30,
+          28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    "H": (-1, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28,
+          30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+}
+_NUM_BLOCKS = {
+    "L": (-1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8,
+          8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22, 24, 25),
+    "M": (-1, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16,
+          17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40, 43, 45, 47, 49),
+    "Q": (-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20,
+          23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68),
+    "H": (-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25,
+          25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81),
+}
+
+_ALPHANUMERIC = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+
+# Finder pattern run widths in modules, and how far each run may deviate
+_FINDER_RATIOS = np.array([1, 1, 3, 1, 1], dtype=np.float32)
+_FINDER_TOLERANCE = np.array([0.5, 0.5, 1.0, 0.5, 0.5], dtype=np.float32)
+
+
+# --- Galois field GF(256) and Reed-Solomon error correction ---
+
+_GF_EXP = [0] * 512
+_GF_LOG = [0] * 256
+_value = 1
+for _i in range(255):
+    _GF_EXP[_i] = _value
+    _GF_LOG[_value] = _i
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+for _i in range(255, 512):
+    _GF_EXP[_i] = _GF_EXP[_i - 255]
+
+
+def _gf_mul(x: int, y: int) -> int:
+    if x == 0 or y == 0:
+        return 0
+    return _GF_EXP[_GF_LOG[x] + _GF_LOG[y]]
+
+
+def _gf_div(x: int, y: int) -> int:
+    if x == 0:
+        return 0
+    return _GF_EXP[(_GF_LOG[x] + 255 - _GF_LOG[y]) % 255]
+
+
+def _gf_pow(x: int, power: int) -> int:
+    return _GF_EXP[(_GF_LOG[x] * power) % 255]
+
+
+def _gf_inverse(x: int) -> int:
+    return _GF_EXP[255 - _GF_LOG[x]]
+
+
+def _poly_scale(poly: List[int], x: int) -> List[int]:
+    return [_gf_mul(c, x) for c in poly]
+
+
+def _poly_add(p: List[int], q: List[int]) -> List[int]:
+    result = [0] * max(len(p), len(q))
+    for i, c in enumerate(p):
+        result[i + len(result) - len(p)] = c
+    for i, c in enumerate(q):
+        result[i + len(result) - len(q)] ^= c
+    return result
+
+
+def _poly_mul(p: List[int], q: List[int]) -> List[int]:
+    result = [0] * (len(p) + len(q) - 1)
+    for j, qc in enumerate(q):
+        for i, pc in enumerate(p):
+            result[i + j] ^= _gf_mul(pc, qc)
+    return result
+
+
+def _poly_eval(poly: Sequence[int], x: int) -> int:
+    y = poly[0]
+    for c in poly[1:]:
+        y = _gf_mul(y, x) ^ c
+    return y
+
+
+def _poly_div(dividend: List[int], divisor: List[int]) -> Tuple[List[int], List[int]]:
+    out = list(dividend)
+    for i in range(len(dividend) - (len(divisor) - 1)):
+        coef = out[i]
+        if coef:
+            for j in range(1, len(divisor)):
+                if divisor[j]:
+                    out[i + j] ^= _gf_mul(divisor[j], coef)
+    separator = -(len(divisor) - 1)
+    return out[:separator], out[separator:]
+
+
+def rs_correct(block: List[int], ecc_len: int) -> List[int]:
+    """
+    Correct a Reed-Solomon block (data followed by ecc_len ECC codewords)
+
+    Returns:
+        The data codewords
+
+    Raises:
+        QrDecodeError: If the block has more errors than can be corrected
+    """
+    syndromes = [0] + [_poly_eval(block, _gf_pow(2, i)) for i in range(ecc_len)]
+    if not any(syndromes):
+        return block[:-ecc_len]
+
+    # Berlekamp-Massey error locator
+    err_loc, old_loc = [1], [1]
+    for i in range(ecc_len):
+        k = i + 1
+        delta = syndromes[k]
+        for j in range(1, len(err_loc)):
+            delta ^= _gf_mul(err_loc[-(j + 1)], syndromes[k - j])
+        old_loc = old_loc + [0]
+        if delta:
+            if len(old_loc) > len(err_loc):
+                new_loc = _poly_scale(old_loc, delta)
+                old_loc = _poly_scale(err_loc, _gf_inverse(delta))
+                err_loc = new_loc
+            err_loc = _poly_add(err_loc, _poly_scale(old_loc, delta))
+    while err_loc and err_loc[0] == 0:
+        del err_loc[0]
+    errors = len(err_loc) - 1
+    if errors * 2 > ecc_len:
+        raise QrDecodeError("Too many errors in a codeword block")
+
+    # Chien search
+    reversed_loc = err_loc[::-1]
+    n = len(block)
+    positions = [n - 1 - i for i in range(n) if _poly_eval(reversed_loc, _gf_pow(2, i)) == 0]
+    if len(positions) != errors:
+        raise QrDecodeError("Could not locate codeword errors")
+
+    # Forney algorithm
+    coef_pos = [n - 1 - p for p in positions]
+    locator = [1]
+    for p in coef_pos:
+        locator = _poly_mul(locator, _poly_add([1], [_gf_pow(2, p), 0]))
+    _, evaluator = _poly_div(_poly_mul(syndromes[::-1], locator), [1] + [0] * len(locator))
+    evaluator = evaluator[::-1]
+
+    xs = [_gf_pow(2, p) for p in coef_pos]
+    corrected = list(block)
+    for i, xi in enumerate(xs):
+        xi_inv = _gf_inverse(xi)
+        derivative = 1
+        for j, xj in enumerate(xs):
+            if j != i:
+                derivative = _gf_mul(derivative, 1 ^ _gf_mul(xi_inv, xj))
+        y = _gf_mul(xi, _poly_eval(evaluator[::-1], xi_inv))
+        if derivative == 0:
+            raise QrDecodeError("Could not correct codeword errors")
+        corrected[positions[i]] ^= _gf_div(y, derivative)
+
+    if any(_poly_eval(corrected, _gf_pow(2, i)) for i in range(ecc_len)):
+        raise QrDecodeError("Could not correct codeword errors")
+    return corrected[:-ecc_len]
+
+
+# --- Symbol structure ---
+
+def _alignment_positions(version: int) -> List[int]:
+    if version == 1:
+        return []
+    count = version // 7 + 2
+    step = (version * 8 + count * 3 + 5) // (count * 4 - 4) * 2
+    size = version * 4 + 17
+    return [6] + [size - 7 - i * step for i in range(count - 2, -1, -1)]
+
+
+@lru_cache(maxsize=None)
+def _function_mask(version: int) -> np.ndarray:
+    """Boolean (row, col) mask of modules that do not carry data"""
+    size = version * 4 + 17
+    mask = np.zeros((size, size), dtype=bool)
+    # Finder patterns with separators and format information
+    mask[:9, :9] = True
+    mask[:9, size - 8:] = True
+    mask[size - 8:, :9] = True
+    # Timing patterns
+    mask[6, :] = True
+    mask[:, 6] = True
+    positions = _alignment_positions(version)
+    last = len(positions) - 1
+    for i, row in enumerate(positions):
+        for j, col in enumerate(positions):
+            if (i, j) in ((0, 0), (0, last), (last, 0)):
+                continue
+            mask[row - 2:row + 3, col - 2:col + 3] = True
+    if version >= 7:
+        mask[size - 11:size - 8, :6] = True
+        mask[:6, size - 11:size - 8] = True
+    return mask
+
+
+@lru_cache(maxsize=None)
+def _data_order(version: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row and column of every data module in codeword bit order"""
+    size = version * 4 + 17
+    function = _function_mask(version)
+    rows, cols = [], []
+    for right in range(size - 1, 0, -2):
+        if right <= 6:
+            right -= 1
+        upward = ((right + 1) & 2) == 0
+        for vert in range(size):
+            y = size - 1 - vert if upward else vert
+            for x in (right, right - 1):
+                if not function[y, x]:
+                    rows.append(y)
+                    cols.append(x)
+    return np.array(rows), np.array(cols)
+
+
+def _mask_pattern(mask: int, size: int) -> np.ndarray:
+    y, x = np.indices((size, size))
+    patterns = (
+        lambda: (x + y) % 2 == 0,
+        lambda: y % 2 == 0,
+        lambda: x % 3 == 0,
+        lambda: (x + y) % 3 == 0,
+        lambda: (x // 3 + y // 2) % 2 == 0,
+        lambda: x * y % 2 + x * y % 3 == 0,
+        lambda: (x * y % 2 + x * y % 3) % 2 == 0,
+        lambda: ((x + y) % 2 + x * y % 3) % 2 == 0,
+    )
+    return patterns[mask]()
+
+
+def _format_codewords() -> np.ndarray:
+    codes = []
+    for data in range(32):
+        rem = data
+        for _ in range(10):
+            rem = (rem << 1) ^ ((rem >> 9) * 0x537)
+        codes.append(((data << 10) | rem) ^ 0x5412)
+    return np.array(codes)
+
+
+_FORMAT_CODES = _format_codewords()
+
+
+def _read_format(modules: np.ndarray) -> Tuple[str, int]:
+    """Return (error correction level, mask) from the format information"""
+    size = modules.shape[0]
+    first = [modules[i, 8] for i in range(6)] + [modules[7, 8], modules[8, 8], modules[8, 7]]
+    first += [modules[8, 14 - i] for i in range(9, 15)]
+    second = [modules[8, size - 1 - i] for i in range(8)]
+    second += [modules[size - 15 + i, 8] for i in range(8, 15)]
+
+    best, best_distance = None, 16
+    for bits in (first, second):
+        value = sum(int(bit) << i for i, bit in enumerate(bits))
+        distances = [bin(int(code) ^ value).count("1") for code in _FORMAT_CODES]
+        index = int(np.argmin(distances))
+        if distances[index] < best_distance:
+            best, best_distance = index, distances[index]
+    if best is None or best_distance > 3:
+        raise QrDecodeError("Unreadable format information")
+    return _FORMAT_LEVELS[best >> 3], best & 7
+
+
+def _codewords(modules: np.ndarray, version: int, mask: int) -> List[int]:
+    size = modules.shape[0]
+    unmasked = modules ^ (_mask_pattern(mask, size) & ~_function_mask(version))
+    rows, cols = _data_order(version)
+    bits = unmasked[rows, cols]
+    bits = bits[:len(bits) // 8 * 8].reshape(-1, 8)
+    return np.packbits(bits, axis=1).reshape(-1).tolist()
+
+
+def _correct_codewords(codewords: List[int], version: int, level: str) -> List[int]:
+    num_blocks = _NUM_BLOCKS[level][version]
+    ecc_len = _ECC_CODEWORDS_PER_BLOCK[level][version]
+    total = len(codewords)
+    short_blocks = num_blocks - total % num_blocks
+    short_len = total // num_blocks
+    short_data = short_len - ecc_len
+
+    blocks = [[0] * (short_len + 1) for _ in range(num_blocks)]
+    index = 0
+    for i in range(short_len + 1):
+        for j in range(num_blocks):
+            if i == short_data and j < short_blocks:
+                continue
+            blocks[j][i] = codewords[index]
+            index += 1
+
+    data = []
+    for j, block in enumerate(blocks):
+        if j < short_blocks:
+            block = block[:short_data] + block[short_data + 1:]
+        data.extend(rs_correct(block, ecc_len))
+    return data
+
+
+class _BitReader:
+    def __init__(self, data: List[int]):
+        self.data = data
+        self.pos = 0
+
+    def remaining(self) -> int:
+        return len(self.data) * 8 - self.pos
+
+    def read(self, count: int) -> int:
+        if count > self.remaining():
+            raise QrDecodeError("Data segment runs past the end of the symbol")
+        value = 0
+        for _ in range(count):
+            byte = self.data[self.pos >> 3]
+            value = (value << 1) | ((byte >> (7 - (self.pos & 7))) & 1)
+            self.pos += 1
+        return value
+
+
+def _parse_segments(data: List[int], version: int) -> str:
+    reader = _BitReader(data)
+    size_class = 0 if version <= 9 else 1 if version <= 26 else 2
+    text = []
+    encoding = "utf-8"
+
+    while reader.remaining() >= 4:
+        mode = reader.read(4)
+        if mode == 0:
+            break
+        if mode == 1:
+            count = reader.read((10, 12, 14)[size_class])
+            digits = []
+            while count >= 3:
+                digits.append(f"{reader.read(10):03d}")
+                count -= 3
+            if count == 2:
+                digits.append(f"{reader.read(7):02d}")
+            elif count == 1:
+                digits.append(str(reader.read(4)))
+            text.append("".join(digits))
+        elif mode == 2:
+            count = reader.read((9, 11, 13)[size_class])
+            chars = []
+            while count >= 2:
+                value = reader.read(11)
+                chars.append(_ALPHANUMERIC[value // 45] + _ALPHANUMERIC[value % 45])
+                count -= 2
+            if count:
+                chars.append(_ALPHANUMERIC[reader.read(6)])
+            text.append("".join(chars))
+        elif mode == 4:
+            count = reader.read((8, 16, 16)[size_class])
+            raw = bytes(reader.read(8) for _ in range(count))
+            try:
+                text.append(raw.decode(encoding))
+            except UnicodeDecodeError:
+                text.append(raw.decode("latin-1"))
+        elif mode == 7:
+            first = reader.read(8)
+            if first & 0x80 == 0:
+                designator = first
+            elif first & 0xC0 == 0x80:
+                designator = ((first & 0x3F) << 8) | reader.read(8)
+            else:
+                designator = ((first & 0x1F) << 16) | reader.read(16)
+            encoding = {3: "latin-1", 20: "shift_jis", 26: "utf-8"}.get(designator, encoding)
+        elif mode == 8:
+            count = reader.read((8, 10, 12)[size_class])
+            raw = bytearray()
+            for _ in range(count):
+                value = reader.read(13)
+                code = ((value // 0xC0) << 8) | (value % 0xC0)
+                code += 0x8140 if code < 0x1F00 else 0xC140
+                raw += code.to_bytes(2, "big")
+            text.append(raw.decode("shift_jis", errors="replace"))
+        else:
+            raise QrDecodeError(f"Unsupported data mode {mode}")
+
+    return "".join(text)
+
+
+# --- Detection ---
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Threshold a grayscale image with Otsu's method; True marks dark pixels"""
+    histogram = np.bincount(gray.reshape(-1), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight_dark = np.cumsum(histogram)
+    weight_light = weight_dark[-1] - weight_dark
+    cumulative = np.cumsum(histogram * levels)
+    mean_dark = cumulative / np.maximum(weight_dark, 1)
+    mean_light = (cumulative[-1] - cumulative) / np.maximum(weight_light, 1)
+    variance = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    threshold = int(np.argmax(variance))
+    return gray <= threshold
+
+
+def _finder_runs(dark: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Scan every row for dark-light-dark-light-dark runs in 1:1:3:1:1 ratio
+
+    Returns:
+        (row, centre column, module size) of every match
+    """
+    height, width = dark.shape
+    change = np.ones_like(dark)
+    change[:, 1:] = dark[:, 1:] != dark[:, :-1]
+    rows, starts = np.nonzero(change)
+    ends = np.empty_like(starts)
+    ends[:-1] = starts[1:]
+    ends[-1] = width
+    row_end = np.ones(len(rows), dtype=bool)
+    row_end[:-1] = rows[1:] != rows[:-1]
+    ends[row_end] = width
+    lengths = (ends - starts).astype(np.float32)
+    colours = dark[rows, starts]
+
+    count = len(rows) - 4
+    if count <= 0:
+        empty = np.zeros(0)
+        return empty, empty, empty
+    windows = np.lib.stride_tricks.sliding_window_view(lengths, 5)
+    module = windows.sum(axis=1) / 7.0
+    deviation = np.abs(windows - module[:, None] * _FINDER_RATIOS)
+    match = (
+        (rows[:count] == rows[4:])
+        & colours[:count]
+        & np.all(deviation <= module[:, None] * _FINDER_TOLERANCE, axis=1)
+    )
+    centres = starts[2:count + 2] + lengths[2:count + 2] / 2.0
+    return rows[:count][match], centres[match], module[match]
+
+
+def find_finder_patterns(dark: np.ndarray) -> List[Tuple[float, float, float]]:
+    """
+    Locate finder patterns confirmed by both a horizontal and a vertical scan
+
+    Returns:
+        (x, y, module size) of every finder pattern candidate
+    """
+    h_rows, h_cols, h_modules = _finder_runs(dark)
+    v_cols, v_rows, v_modules = _finder_runs(dark.T)
+    if not len(h_rows) or not len(v_rows):
+        return []
+
+    # Group horizontal matches into vertical stripes through each pattern centre
+    order = np.lexsort((h_cols, h_rows))
+    clusters: List[List[float]] = []
+    open_clusters: List[List[float]] = []
+    for index in order:
+        y, x, module = float(h_rows[index]), float(h_cols[index]), float(h_modules[index])
+        open_clusters = [c for c in open_clusters if y - c[4] <= max(1.0, c[2] / c[3] / 2)]
+        for cluster in open_clusters:
+            if abs(x - cluster[0] / cluster[3]) <= cluster[2] / cluster[3]:
+                if cluster[4] != y:
+                    cluster[0] += x
+                    cluster[1] += y
+                    cluster[2] += module
+                    cluster[3] += 1
+                    cluster[4] = y
+                break
+        else:
+            cluster = [x, y, module, 1, y]
+            clusters.append(cluster)
+            open_clusters.append(cluster)
+
+    candidates = []
+    for sx, sy, sm, n, _ in clusters:
+        x, y, module = sx / n, sy / n, sm / n
+        # Rows through the 3-module core; tiny images may only give one row
+        if n < max(1.0, module * 1.5):
+            continue
+        near = (np.abs(v_cols - x) <= module) & (np.abs(v_rows - y) <= module * 1.5)
+        if near.any():
+            vy = float(v_rows[near].mean())
+            candidates.append((x, (y + vy) / 2, (module + float(v_modules[near].mean())) / 2))
+    return candidates
+
+
+def _pick_finders(candidates: List[Tuple[float, float, float]]):
+    """Choose the three patterns forming the code corners (top-left, top-right, bottom-left)"""
+    best, best_score = None, None
+    for triple in combinations(candidates[:20], 3):
+        modules = [c[2] for c in triple]
+        if max(modules) > 1.5 * min(modules):
+            continue
+        points = [np.array(c[:2]) for c in triple]
+        # The top-left corner is opposite the longest side
+        sides = [np.linalg.norm(points[(i + 1) % 3] - points[(i + 2) % 3]) for i in range(3)]
+        corner = int(np.argmax(sides))
+        a, b = [(corner + 1) % 3, (corner + 2) % 3]
+        va, vb = points[a] - points[corner], points[b] - points[corner]
+        la, lb = np.linalg.norm(va), np.linalg.norm(vb)
+        if min(la, lb) < 7 * min(modules):
+            continue
+        cosine = abs(float(va @ vb)) / (la * lb)
+        score = cosine + abs(la - lb) / max(la, lb)
+        if best_score is None or score < best_score:
+            if va[0] * vb[1] - va[1] * vb[0] < 0:
+                a, b = b, a
+            best, best_score = (triple[corner], triple[a], triple[b]), score
+    if best is None or best_score > 0.3:
+        raise QrDecodeError("No QR code finder patterns found")
+    return best
+
+
+def _sample(dark: np.ndarray, top_left, top_right, bottom_left, version: int) -> np.ndarray:
+    size = version * 4 + 17
+    origin = np.array(top_left[:2])
+    step_x = (np.array(top_right[:2]) - origin) / (size - 7)
+    step_y = (np.array(bottom_left[:2]) - origin) / (size - 7)
+    r, c = np.indices((size, size))
+    xs = origin[0] + (c - 3) * step_x[0] + (r - 3) * step_y[0]
+    ys = origin[1] + (c - 3) * step_x[1] + (r - 3) * step_y[1]
+    height, width = dark.shape
+    xi = np.clip(np.round(xs).astype(int), 0, width - 1)
+    yi = np.clip(np.round(ys).astype(int), 0, height - 1)
+    return dark[yi, xi]
+
+
+def decode_modules(modules: np.ndarray) -> str:
+    """
+    Decode a sampled module matrix (True = dark) into text
+
+    Raises:
+        QrDecodeError: If the matrix is not a readable QR code
+    """
+    size = modules.shape[0]
+    version = (size - 17) // 4
+    if size != version * 4 + 17 or not 1 <= version <= 40:
+        raise QrDecodeError(f"Invalid symbol size {size}")
+    level, mask = _read_format(modules)
+    codewords = _codewords(modules, version, mask)
+    data = _correct_codewords(codewords, version, level)
+    return _parse_segments(data, version)
+
+
+def decode(gray: np.ndarray) -> str:
+    """
+    Find and decode the QR code in a grayscale image
+
+    Args:
+        gray: uint8 array of shape (height, width)
+
+    Returns:
+        The decoded text
+
+    Raises:
+        QrDecodeError: If no readable QR code is found
+    """
+    dark = binarize(gray)
+    top_left, top_right, bottom_left = _pick_finders(find_finder_patterns(dark))
+
+    module = (top_left[2] + top_right[2] + bottom_left[2]) / 3
+    span = (np.hypot(top_right[0] - top_left[0], top_right[1] - top_left[1])
+            + np.hypot(bottom_left[0] - top_left[0], bottom_left[1] - top_left[1])) / 2
+    estimate = int(round((span / module + 7 - 17) / 4))
+
+    error: Optional[QrDecodeError] = None
+    for version in (estimate, estimate - 1, estimate + 1):
+        if not 1 <= version <= 40:
+            continue
+        try:
+            return decode_modules(_sample(dark, top_left, top_right, bottom_left, version))
+        except QrDecodeError as e:
+            error = error or e
+    raise error or QrDecodeError("Could not estimate the symbol version")
@@ -0,0 +1,122 @@
+"""Offline verification of QR code images against their code values"""
+
+import functools
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from .batch import scan_video_files
+from .png import PngError, read_png
+from .qrdecode import QrDecodeError, decode
+
+
+# Images written by download-all and bulk-create --download-images
+_IMAGE_NAME = re.compile(r"qr-(.+)\.png$", re.IGNORECASE)
+
+
+class VerifyResult(NamedTuple):
+    """Outcome of checking one image"""
+    path: str
+    code_value: Optional[str]
+    decoded: Optional[str]
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def expected_code(path: str) -> Optional[str]:
+    """Code value encoded in a qr-<codeValue>.png file name, if any"""
+    match = _IMAGE_NAME.match(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def matches_code(decoded: str, code_value: str, base_url: Optional[str] = None) -> bool:
+    """
+    Whether decoded QR content points at a code value
+
+    The server encodes '<BaseUrl>/play/<codeValue>', or the bare code value
+    when no BaseUrl is configured.
+    """
+    if base_url:
+        return decoded == f"{base_url.rstrip('/')}/play/{code_value}"
+    return decoded == code_value or decoded.endswith(f"/play/{code_value}")
+
+
+def verify_image(path: str, base_url: Optional[str] = None) -> VerifyResult:
+    """
+    Decode one image and compare it with the code value in its name
+
+    Runs in worker processes, so it never raises.
+
+    Args:
+        path: PNG file path
+        base_url: Exact URL prefix the content must use (default: any)
+
+    Returns:
+        VerifyResult; error is None when the image decodes to its code
+    """
+    code_value = expected_code(path)
+    try:
+        decoded = decode(read_png(path))
+    except (PngError, QrDecodeError, OSError, ValueError) as e:
+        return VerifyResult(path, code_value, None, f"Unreadable: {e}")
+
+    if code_value is not None and not matches_code(decoded, code_value, base_url):
+        return VerifyResult(path, code_value, decoded, f"Encodes {decoded!r}")
+    return VerifyResult(path, code_value, decoded, None)
+
+
+def verify_directory(
+    directory: str,
+    workers: Optional[int] = None,
+    base_url: Optional[str] = None,
+    pattern: str = "qr-*.png",
+    recursive: bool = False
+) -> Dict[str, List[VerifyResult]]:
+    """
+    Verify every QR image in a directory in a process pool
+
+    Args:
+        directory: Directory containing QR images
+        workers: Number of processes (default: CPU count)
+        base_url: Exact URL prefix the content must use (default: any)
+        pattern: File name pattern of images (default: qr-*.png)
+        recursive: Whether to search subdirectories (default: False)
+
+    Returns:
+        Dictionary with 'ok', 'mismatched' and 'unreadable' result lists
+    """
+    paths = [path for path, _ in scan_video_files(directory, [pattern], [], recursive)]
+    results: Dict[str, List[VerifyResult]] = {"ok": [], "mismatched": [], "unreadable": []}
+    print(f"Verifying {len(paths)} QR images...")
+
+    started = time.monotonic()
+    check = functools.partial(verify_image, base_url=base_url)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, min(64, len(paths) // ((workers or os.cpu_count() or 1) * 4)))
+        for idx, result in enumerate(executor.map(check, paths, chunksize=chunksize), 1):
+            if result.ok:
+                results["ok"].append(result)
+            elif result.decoded is None:
+                results["unreadable"].append(result)
+                print(f"✗ {os.path.basename(result.path)}: {result.error}")
+            else:
+                results["mismatched"].append(result)
+                print(f"✗ {os.path.basename(result.path)}: {result.error}")
+            if idx % 1000 == 0:
+                print(f"  {idx}/{len(paths)} checked")
+    elapsed = time.monotonic() - started
+
+    print(f"\n{'='*60}")
+    print(f"Verify Summary:")
+    print(f"  Verified: {len(results['ok'])}")
+    print(f"  Mismatched: {len(results['mismatched'])}")
+    print(f"  Unreadable: {len(results['unreadable'])}")
+    if paths and elapsed > 0:
+        print(f"  Rate: {len(paths) / elapsed * 60:.0f} images/minute")
+
+    return results
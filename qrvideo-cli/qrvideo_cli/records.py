@@ -0,0 +1,185 @@
+"""Compact slotted record types for API rows"""
+
+import re
+import sys
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# Fractional seconds; .NET writes 1 to 7 digits, fromisoformat before 3.11 takes only 3 or 6
+_FRACTION = re.compile(r"(:\d\d)\.(\d+)")
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse an API timestamp or a command-line date as an aware datetime
+
+    Values without a time zone are taken as UTC.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 date or timestamp
+    """
+    value = value.strip().replace('Z', '+00:00')
+    if '.' in value:
+        value = _FRACTION.sub(lambda m: f"{m.group(1)}.{m.group(2)[:6]:0<6}", value, count=1)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Share one copy of a string that repeats across rows"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class Record(Mapping):
+    """
+    Base of the record types
+
+    Records hold one API row in __slots__ instead of a dict. Values are kept
+    as received: timestamps stay ISO strings until read through their
+    datetime property, and strings that repeat across rows (titles, client
+    info, video IDs) are interned so all rows share one copy.
+
+    Records are read-only mappings keyed by the API's JSON field names, so
+    record['codeValue'] and record.get('description') keep working where a
+    dict used to be passed.
+    """
+
+    __slots__ = ()
+
+    #: JSON field names, in the order of the slots
+    _keys: Tuple[str, ...] = ()
+    _attrs: Dict[str, str] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._attrs = dict(zip(cls._keys, cls.__slots__))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build a record from a decoded JSON object"""
+        get = data.get
+        return cls(*[get(key) for key in cls._keys])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The row as the API's JSON object"""
+        return {key: getattr(self, attr) for key, attr in self._attrs.items()}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, self._attrs[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, attr) for attr in self.__slots__)
+
+
+class Video(Record):
+    """A video (VideoDto)"""
+
+    __slots__ = ('id', 'title', 'description', 'file_path', 'cover_path', 'duration',
+                 'content_type', 'file_size', 'is_active', 'created_at_raw')
+    _keys = ('id', 'title', 'description', 'filePath', 'coverPath', 'duration',
+             'contentType', 'fileSize', 'isActive', 'createdAt')
+
+    def __init__(self, id: str, title: str, description: Optional[str] = None, file_path: Optional[str] = None,
+                 cover_path: Optional[str] = None, duration: Optional[str] = None,
+                 content_type: Optional[str] = None, file_size: Optional[int] = None,
+                 is_active: bool = True, created_at_raw: Optional[str] = None):
+        self.id = id
+        self.title = _intern(title)
+        self.description = _intern(description)
+        self.file_path = file_path
+        self.cover_path = cover_path
+        self.duration = duration
+        self.content_type = _intern(content_type)
+        self.file_size = file_size
+        self.is_active = is_active
+        self.created_at_raw = created_at_raw
+
+    @property
+    def created_at(self) -> Optional[datetime]:
+        """Creation time, parsed on each access"""
+        return parse_timestamp(self.created_at_raw) if self.created_at_raw else None
+
+
+class QrCode(Record):
+    """A QR code (QrCodeDto)"""
+
+    __slots__ = ('id', 'code_value', 'video_id', 'video_title', 'is_active', 'created_at_raw', 'description')
+    _keys = ('id', 'codeValue', 'videoId', 'videoTitle', 'isActive', 'createdAt', 'description')
+
+    def __init__(self, id: str, code_value: str, video_id: str, video_title: Optional[str] = None,
+                 is_active: bool = True, created_at_raw: Optional[str] = None,
+                 description: Optional[str] = None):
+        self.id = id
+        self.code_value = code_value
+        self.video_id = _intern(video_id)
+        self.video_title = _intern(video_title)
+        self.is_active = is_active
+        self.created_at_raw = created_at_raw
+        self.description = _intern(description)
+
+    @property
+    def created_at(self) -> Optional[datetime]:
+        """Creation time, parsed on each access"""
+        return parse_timestamp(self.created_at_raw) if self.created_at_raw else None
+
+
+class ScanLog(Record):
+    """A scan log entry (ScanLogDto)"""
+
+    __slots__ = ('id', 'qr_code_id', 'code_value', 'timestamp_raw', 'success', 'fail_reason', 'client_info')
+    _keys = ('id', 'qrCodeId', 'codeValue', 'timestamp', 'success', 'failReason', 'clientInfo')
+
+    def __init__(self, id: str, qr_code_id: Optional[str], code_value: str, timestamp_raw: str,
+                 success: bool = True, fail_reason: Optional[str] = None, client_info: Optional[str] = None):
+        self.id = id
+        self.qr_code_id = _intern(qr_code_id)
+        self.code_value = _intern(code_value)
+        self.timestamp_raw = timestamp_raw
+        self.success = success
+        self.fail_reason = _intern(fail_reason)
+        self.client_info = _intern(client_info)
+
+    @property
+    def timestamp(self) -> datetime:
+        """Scan time, parsed on each access"""
+        return parse_timestamp(self.timestamp_raw)
+
+
+class PlayLog(Record):
+    """A play log entry (PlayLogDto)"""
+
+    __slots__ = ('id', 'video_id', 'video_title', 'timestamp_raw', 'watched_duration', 'completed', 'client_info')
+    _keys = ('id', 'videoId', 'videoTitle', 'timestamp', 'watchedDuration', 'completed', 'clientInfo')
+
+    def __init__(self, id: str, video_id: str, video_title: Optional[str], timestamp_raw: str,
+                 watched_duration: Optional[str] = None, completed: bool = False,
+                 client_info: Optional[str] = None):
+        self.id = id
+        self.video_id = _intern(video_id)
+        self.video_title = _intern(video_title)
+        self.timestamp_raw = timestamp_raw
+        self.watched_duration = _intern(watched_duration)
+        self.completed = completed
+        self.client_info = _intern(client_info)
+
+    @property
+    def timestamp(self) -> datetime:
+        """Play time, parsed on each access"""
+        return parse_timestamp(self.timestamp_raw)
@@ -0,0 +1,289 @@
+"""Streaming replication of videos and QR codes between two instances"""
+
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional
+
+import requests
+
+from .api import QRVideoClient
+from .paging import iter_all_items
+from .segmented import DEFAULT_CONNECTIONS, SegmentedReader, open_first_segment
+from .throttle import format_bytes
+
+
+class BoundedPipe:
+    """
+    Connect a streamed download to a streamed upload through a bounded buffer
+
+    A background thread reads the source response into a queue holding at
+    most max_chunks chunks; the upload side consumes it through read(n).
+    Download and upload overlap, and memory per transfer stays bounded.
+    """
+
+    def __init__(
+        self,
+        response: requests.Response,
+        client: Optional[QRVideoClient] = None,
+        chunk_size: int = 256 * 1024,
+        max_chunks: int = 16
+    ):
+        """
+        Args:
+            response: Source response opened with stream=True
+            client: Source client whose download budget applies
+            chunk_size: Bytes per buffered chunk (default: 256 KB)
+            max_chunks: Maximum buffered chunks (default: 16)
+        """
+        self._response = response
+        self._limiter = client.limiter if client else None
+        self._chunk_size = chunk_size
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_chunks)
+        self._current = memoryview(b"")
+        self._closed = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _put(self, item: Any) -> bool:
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for chunk in self._response.iter_content(chunk_size=self._chunk_size):
+                if self._limiter:
+                    self._limiter.throttle_download(len(chunk))
+                if not self._put(chunk):
+                    return
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._put(None)
+            self._response.close()
+
+    def read(self, size: int = -1) -> bytes:
+        """Return up to size buffered bytes, or b'' at the end of the source"""
+        if not self._current:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._queue.put(None)
+                if self._error:
+                    raise IOError(f"Source download failed: {self._error}")
+                return b""
+            self._current = memoryview(chunk)
+        if size is None or size < 0:
+            size = len(self._current)
+        block = self._current[:size].tobytes()
+        self._current = self._current[size:]
+        return block
+
+    def close(self):
+        """Stop the producer and release the source connection"""
+        self._closed.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join(timeout=5)
+
+
+def _spool(response: requests.Response, client: Optional[QRVideoClient] = None,
+           chunk_size: int = 256 * 1024) -> BinaryIO:
+    """
+    Download a response of unknown length into a temporary file
+
+    Returns:
+        Temporary file positioned at its start; deleted when closed
+    """
+    limiter = client.limiter if client else None
+    spool = tempfile.TemporaryFile()
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if limiter:
+                limiter.throttle_download(len(chunk))
+            spool.write(chunk)
+        spool.seek(0)
+        return spool
+    except BaseException:
+        spool.close()
+        raise
+    finally:
+        response.close()
+
+
+def _load_mapping(mapping_file: str) -> Dict[str, Dict[str, str]]:
+    mapping = {"videos": {}, "qrcodes": {}, "codeValues": {}}
+    if os.path.exists(mapping_file):
+        with open(mapping_file, 'r', encoding='utf-8') as f:
+            mapping.update(json.load(f))
+    return mapping
+
+
+def _save_mapping(mapping: Dict[str, Dict[str, str]], mapping_file: str):
+    tmp_file = mapping_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(mapping, f, indent=2)
+    os.replace(tmp_file, mapping_file)
+
+
+def replicate(
+    source: QRVideoClient,
+    target: QRVideoClient,
+    mapping_file: str = "replicate_map.json",
+    workers: int = 4,
+    search: Optional[str] = None,
+    buffer_chunks: int = 16,
+    connections: int = DEFAULT_CONNECTIONS
+) -> Dict[str, Any]:
+    """
+    Copy videos and their QR codes from one instance to another
+
+    Each video body is streamed from the source's static filePath straight
+    into the target's multipart upload, without a temporary file. When the
+    source honours Range, each body is downloaded as parallel segments that
+    are read back in order. A body sent without Content-Length is spooled
+    to a temporary file first, since the upload must declare its size.
+    Several transfers run at once. Videos already present in the mapping
+    file are skipped, so an interrupted run can be resumed.
+
+    Args:
+        source: Client for the instance to copy from
+        target: Client for the instance to copy to
+        mapping_file: JSON file of old-to-new IDs (default: replicate_map.json)
+        workers: Number of concurrent transfers (default: 4)
+        search: Only replicate videos matching this search term
+        buffer_chunks: Buffered 256 KB chunks per single-stream transfer (default: 16)
+        connections: Concurrent Range requests per video (default: 4)
+
+    Returns:
+        Dictionary with 'mapping' (the 'videos' and 'qrcodes' old-to-new IDs
+        and 'codeValues' old-to-new codes) and 'failed' (descriptions of the
+        videos and QR codes that could not be replicated)
+    """
+    mapping = _load_mapping(mapping_file)
+    lock = threading.Lock()
+    failed: List[str] = []
+    transferred = {"bytes": 0}
+    started = time.monotonic()
+
+    print("Fetching source catalogue...")
+    videos = [
+        video for video in iter_all_items(source.list_videos, search=search)
+        if video["id"] not in mapping["videos"]
+    ]
+    qrcodes_by_video: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for qr in iter_all_items(source.list_qrcodes):
+        if qr["id"] not in mapping["qrcodes"]:
+            qrcodes_by_video[qr["videoId"]].append(qr)
+
+    def replicate_qrcodes(old_video_id: str, new_video_id: str):
+        for qr in qrcodes_by_video.get(old_video_id, []):
+            created = target.create_qrcode(new_video_id, qr.get("description"), qr.get("isActive", True))
+            if created:
+                with lock:
+                    mapping["qrcodes"][qr["id"]] = created["id"]
+                    mapping["codeValues"][qr["codeValue"]] = created["codeValue"]
+            else:
+                with lock:
+                    failed.append(f"qrcode {qr['codeValue']}")
+
+    def replicate_video(video: Dict[str, Any]):
+        response = open_first_segment(source, video["filePath"])
+        if response is None:
+            with lock:
+                failed.append(f"video {video['title']} ({video['id']})")
+            return
+
+        if response.status_code == 206:
+            try:
+                pipe = SegmentedReader(source, video["filePath"], response, connections=connections)
+            except IOError as e:
+                print(f"✗ {video['title']}: {e}")
+                with lock:
+                    failed.append(f"video {video['title']} ({video['id']})")
+                return
+            size = pipe.size
+        elif response.headers.get("Content-Length"):
+            pipe = BoundedPipe(response, source, max_chunks=buffer_chunks)
+            size = int(response.headers["Content-Length"])
+        else:
+            try:
+                pipe = _spool(response, source)
+            except (OSError, requests.RequestException) as e:
+                print(f"✗ {video['title']}: Failed to download source file: {e}")
+                with lock:
+                    failed.append(f"video {video['title']} ({video['id']})")
+                return
+            size = pipe.seek(0, os.SEEK_END)
+            pipe.seek(0)
+        if size <= 0:
+            pipe.close()
+            print(f"✗ {video['title']}: Source file is empty")
+            with lock:
+                failed.append(f"video {video['title']} ({video['id']})")
+            return
+        try:
+            result = target.upload_video_stream(
+                title=video["title"],
+                source=pipe,
+                size=size,
+                file_name=os.path.basename(video["filePath"]),
+                description=video.get("description")
+            )
+        finally:
+            pipe.close()
+
+        if not result:
+            with lock:
+                failed.append(f"video {video['title']} ({video['id']})")
+            return
+
+        if not video.get("isActive", True):
+            target.update_video(result["id"], is_active=False)
+
+        replicate_qrcodes(video["id"], result["id"])
+        with lock:
+            mapping["videos"][video["id"]] = result["id"]
+            transferred["bytes"] += size
+            _save_mapping(mapping, mapping_file)
+            print(f"✓ {video['title']} ({format_bytes(size)}) -> {result['id']}")
+
+    print(f"Replicating {len(videos)} videos with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        list(executor.map(replicate_video, videos))
+
+    # QR codes added to videos that an earlier run already replicated
+    pending = {video["id"] for video in videos}
+    for old_video_id, new_video_id in list(mapping["videos"].items()):
+        if old_video_id not in pending:
+            replicate_qrcodes(old_video_id, new_video_id)
+
+    _save_mapping(mapping, mapping_file)
+
+    elapsed = time.monotonic() - started
+    print(f"\n{'='*60}")
+    print(f"Replication Summary:")
+    print(f"  Videos: {len(videos) - sum(f.startswith('video') for f in failed)}/{len(videos)}")
+    print(f"  QR Codes mapped: {len(mapping['qrcodes'])}")
+    print(f"  Transferred: {format_bytes(transferred['bytes'])} in {elapsed:.1f}s")
+    print(f"  ID mapping: {mapping_file}")
+
+    if failed:
+        print(f"\nFailed:")
+        for item in failed:
+            print(f"  - {item}")
+
+    return {"mapping": mapping, "failed": failed}
@@ -0,0 +1,311 @@
+"""Cached code resolution for kiosk integrations"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+
+from .api import QRVideoClient
+
+
+#: Default location of the persistent resolve cache
+DEFAULT_CACHE_PATH = Path.home() / '.qrvideo_cli' / 'resolve_cache.sqlite3'
+
+# Disk evictions run after this many writes
+_EVICT_EVERY = 256
+
+# (result or None for an unknown code, time.time() it was fetched)
+_Entry = Tuple[Optional[Dict[str, Any]], float]
+
+
+class ResolveUnavailable(Exception):
+    """The code is not cached and the server could not be reached"""
+
+
+class CodeResolver:
+    """
+    Resolves code values through a two-tier LRU cache with TTL
+
+    Lookups are answered from an in-memory LRU first, then from an on-disk
+    SQLite cache, and only then from the API:
+
+    - entries younger than ttl are returned directly;
+    - entries older than ttl but younger than stale_ttl are returned at once
+      while a background thread refreshes them (stale-while-revalidate);
+    - unknown codes are cached for negative_ttl;
+    - while the server is unreachable, any cached answer is returned
+      regardless of its age.
+
+    Concurrent misses for the same code share one request. Returned
+    dictionaries are shared with the cache and must not be modified.
+
+    Scans answered from the cache do not reach the server, so they are not
+    recorded in its scan logs.
+    """
+
+    def __init__(
+        self,
+        client: QRVideoClient,
+        ttl: float = 300.0,
+        stale_ttl: float = 86400.0,
+        negative_ttl: float = 30.0,
+        max_entries: int = 10000,
+        max_disk_entries: int = 100000,
+        cache_path: Optional[Union[str, Path]] = DEFAULT_CACHE_PATH,
+        refresh_workers: int = 2,
+        timeout: int = 5
+    ):
+        """
+        Args:
+            client: QRVideoClient for the API to resolve against
+            ttl: Seconds a resolution is fresh (default: 300)
+            stale_ttl: Seconds past ttl a resolution is still served while
+                it is refreshed in the background (default: 86400)
+            negative_ttl: Seconds an unknown code stays cached (default: 30)
+            max_entries: Entries kept in memory (default: 10000)
+            max_disk_entries: Entries kept on disk (default: 100000)
+            cache_path: SQLite file of the disk tier, or None for memory only
+            refresh_workers: Threads for background refreshes (default: 2)
+            timeout: Request timeout in seconds (default: 5)
+        """
+        self.client = client
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.timeout = timeout
+        self.stats = {"hits": 0, "stale_hits": 0, "disk_hits": 0, "misses": 0,
+                      "refreshes": 0, "outage_hits": 0, "errors": 0}
+
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers,
+                                             thread_name_prefix="resolve-refresh")
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        if cache_path is not None:
+            self._open_disk(Path(cache_path))
+
+    def _open_disk(self, path: Path):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS entries (api TEXT, code TEXT, result TEXT, "
+                       "fetched_at REAL, used_at REAL, PRIMARY KEY (api, code))")
+            db.execute("CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at)")
+            db.commit()
+            self._db = db
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠ Resolve cache on disk disabled: {e}")
+
+    def _disk_get(self, code_value: str) -> Optional[_Entry]:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            try:
+                row = self._db.execute("SELECT result, fetched_at FROM entries WHERE api = ? AND code = ?",
+                                       (self.client.base_url, code_value)).fetchone()
+                if row is None:
+                    return None
+                self._db.execute("UPDATE entries SET used_at = ? WHERE api = ? AND code = ?",
+                                 (time.time(), self.client.base_url, code_value))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠ Resolve cache read failed: {e}")
+                return None
+        result, fetched_at = row
+        return (json.loads(result) if result is not None else None), fetched_at
+
+    def _disk_put(self, code_value: str, entry: _Entry):
+        if self._db is None:
+            return
+        result, fetched_at = entry
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (api, code, result, fetched_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.client.base_url, code_value, json.dumps(result) if result is not None else None,
+                     fetched_at, time.time())
+                )
+                self._writes += 1
+                if self._writes % _EVICT_EVERY == 0:
+                    self._db.execute(
+                        "DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY used_at DESC "
+                        "LIMIT -1 OFFSET ?)", (self.max_disk_entries,)
+                    )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠ Resolve cache write failed: {e}")
+
+    def _remember(self, code_value: str, entry: _Entry):
+        """Store an entry in memory (caller holds the lock)"""
+        self._memory[code_value] = entry
+        self._memory.move_to_end(code_value)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _fetch(self, code_value: str) -> _Entry:
+        """Ask the API and store the answer in both tiers"""
+        result = self.client.resolve_code(code_value, timeout=self.timeout)
+        entry = (result, time.time())
+        with self._lock:
+            self._remember(code_value, entry)
+        self._disk_put(code_value, entry)
+        return entry
+
+    def _fetch_shared(self, code_value: str) -> _Entry:
+        """Fetch a code, sharing the request with concurrent callers"""
+        with self._lock:
+            future = self._pending.get(code_value)
+            owner = future is None
+            if owner:
+                future = self._pending[code_value] = Future()
+        if not owner:
+            return future.result()
+        try:
+            entry = self._fetch(code_value)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(code_value, None)
+
+    def _refresh(self, code_value: str):
+        try:
+            self._fetch_shared(code_value)
+            self.stats["refreshes"] += 1
+        except requests.RequestException:
+            self.stats["errors"] += 1
+
+    def resolve(self, code_value: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a code value
+
+        Args:
+            code_value: Code value encoded in the QR image
+
+        Returns:
+            Dictionary with qrCode and video, or None if the code does not
+            exist or is inactive
+
+        Raises:
+            ResolveUnavailable: If the code is not cached and the server
+                cannot be reached
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(code_value)
+            if entry is not None:
+                self._memory.move_to_end(code_value)
+                result, fetched_at = entry
+                if now - fetched_at < (self.ttl if result is not None else self.negative_ttl):
+                    self.stats["hits"] += 1
+                    return result
+        if entry is None:
+            entry = self._disk_get(code_value)
+            if entry is not None:
+                self.stats["disk_hits"] += 1
+                with self._lock:
+                    self._remember(code_value, entry)
+
+        if entry is not None:
+            result, fetched_at = entry
+            age = now - fetched_at
+            if age < (self.ttl if result is not None else self.negative_ttl):
+                self.stats["hits"] += 1
+                return result
+            if result is not None and age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                if code_value not in self._pending:
+                    self._refresher.submit(self._refresh, code_value)
+                return result
+
+        self.stats["misses"] += 1
+        try:
+            return self._fetch_shared(code_value)[0]
+        except requests.RequestException as e:
+            self.stats["errors"] += 1
+            if entry is not None:
+                self.stats["outage_hits"] += 1
+                return entry[0]
+            raise ResolveUnavailable(f"Cannot resolve {code_value}: {e}") from e
+
+    def invalidate(self, code_value: str):
+        """Forget a code in both tiers"""
+        with self._lock:
+            self._memory.pop(code_value, None)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM entries WHERE api = ? AND code = ?",
+                                 (self.client.base_url, code_value))
+                self._db.commit()
+
+    def clear(self):
+        """Forget every code in both tiers"""
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM entries WHERE api = ?", (self.client.base_url,))
+                self._db.commit()
+
+    def close(self):
+        """Stop background refreshes and close the disk cache"""
+        self._refresher.shutdown(wait=True)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "CodeResolver":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_resolvers: Dict[str, CodeResolver] = {}
+_resolvers_lock = threading.Lock()
+
+
+def resolve_code(code_value: str, api_url: str = "https://mzfmedia.cn/api", **options: Any) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a code value through a process-wide cached resolver
+
+    One CodeResolver is kept per API URL; options are passed to it the first
+    time that URL is used.
+
+    Args:
+        code_value: Code value encoded in the QR image
+        api_url: Base URL of the API
+        **options: CodeResolver settings such as ttl or cache_path
+
+    Returns:
+        Dictionary with qrCode and video, or None for an unknown or inactive code
+
+    Raises:
+        ResolveUnavailable: If the code is not cached and the server cannot be reached
+    """
+    key = api_url.rstrip('/')
+    resolver = _resolvers.get(key)
+    if resolver is None:
+        with _resolvers_lock:
+            resolver = _resolvers.get(key)
+            if resolver is None:
+                resolver = _resolvers[key] = CodeResolver(QRVideoClient(key), **options)
+    return resolver.resolve(code_value)
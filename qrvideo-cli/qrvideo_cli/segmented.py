@@ -0,0 +1,325 @@
+"""Segmented parallel HTTP Range downloads for video files"""
+
+import hashlib
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Optional, Tuple
+
+import requests
+
+from .api import QRVideoClient
+
+
+DEFAULT_SEGMENT_SIZE = 8 * 1024 * 1024
+DEFAULT_CONNECTIONS = 4
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+)")
+
+
+class RangeNotSupported(Exception):
+    """The server answered a Range request with the whole file"""
+
+
+def parse_content_range(response: requests.Response) -> Optional[Tuple[int, int, int]]:
+    """
+    Parse the Content-Range header of a 206 response
+
+    Returns:
+        (first byte, last byte, total size), or None if absent or unparseable
+    """
+    match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+
+def open_first_segment(
+    client: QRVideoClient,
+    file_path: str,
+    segment_size: int = DEFAULT_SEGMENT_SIZE
+) -> Optional[requests.Response]:
+    """
+    Request the first segment of a file
+
+    The answer tells whether segmented download is possible: 206 with a
+    Content-Range carries the total size, 200 means Range was ignored and the
+    response is the whole file.
+
+    Returns:
+        Streaming response (200 or 206) or None on error
+    """
+    return client.open_file(file_path, headers={"Range": f"bytes=0-{segment_size - 1}"})
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int):
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _fetch_range(
+    client: QRVideoClient,
+    file_path: str,
+    start: int,
+    end: int,
+    sink: Callable[[int, bytes], None],
+    response: Optional[requests.Response] = None,
+    retries: int = 3
+):
+    """
+    Fetch bytes start..end (inclusive), passing each chunk to sink(offset, chunk)
+
+    An interrupted transfer is resumed from the last received byte.
+
+    Raises:
+        RangeNotSupported: If the server sends the whole file instead
+        IOError: If the range cannot be fetched within the retry budget
+    """
+    offset = start
+    last_error: Any = None
+
+    for _ in range(retries + 1):
+        if response is None:
+            response = client.open_file(file_path, headers={"Range": f"bytes={offset}-{end}"})
+        if response is None:
+            last_error = "request failed"
+            continue
+        if response.status_code != 206:
+            response.close()
+            raise RangeNotSupported(file_path)
+
+        content_range = parse_content_range(response)
+        if content_range is None or content_range[0] != offset:
+            response.close()
+            raise IOError(f"Unexpected Content-Range for bytes {offset}-{end}: "
+                          f"{response.headers.get('Content-Range')}")
+
+        try:
+            for chunk in client._iter_body(response):
+                if offset + len(chunk) > end + 1:
+                    raise IOError(f"Server sent more than bytes {start}-{end}")
+                sink(offset, chunk)
+                offset += len(chunk)
+        except requests.RequestException as e:
+            last_error = e
+        response = None
+
+        if offset > end:
+            return
+
+    raise IOError(f"Failed to fetch bytes {start}-{end} of {file_path}: {last_error}")
+
+
+def _hash_file(path: str, digest: Any):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+
+
+def download_segmented(
+    client: QRVideoClient,
+    file_path: str,
+    output_path: str,
+    connections: int = DEFAULT_CONNECTIONS,
+    segment_size: int = DEFAULT_SEGMENT_SIZE,
+    expected_size: Optional[int] = None,
+    expected_sha256: Optional[str] = None,
+    digest: Optional[Any] = None
+) -> Optional[int]:
+    """
+    Download a static file over several concurrent Range requests
+
+    The file is split into segment_size byte ranges fetched by up to
+    connections threads, each written in place into a preallocated file with
+    os.pwrite. When the server ignores Range (or os.pwrite is unavailable)
+    the file is downloaded as a single stream instead.
+
+    Args:
+        client: QRVideoClient instance
+        file_path: filePath from the API, or an absolute URL
+        output_path: Destination file path
+        connections: Maximum concurrent requests (default: 4)
+        segment_size: Bytes per Range request (default: 8 MB)
+        expected_size: Size the file must have (e.g. the video's fileSize)
+        expected_sha256: SHA-256 hex digest the file must have
+        digest: Optional hashlib object updated with the file content
+
+    Returns:
+        Number of bytes written or None on error (including a failed check)
+    """
+    response = open_first_segment(client, file_path, segment_size)
+    if response is None:
+        return None
+
+    sha256 = hashlib.sha256() if expected_sha256 else None
+
+    if response.status_code == 200:
+        # Range ignored: the response already is the whole file
+        try:
+            written = client._save_stream(response, output_path)
+        except Exception as e:
+            print(f"Error downloading file: {e}")
+            return None
+    elif not hasattr(os, 'pwrite'):
+        response.close()
+        written = client.download_file(file_path, output_path)
+    else:
+        written = _download_ranges(client, file_path, output_path, response,
+                                   connections, segment_size)
+    if written is None:
+        return None
+
+    if expected_size is not None and written != expected_size:
+        print(f"✗ Size mismatch for {file_path}: expected {expected_size}, got {written}")
+        return None
+
+    if digest is not None or sha256 is not None:
+        for target in (digest, sha256):
+            if target is not None:
+                _hash_file(output_path, target)
+        if sha256 is not None and sha256.hexdigest() != expected_sha256:
+            print(f"✗ Checksum mismatch for {file_path}")
+            return None
+
+    return written
+
+
+def _download_ranges(
+    client: QRVideoClient,
+    file_path: str,
+    output_path: str,
+    first: requests.Response,
+    connections: int,
+    segment_size: int
+) -> Optional[int]:
+    content_range = parse_content_range(first)
+    if content_range is None:
+        first.close()
+        print(f"✗ Missing Content-Range for {file_path}")
+        return None
+    total = content_range[2]
+
+    segments = [(start, min(start + segment_size, total) - 1)
+                for start in range(0, total, segment_size)]
+    if not segments:
+        first.close()
+        open(output_path, 'wb').close()
+        return 0
+
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        if hasattr(os, 'posix_fallocate') and total:
+            try:
+                os.posix_fallocate(fd, 0, total)
+            except OSError:
+                os.ftruncate(fd, total)
+        else:
+            os.ftruncate(fd, total)
+
+        def sink(offset: int, chunk: bytes):
+            _pwrite_all(fd, chunk, offset)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(connections, len(segments)))) as executor:
+            start, end = segments[0]
+            futures = [executor.submit(_fetch_range, client, file_path, start, end, sink, first)]
+            futures += [executor.submit(_fetch_range, client, file_path, start, end, sink)
+                        for start, end in segments[1:]]
+            errors = [f.exception() for f in futures]
+    finally:
+        os.close(fd)
+
+    if any(isinstance(e, RangeNotSupported) for e in errors):
+        # Some server in front of the files stopped honouring Range midway
+        return client.download_file(file_path, output_path)
+
+    error = next((e for e in errors if e is not None), None)
+    if error is not None:
+        print(f"Error downloading file: {error}")
+        return None
+
+    return total
+
+
+class SegmentedReader:
+    """
+    Sequential file-like view of a file fetched with parallel Range requests
+
+    Up to `connections` segments are downloaded ahead into memory while the
+    consumer reads, so a streamed upload sees one ordered body but the
+    download uses several connections. Memory is bounded by
+    connections * segment_size.
+    """
+
+    def __init__(
+        self,
+        client: QRVideoClient,
+        file_path: str,
+        first: requests.Response,
+        connections: int = DEFAULT_CONNECTIONS,
+        segment_size: int = DEFAULT_SEGMENT_SIZE
+    ):
+        """
+        Args:
+            client: QRVideoClient instance
+            file_path: filePath from the API, or an absolute URL
+            first: 206 response for the first segment (see open_first_segment)
+            connections: Segments fetched ahead (default: 4)
+            segment_size: Bytes per Range request (default: 8 MB)
+        """
+        content_range = parse_content_range(first)
+        if content_range is None:
+            first.close()
+            raise IOError(f"Missing Content-Range for {file_path}")
+
+        self.size = content_range[2]
+        self._client = client
+        self._file_path = file_path
+        self._segment_size = segment_size
+        self._next_start = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(1, connections))
+        self._pending: Deque[Future] = deque()
+        self._current = memoryview(b"")
+
+        self._schedule(first)
+        while len(self._pending) < connections and self._next_start < self.size:
+            self._schedule()
+
+    def _schedule(self, response: Optional[requests.Response] = None):
+        start = self._next_start
+        end = min(start + self._segment_size, self.size) - 1
+        self._next_start = end + 1
+        self._pending.append(self._executor.submit(self._fetch, start, end, response))
+
+    def _fetch(self, start: int, end: int, response: Optional[requests.Response]) -> bytes:
+        buffer = bytearray(end - start + 1)
+
+        def sink(offset: int, chunk: bytes):
+            buffer[offset - start:offset - start + len(chunk)] = chunk
+
+        _fetch_range(self._client, self._file_path, start, end, sink, response)
+        return bytes(buffer)
+
+    def read(self, size: int = -1) -> bytes:
+        """Return up to size bytes, or b'' at the end of the file"""
+        if not self._current:
+            if not self._pending:
+                return b""
+            self._current = memoryview(self._pending.popleft().result())
+            if self._next_start < self.size:
+                self._schedule()
+        if size is None or size < 0:
+            size = len(self._current)
+        block = self._current[:size].tobytes()
+        self._current = self._current[size:]
+        return block
+
+    def close(self):
+        """Cancel outstanding segments"""
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,462 @@
+"""Printable sheets of labelled QR code images"""
+
+import csv
+import functools
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .png import PngError, read_png, write_png
+
+
+#: Paper sizes in millimetres (width, height)
+PAPER_SIZES = {
+    "a4": (210.0, 297.0),
+    "a3": (297.0, 420.0),
+    "letter": (215.9, 279.4),
+}
+
+# Classic 5x8 column font for ASCII 0x20-0x7E, least significant bit at the top
+_FONT_HEX = (
+    "0000000000" "00005f0000" "0007000700" "147f147f14" "242a7f2a12"
+    "2313086462" "3649562050" "0008070300" "001c224100" "0041221c00"
+    "2a1c7f1c2a" "08083e0808" "0080703000" "0808080808" "0000606000"
+    "2010080402" "3e5149453e" "00427f4000" "7249494946" "2141494d33"
+    "1814127f10" "2745454539" "3c4a494931" "4121110907" "3649494936"
+    "464949291e" "0000140000" "0040340000" "0008142241" "1414141414"
+    "0041221408" "0201590906" "3e415d594e" "7c1211127c" "7f49494936"
+    "3e41414122" "7f4141413e" "7f49494941" "7f09090901" "3e41415173"
+    "7f0808087f" "00417f4100" "2040413f01" "7f08142241" "7f40404040"
+    "7f021c027f" "7f0408107f" "3e4141413e" "7f09090906" "3e4151215e"
+    "7f09192946" "2649494932" "03017f0103" "3f4040403f" "1f2040201f"
+    "3f4038403f" "6314081463" "0304780403" "6159494d43" "007f414141"
+    "0204081020" "004141417f" "0402010204" "4040404040" "0003070800"
+    "2054547840" "7f28444438" "3844444428" "384444287f" "3854545418"
+    "00087e0902" "18a4a49c78" "7f08040478" "00447d4000" "2040403d00"
+    "7f10284400" "00417f4000" "7c04780478" "7c08040478" "3844444438"
+    "fc18242418" "18242418fc" "7c08040408" "4854545424" "04043f4424"
+    "3c4040207c" "1c2040201c" "3c4030403c" "4428102844" "4c9090907c"
+    "4464544c44" "0008364100" "0000770000" "0041360800" "0201020402"
+)
+
+GLYPH_WIDTH = 5
+GLYPH_HEIGHT = 8
+
+# Label text size and spacing around tiles, in millimetres
+_LABEL_HEIGHT_MM = 2.2
+_CELL_PADDING_MM = 1.5
+
+# Approximate advance widths used to fit PDF labels, in ems
+_LATIN_ADVANCE = 0.56
+_CJK_ADVANCE = 1.0
+
+
+def _font_atlas() -> np.ndarray:
+    columns = np.frombuffer(bytes.fromhex(_FONT_HEX), dtype=np.uint8).reshape(-1, GLYPH_WIDTH)
+    bits = np.unpackbits(columns[:, :, None], axis=2, bitorder="little")
+    # (glyph, column, row) -> (glyph, row, column)
+    return bits.transpose(0, 2, 1).astype(bool)
+
+
+_ATLAS = _font_atlas()
+
+
+def render_text(text: str, scale: int = 1) -> np.ndarray:
+    """
+    Rasterise ASCII text with the built-in bitmap font
+
+    Characters outside printable ASCII are drawn as '?'.
+
+    Args:
+        text: Text to draw
+        scale: Integer magnification of the 5x8 glyphs
+
+    Returns:
+        bool array of shape (8 * scale, 6 * len(text) * scale); True is ink
+    """
+    codes = np.frombuffer(text.encode("ascii", errors="replace"), dtype=np.uint8).astype(np.int32) - 0x20
+    codes[(codes < 0) | (codes >= len(_ATLAS))] = ord("?") - 0x20
+    glyphs = np.zeros((len(codes), GLYPH_HEIGHT, GLYPH_WIDTH + 1), dtype=bool)
+    glyphs[:, :, :GLYPH_WIDTH] = _ATLAS[codes]
+    line = glyphs.transpose(1, 0, 2).reshape(GLYPH_HEIGHT, -1)
+    return np.repeat(np.repeat(line, scale, axis=0), scale, axis=1)
+
+
+class SheetLayout(NamedTuple):
+    """Pixel geometry of one sheet page"""
+    dpi: int
+    width: int
+    height: int
+    columns: int
+    rows: int
+    margin: int
+    cell_width: int
+    cell_height: int
+    tile: int
+    padding: int
+    font_scale: int
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+    def cell_origin(self, index: int) -> Tuple[int, int]:
+        """Top-left pixel (x, y) of a cell, filled row by row"""
+        row, column = divmod(index, self.columns)
+        return self.margin + column * self.cell_width, self.margin + row * self.cell_height
+
+
+def make_layout(
+    paper: str = "a4",
+    dpi: int = 300,
+    grid: Tuple[int, int] = (4, 6),
+    margin_mm: float = 10.0
+) -> SheetLayout:
+    """
+    Compute the page geometry for a paper size, resolution and grid
+
+    Args:
+        paper: Key of PAPER_SIZES
+        dpi: Output resolution
+        grid: (columns, rows) of codes per page
+        margin_mm: Page margin in millimetres
+
+    Returns:
+        SheetLayout
+
+    Raises:
+        ValueError: If the paper is unknown or the cells are too small
+    """
+    if paper not in PAPER_SIZES:
+        raise ValueError(f"Unknown paper size '{paper}' (choose from {', '.join(PAPER_SIZES)})")
+    columns, rows = grid
+    if columns < 1 or rows < 1:
+        raise ValueError("Grid needs at least one column and one row")
+
+    def px(mm: float) -> int:
+        return int(round(mm * dpi / 25.4))
+
+    width, height = (px(mm) for mm in PAPER_SIZES[paper])
+    margin = px(margin_mm)
+    cell_width = (width - 2 * margin) // columns
+    cell_height = (height - 2 * margin) // rows
+    padding = px(_CELL_PADDING_MM)
+    font_scale = max(1, px(_LABEL_HEIGHT_MM) // GLYPH_HEIGHT)
+    label_height = 2 * (GLYPH_HEIGHT + 2) * font_scale
+    tile = min(cell_width - 2 * padding, cell_height - 2 * padding - label_height)
+
+    # A version 1 code with its quiet zone is 29 modules; keep at least 2 px each
+    if tile < 58:
+        raise ValueError(f"A {columns}x{rows} grid leaves only {max(tile, 0)} px per code "
+                         f"at {dpi} DPI; use fewer cells or a higher DPI")
+    return SheetLayout(dpi, width, height, columns, rows, margin,
+                       cell_width, cell_height, tile, padding, font_scale)
+
+
+def parse_grid(value: str) -> Tuple[int, int]:
+    """Parse a 'COLUMNSxROWS' grid specification such as '4x6'"""
+    try:
+        columns, rows = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid grid '{value}' (expected e.g. 4x6)")
+    return columns, rows
+
+
+@functools.lru_cache(maxsize=16)
+def _scale_index(source: int, target: int) -> np.ndarray:
+    """Nearest-neighbour source index for every target pixel"""
+    return (np.arange(target) * source // target).astype(np.intp)
+
+
+def _fit_text(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 2)] + ".."
+
+
+def _blit(ink: np.ndarray, patch: np.ndarray, x: int, y: int):
+    """OR a bool patch into the page, clipped to the page edges"""
+    height = min(patch.shape[0], ink.shape[0] - y)
+    width = min(patch.shape[1], ink.shape[1] - x)
+    if height > 0 and width > 0:
+        ink[y:y + height, x:x + width] |= patch[:height, :width]
+
+
+def _pdf_text_width(text: str, size: float) -> float:
+    return sum(_LATIN_ADVANCE if ord(ch) < 0x80 else _CJK_ADVANCE for ch in text) * size
+
+
+def _pdf_fit_text(text: str, size: float, width: float) -> str:
+    if _pdf_text_width(text, size) <= width:
+        return text
+    while text and _pdf_text_width(text + "..", size) > width:
+        text = text[:-1]
+    return text + ".."
+
+
+def _pdf_string(text: str) -> Tuple[str, str]:
+    """Return (font resource, PDF string operand) for a label"""
+    if all(0x20 <= ord(ch) < 0x7F for ch in text):
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        return "/F1", f"({escaped})"
+    # UniGB-UCS2-H takes big-endian UCS-2 code units
+    units = "".join(ch if ord(ch) <= 0xFFFF else "?" for ch in text)
+    return "/F2", f"<{units.encode('utf-16-be').hex()}>"
+
+
+def render_page(
+    layout: SheetLayout,
+    cells: List[Tuple[str, str, str]],
+    text_labels: bool = True
+) -> Tuple[np.ndarray, List[Tuple[float, float, float, str]], List[str]]:
+    """
+    Compose one page from QR images
+
+    Args:
+        layout: Page geometry
+        cells: (image path, title, code value) per cell, in reading order
+        text_labels: Draw labels into the bitmap; if False they are returned
+            as (x, y, font size, text) placements in PDF points instead
+
+    Returns:
+        (ink, placements, unreadable): bool page bitmap with True for black,
+        PDF label placements (empty when text_labels is True) and the code
+        values whose image could not be read; their cells stay blank
+    """
+    ink = np.zeros((layout.height, layout.width), dtype=bool)
+    placements: List[Tuple[float, float, float, str]] = []
+    unreadable: List[str] = []
+    line_height = (GLYPH_HEIGHT + 2) * layout.font_scale
+    point = 72.0 / layout.dpi
+
+    for index, (image_path, title, code) in enumerate(cells):
+        x, y = layout.cell_origin(index)
+        try:
+            gray = read_png(image_path)
+        except (PngError, OSError):
+            unreadable.append(code)
+            continue
+        rows = _scale_index(gray.shape[0], layout.tile)
+        columns = _scale_index(gray.shape[1], layout.tile)
+        tile_x = x + (layout.cell_width - layout.tile) // 2
+        tile_y = y + layout.padding
+        ink[tile_y:tile_y + layout.tile, tile_x:tile_x + layout.tile] = gray[np.ix_(rows, columns)] < 128
+
+        label_y = tile_y + layout.tile + layout.font_scale
+        usable = layout.cell_width - 2 * layout.padding
+        for line, text in enumerate((title, code)):
+            if not text:
+                continue
+            top = label_y + line * line_height
+            if text_labels:
+                bitmap = render_text(_fit_text(text, usable // ((GLYPH_WIDTH + 1) * layout.font_scale)),
+                                     layout.font_scale)
+                _blit(ink, bitmap, x + (layout.cell_width - bitmap.shape[1]) // 2, top)
+            else:
+                size = GLYPH_HEIGHT * layout.font_scale * point
+                text = _pdf_fit_text(text, size, usable * point)
+                left = (x + layout.cell_width / 2) * point - _pdf_text_width(text, size) / 2
+                baseline = (layout.height - top - GLYPH_HEIGHT * layout.font_scale) * point
+                placements.append((left, baseline, size, text))
+
+    return ink, placements, unreadable
+
+
+def _write_png_page(
+    layout: SheetLayout,
+    cells: List[Tuple[str, str, str]],
+    output_path: str
+) -> Tuple[str, List[str]]:
+    """Worker: render a page, save it as a 1-bit PNG and return (path, unreadable codes)"""
+    ink, _, unreadable = render_page(layout, cells)
+    write_png(output_path, ~ink, dpi=layout.dpi)
+    return output_path, unreadable
+
+
+def _pdf_page(layout: SheetLayout, cells: List[Tuple[str, str, str]]) -> Tuple[bytes, bytes, List[str]]:
+    """Worker: render a page and return its compressed image, content stream and unreadable codes"""
+    ink, placements, unreadable = render_page(layout, cells, text_labels=False)
+    image = zlib.compress(np.packbits(~ink, axis=1).tobytes(), 6)
+
+    point = 72.0 / layout.dpi
+    ops = [f"q {layout.width * point:.2f} 0 0 {layout.height * point:.2f} 0 0 cm /Im1 Do Q"]
+    for left, baseline, size, text in placements:
+        font, operand = _pdf_string(text)
+        ops.append(f"BT {font} {size:.2f} Tf {left:.2f} {baseline:.2f} Td {operand} Tj ET")
+    return image, "\n".join(ops).encode("latin-1"), unreadable
+
+
+class _PdfWriter:
+    """Streams PDF objects to a file and records their offsets for the xref table"""
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets: Dict[int, int] = {}
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def obj(self, number: int, body: bytes, stream: Optional[bytes] = None):
+        self.offsets[number] = self.f.tell()
+        self.f.write(f"{number} 0 obj\n".encode() + body)
+        if stream is not None:
+            self.f.write(b"\nstream\n" + stream + b"\nendstream")
+        self.f.write(b"\nendobj\n")
+
+    def close(self, root: int):
+        size = max(self.offsets) + 1
+        xref = self.f.tell()
+        self.f.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for number in range(1, size):
+            self.f.write(f"{self.offsets.get(number, 0):010d} 00000 n \n".encode())
+        self.f.write(f"trailer\n<< /Size {size} /Root {root} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+# Object numbers of the fixed part of the document; pages start after these
+_CATALOG, _PAGES, _HELVETICA, _SONG, _SONG_CID, _SONG_DESCRIPTOR = range(1, 7)
+
+
+def _write_pdf(path: str, layout: SheetLayout, pages: Iterable[Tuple[bytes, bytes, List[str]]]) -> int:
+    """Write rendered pages into one PDF document and return the page count"""
+    point = 72.0 / layout.dpi
+    media_box = f"[0 0 {layout.width * point:.2f} {layout.height * point:.2f}]"
+    page_numbers = []
+
+    with open(path, 'wb') as f:
+        pdf = _PdfWriter(f)
+        pdf.obj(_CATALOG, f"<< /Type /Catalog /Pages {_PAGES} 0 R >>".encode())
+        pdf.obj(_HELVETICA, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                            b"/Encoding /WinAnsiEncoding >>")
+        # Predefined CJK font for non-ASCII titles; viewers supply the glyphs
+        pdf.obj(_SONG, f"<< /Type /Font /Subtype /Type0 /BaseFont /STSong-Light /Encoding /UniGB-UCS2-H "
+                       f"/DescendantFonts [{_SONG_CID} 0 R] >>".encode())
+        pdf.obj(_SONG_CID, f"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /STSong-Light "
+                           f"/CIDSystemInfo << /Registry (Adobe) /Ordering (GB1) /Supplement 2 >> "
+                           f"/FontDescriptor {_SONG_DESCRIPTOR} 0 R /DW 1000 /W [1 95 500] >>".encode())
+        pdf.obj(_SONG_DESCRIPTOR, b"<< /Type /FontDescriptor /FontName /STSong-Light /Flags 6 "
+                                  b"/FontBBox [-25 -254 1000 880] /ItalicAngle 0 /Ascent 880 "
+                                  b"/Descent -120 /CapHeight 880 /StemV 93 >>")
+
+        number = _SONG_DESCRIPTOR + 1
+        for image, content, _ in pages:
+            page, contents, xobject = number, number + 1, number + 2
+            number += 3
+            pdf.obj(page, (f"<< /Type /Page /Parent {_PAGES} 0 R /MediaBox {media_box} "
+                           f"/Contents {contents} 0 R /Resources << /XObject << /Im1 {xobject} 0 R >> "
+                           f"/Font << /F1 {_HELVETICA} 0 R /F2 {_SONG} 0 R >> >> >>").encode())
+            pdf.obj(contents, f"<< /Length {len(content)} >>".encode(), content)
+            pdf.obj(xobject, (f"<< /Type /XObject /Subtype /Image /Width {layout.width} "
+                              f"/Height {layout.height} /ColorSpace /DeviceGray /BitsPerComponent 1 "
+                              f"/Filter /FlateDecode /Length {len(image)} >>").encode(), image)
+            page_numbers.append(page)
+
+        kids = " ".join(f"{n} 0 R" for n in page_numbers)
+        pdf.obj(_PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode())
+        pdf.close(_CATALOG)
+
+    return len(page_numbers)
+
+
+def read_label_csv(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (code value, video title) pairs from a 'qrcodes export' CSV file
+
+    Args:
+        path: CSV file with codeValue and videoTitle columns
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if row.get('codeValue'):
+                yield row['codeValue'], row.get('videoTitle') or ''
+
+
+def compose_sheets(
+    labels: Iterable[Tuple[str, str]],
+    image_dir: str,
+    output: str,
+    fmt: str = "pdf",
+    layout: Optional[SheetLayout] = None,
+    workers: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Tile labelled QR code images onto printable pages
+
+    Images are the qr-<codeValue>.png files written by 'qrcodes download-all'.
+    Pages are composed in a process pool with array blits: every tile is
+    scaled by nearest-neighbour index arrays and labels come from a bitmap
+    font, except in PDF output where they are real text so that non-ASCII
+    titles print correctly. Pages are 1-bit, which keeps files small.
+
+    Args:
+        labels: (code value, video title) pairs in print order
+        image_dir: Directory containing the QR images
+        output: PDF file, or directory for PNG pages
+        fmt: 'pdf' or 'png' (default: pdf)
+        layout: Page geometry (default: A4, 300 DPI, 4x6 grid)
+        workers: Number of processes (default: CPU count)
+
+    Returns:
+        Dictionary with pages, placed, missing and unreadable counts
+    """
+    layout = layout or make_layout()
+    cells = []
+    missing = 0
+    unreadable: List[str] = []
+    for code, title in labels:
+        image_path = os.path.join(image_dir, f"qr-{code}.png")
+        if os.path.exists(image_path):
+            cells.append((image_path, title, code))
+        else:
+            missing += 1
+            print(f"⚠ No image for {code} (run 'qrcodes download-all' first)")
+
+    chunks = [cells[i:i + layout.per_page] for i in range(0, len(cells), layout.per_page)]
+    print(f"Composing {len(cells)} codes onto {len(chunks)} pages "
+          f"({layout.columns}x{layout.rows}, {layout.dpi} DPI)...")
+
+    started = time.monotonic()
+    pages = 0
+    if chunks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            if fmt == "pdf":
+                parent = os.path.dirname(output)
+                if parent:
+                    os.makedirs(parent, exist_ok=True)
+                rendered = executor.map(functools.partial(_pdf_page, layout), chunks)
+                pages = _write_pdf(output, layout, _progress(rendered, len(chunks), unreadable))
+            else:
+                os.makedirs(output, exist_ok=True)
+                paths = [os.path.join(output, f"sheet-{n:04d}.png") for n in range(1, len(chunks) + 1)]
+                rendered = executor.map(functools.partial(_write_png_page, layout), chunks, paths)
+                pages = sum(1 for _ in _progress(rendered, len(chunks), unreadable))
+    elapsed = time.monotonic() - started
+
+    print(f"\n{'='*60}")
+    print(f"Sheets Summary:")
+    print(f"  Pages: {pages}")
+    print(f"  Codes placed: {len(cells) - len(unreadable)}")
+    print(f"  Missing images: {missing}")
+    print(f"  Unreadable images: {len(unreadable)}")
+    if pages and elapsed > 0:
+        print(f"  Rate: {pages / elapsed * 60:.0f} pages/minute")
+    print(f"  Output: {output}")
+
+    return {
+        "pages": pages,
+        "placed": len(cells) - len(unreadable),
+        "missing": missing,
+        "unreadable": len(unreadable)
+    }
+
+
+def _progress(results: Iterable[tuple], total: int, unreadable: List[str]) -> Iterator[tuple]:
+    """Pass rendered pages through, reporting progress and collecting unreadable codes"""
+    for done, result in enumerate(results, 1):
+        for code in result[-1]:
+            print(f"✗ Unreadable image for {code}, cell left blank")
+        unreadable.extend(result[-1])
+        if done % 50 == 0 or done == total:
+            print(f"  {done}/{total} pages")
+        yield result
@@ -0,0 +1,128 @@
+"""Live statistics monitoring for QR Video CLI"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, NamedTuple, Optional, Tuple
+
+from .api import QRVideoClient
+
+
+class SummaryCache:
+    """
+    TTL cache in front of get_stats_summary
+
+    Readers within the TTL share the last summary. When it expires, one
+    caller refreshes it while concurrent callers wait for that result instead
+    of sending their own request. Failed refreshes back off exponentially
+    (up to max_backoff seconds) instead of being retried on every read.
+    """
+
+    def __init__(self, client: QRVideoClient, ttl: float = 5.0, max_backoff: float = 60.0):
+        """
+        Args:
+            client: QRVideoClient instance
+            ttl: Seconds a fetched summary stays fresh (default: 5)
+            max_backoff: Longest wait between retries after failures (default: 60)
+        """
+        self.client = client
+        self.ttl = ttl
+        self.max_backoff = max(ttl, max_backoff)
+        self.requests = 0
+        self.failures = 0
+        self._value: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Return the summary and the monotonic time it was fetched
+
+        Returns:
+            (summary, fetched_at); the summary is the last good one if a refresh fails
+        """
+        with self._lock:
+            now = time.monotonic()
+            expired = self._value is None or now - self._fetched_at >= self.ttl
+            if expired and now >= self._retry_at:
+                self.requests += 1
+                summary = self.client.get_stats_summary()
+                if summary:
+                    self._value = summary
+                    self._fetched_at = time.monotonic()
+                    self.failures = 0
+                else:
+                    self.failures += 1
+                    backoff = min(self.ttl * 2 ** (self.failures - 1), self.max_backoff)
+                    self._retry_at = time.monotonic() + backoff
+            return self._value, self._fetched_at
+
+
+class StatsSample(NamedTuple):
+    """One summary observation"""
+    at: float
+    scans: int
+    plays: int
+
+
+class StatsMonitor:
+    """
+    Client-side scan/play rate computation over a ring buffer of samples
+
+    Rates are derived from deltas of the cumulative counters, so the server
+    only ever has to answer the cheap summary query.
+    """
+
+    def __init__(self, cache: SummaryCache, window: int = 12):
+        """
+        Args:
+            cache: SummaryCache to read summaries from
+            window: Number of samples kept for moving averages (default: 12)
+        """
+        self.cache = cache
+        self.samples: Deque[StatsSample] = deque(maxlen=max(2, window))
+        self.summary: Optional[Dict[str, Any]] = None
+
+    def poll(self) -> bool:
+        """
+        Read the (possibly cached) summary and record it if it is new
+
+        Returns:
+            True if a new sample was added
+        """
+        summary, fetched_at = self.cache.get()
+        if not summary:
+            return False
+
+        self.summary = summary
+        if self.samples and self.samples[-1].at == fetched_at:
+            return False
+
+        self.samples.append(StatsSample(fetched_at, summary['scanCount'], summary['playCount']))
+        return True
+
+    @staticmethod
+    def _rate(first: StatsSample, last: StatsSample) -> Tuple[float, float]:
+        elapsed = last.at - first.at
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return (last.scans - first.scans) / elapsed, (last.plays - first.plays) / elapsed
+
+    def current_rates(self) -> Optional[Tuple[float, float]]:
+        """(scans/sec, plays/sec) between the last two samples"""
+        if len(self.samples) < 2:
+            return None
+        return self._rate(self.samples[-2], self.samples[-1])
+
+    def average_rates(self) -> Optional[Tuple[float, float]]:
+        """(scans/sec, plays/sec) averaged across the whole window"""
+        if len(self.samples) < 2:
+            return None
+        return self._rate(self.samples[0], self.samples[-1])
+
+    def age(self) -> float:
+        """Seconds since the newest sample was fetched"""
+        if not self.samples:
+            return 0.0
+        return time.monotonic() - self.samples[-1].at
@@ -0,0 +1,267 @@
+"""Buffered, batched play telemetry for playback devices"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Iterable, NamedTuple, Optional, Union
+
+import requests
+
+from .api import QRVideoClient
+
+
+#: Default file events are spilled to while the server is unreachable
+DEFAULT_SPOOL_PATH = Path.home() / '.qrvideo_cli' / 'telemetry_spool.jsonl'
+
+
+class PlayEvent(NamedTuple):
+    """One play report waiting to be sent"""
+    video_id: str
+    watched_seconds: Optional[float]
+    completed: bool
+    at: float
+
+    def to_json(self) -> str:
+        return json.dumps({"videoId": self.video_id, "watchedDurationSeconds": self.watched_seconds,
+                           "completed": self.completed, "at": self.at})
+
+    @classmethod
+    def from_json(cls, line: str) -> "PlayEvent":
+        data = json.loads(line)
+        return cls(data["videoId"], data.get("watchedDurationSeconds"), bool(data.get("completed")),
+                   data.get("at", 0.0))
+
+
+class TelemetryReporter:
+    """
+    Queues play reports and sends them from a background thread
+
+    record_play() only appends to a bounded ring buffer, so playback never
+    waits on the network. A flusher thread drains the buffer in batches of
+    batch_size, or every flush_interval seconds. The API takes one play per
+    request, so a batch is sent as back-to-back requests.
+
+    Transient failures are retried with exponential backoff. When the server
+    stays unreachable, the reporter goes offline and appends events to an
+    append-only spool file. Each later flush probes the server with one
+    event, and once it answers, the spool is replayed. Delivery is
+    at-least-once: a crash during replay can resend part of the spool. The
+    server timestamps plays on arrival, so replayed plays carry the replay
+    time.
+
+    If the buffer is full, the oldest event is overwritten and counted as
+    dropped.
+    """
+
+    def __init__(
+        self,
+        client: QRVideoClient,
+        capacity: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 5.0,
+        spool_path: Optional[Union[str, Path]] = DEFAULT_SPOOL_PATH,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        timeout: int = 5
+    ):
+        """
+        Args:
+            client: QRVideoClient for the API to report to
+            capacity: Events held in memory before the oldest is dropped (default: 10000)
+            batch_size: Events that trigger a flush (default: 100)
+            flush_interval: Longest seconds between flushes (default: 5)
+            spool_path: Append-only file for undeliverable events, or None to drop them
+            max_retries: Retries per event while online (default: 3)
+            retry_backoff: First retry delay in seconds, doubled per retry (default: 0.5)
+            timeout: Request timeout in seconds (default: 5)
+        """
+        self.client = client
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = Path(spool_path) if spool_path is not None else None
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.online = True
+        self.stats = {"recorded": 0, "sent": 0, "dropped": 0, "retried": 0,
+                      "rejected": 0, "spooled": 0, "replayed": 0}
+
+        self._buffer: Deque[PlayEvent] = deque()
+        self._in_flight = 0
+        self._flush_requested = False
+        self._replay_error: Optional[str] = None
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+        self._thread.start()
+
+    def record_play(self, video_id: str, watched_seconds: Optional[float] = None, completed: bool = False) -> bool:
+        """
+        Queue a play report without blocking
+
+        Args:
+            video_id: Video GUID
+            watched_seconds: Seconds watched, if known
+            completed: Whether the video was watched to the end
+
+        Returns:
+            False if the reporter is closed, True otherwise
+        """
+        event = PlayEvent(video_id, watched_seconds, completed, time.time())
+        with self._cond:
+            if self._closing:
+                return False
+            if len(self._buffer) >= self.capacity:
+                self._buffer.popleft()
+                self.stats["dropped"] += 1
+            self._buffer.append(event)
+            self.stats["recorded"] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send (or spool) everything queued so far
+
+        Args:
+            timeout: Longest seconds to wait (default: no limit)
+
+        Returns:
+            True if the buffer was drained within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._buffer or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush queued events and stop the background thread"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def __enter__(self) -> "TelemetryReporter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            with self._cond:
+                while (not self._closing and not self._flush_requested
+                       and len(self._buffer) < self.batch_size):
+                    remaining = next_flush - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                self._in_flight = len(batch)
+                if not self._buffer:
+                    self._flush_requested = False
+                closing = self._closing and not self._buffer
+
+            next_flush = time.monotonic() + self.flush_interval
+            try:
+                # While offline the batch itself probes the server, or the spool does
+                if not batch or self._deliver(batch):
+                    self._replay_spool()
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+            if closing:
+                return
+
+    def _send(self, event: PlayEvent, retries: int) -> Optional[bool]:
+        """Send one event; None means the server could not be reached"""
+        for attempt in range(retries + 1):
+            try:
+                accepted = self.client.record_play(event.video_id, event.watched_seconds,
+                                                   event.completed, timeout=self.timeout)
+            except requests.RequestException:
+                if attempt < retries:
+                    self.stats["retried"] += 1
+                    time.sleep(self.retry_backoff * 2 ** attempt)
+                continue
+            if accepted:
+                self.stats["sent"] += 1
+            else:
+                self.stats["rejected"] += 1
+            return accepted
+        return None
+
+    def _deliver(self, events: Iterable[PlayEvent]) -> bool:
+        """Send events in order, spooling the rest once the server is unreachable"""
+        events = iter(events)
+        for event in events:
+            # While offline the first event is a single-attempt probe
+            if self._send(event, self.max_retries if self.online else 0) is None:
+                self.online = False
+                self._spool([event])
+                self._spool(events)
+                return False
+            self.online = True
+        return True
+
+    def _spool(self, events: Iterable[PlayEvent]):
+        events = list(events)
+        if self.spool_path is None:
+            self.stats["dropped"] += len(events)
+            return
+        try:
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                f.writelines(event.to_json() + "\n" for event in events)
+                f.flush()
+                os.fsync(f.fileno())
+            self.stats["spooled"] += len(events)
+        except OSError as e:
+            print(f"⚠ Failed to spool {len(events)} play events: {e}")
+            self.stats["dropped"] += len(events)
+
+    def _replay_spool(self):
+        """Resend spooled events; whatever cannot be sent goes back to the spool"""
+        if self.spool_path is None:
+            return
+        replaying = self.spool_path.with_name(self.spool_path.name + ".replaying")
+        sent_before = self.stats["sent"] + self.stats["rejected"]
+        try:
+            if not replaying.exists():
+                if not self.spool_path.exists():
+                    return
+                os.replace(self.spool_path, replaying)
+
+            with open(replaying, 'r', encoding='utf-8') as f:
+                self._deliver(self._read_spool(f))
+            os.remove(replaying)
+            self._replay_error = None
+        except OSError as e:
+            # Keep the flusher alive; the spool is retried on the next flush
+            if str(e) != self._replay_error:
+                print(f"⚠ Failed to replay spooled play events: {e}")
+            self._replay_error = str(e)
+        finally:
+            self.stats["replayed"] += self.stats["sent"] + self.stats["rejected"] - sent_before
+
+    def _read_spool(self, lines: Iterable[str]) -> Iterable[PlayEvent]:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield PlayEvent.from_json(line)
+            except (ValueError, KeyError):
+                self.stats["dropped"] += 1
@@ -0,0 +1,158 @@
+"""Bandwidth limiting and throughput accounting for QR Video CLI"""
+
+import re
+import threading
+import time
+from collections import deque
+from typing import Optional, Deque, Tuple
+
+
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_bandwidth(value: str) -> float:
+    """
+    Parse a bandwidth value such as '50M' into bytes per second
+
+    Suffixes K, M and G are binary multiples of bytes (like curl --limit-rate).
+
+    Args:
+        value: Bandwidth string, e.g. '512K', '50M', '1.5G' or '100000'
+
+    Returns:
+        Bytes per second
+
+    Raises:
+        ValueError: If the value cannot be parsed or is not positive
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*", value, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid bandwidth: {value}")
+
+    rate = float(match.group(1)) * _UNITS[match.group(2).upper()]
+    if rate <= 0:
+        raise ValueError(f"Bandwidth must be positive: {value}")
+    return rate
+
+
+def format_bytes(num_bytes: float) -> str:
+    """Format a byte count as a human readable string"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket measured in bytes
+
+    Callers reserve bytes up front and sleep off any deficit outside the lock,
+    so concurrent workers share the rate fairly and large chunks never starve.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rate: Sustained rate in bytes per second
+            burst: Bucket capacity in bytes (default: one second of rate)
+        """
+        self.rate = rate
+        self.capacity = burst if burst is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: int) -> float:
+        """
+        Take tokens for a transfer and return how long the caller must wait
+
+        Async callers can pass the result to asyncio.sleep().
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def consume(self, amount: int):
+        """Block until the given number of bytes may be transferred"""
+        delay = self.reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ThroughputMeter:
+    """Sliding-window byte counter for live throughput readouts"""
+
+    def __init__(self, window: float = 5.0):
+        self.window = window
+        self.total = 0
+        self._samples: Deque[Tuple[float, int]] = deque()
+        self._window_bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, amount: int):
+        """Account for transferred bytes"""
+        now = time.monotonic()
+        with self._lock:
+            self.total += amount
+            self._samples.append((now, amount))
+            self._window_bytes += amount
+            self._expire(now)
+
+    def rate(self) -> float:
+        """Bytes per second over the sliding window"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if not self._samples:
+                return 0.0
+            span = max(now - self._samples[0][0], 1.0)
+            return self._window_bytes / span
+
+    def _expire(self, now: float):
+        while self._samples and now - self._samples[0][0] > self.window:
+            _, amount = self._samples.popleft()
+            self._window_bytes -= amount
+
+
+class BandwidthLimiter:
+    """
+    Shared upload/download budgets for all workers using a client
+
+    Either budget may be None, in which case transfers in that direction are
+    only metered. One instance is meant to be shared by every thread or task.
+    """
+
+    def __init__(self, upload_rate: Optional[float] = None, download_rate: Optional[float] = None):
+        """
+        Args:
+            upload_rate: Upload limit in bytes per second (None for unlimited)
+            download_rate: Download limit in bytes per second (None for unlimited)
+        """
+        self.upload_bucket = TokenBucket(upload_rate) if upload_rate else None
+        self.download_bucket = TokenBucket(download_rate) if download_rate else None
+        self.upload_meter = ThroughputMeter()
+        self.download_meter = ThroughputMeter()
+
+    def throttle_upload(self, amount: int):
+        """Account for and, if limited, pace outgoing bytes"""
+        self.upload_meter.record(amount)
+        if self.upload_bucket:
+            self.upload_bucket.consume(amount)
+
+    def throttle_download(self, amount: int):
+        """Account for and, if limited, pace incoming bytes"""
+        self.download_meter.record(amount)
+        if self.download_bucket:
+            self.download_bucket.consume(amount)
+
+    def readout(self) -> str:
+        """Current throughput, e.g. '↑ 4.2 MB/s ↓ 0.0 B/s'"""
+        return (f"↑ {format_bytes(self.upload_meter.rate())}/s "
+                f"↓ {format_bytes(self.download_meter.rate())}/s")
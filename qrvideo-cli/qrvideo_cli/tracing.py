@@ -0,0 +1,167 @@
+"""Chrome trace-event timelines of batch jobs"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from requests.adapters import HTTPAdapter
+
+
+class Tracer:
+    """
+    Collects spans and writes them in the Chrome trace-event format
+
+    Every span is a complete ("X") event on the track of the thread that
+    recorded it, so nested spans (a file read inside an HTTP request inside
+    an upload) stack up under each other, and gaps on a track are time the
+    thread spent idle. Work running in other processes is recorded as async
+    spans from submission to completion. The file opens in chrome://tracing
+    and in the Perfetto UI.
+    """
+
+    def __init__(self):
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._tids: Dict[int, int] = {}
+        self._async_ids = itertools.count(1)
+        self._pid = os.getpid()
+        self._origin = time.perf_counter()
+
+    def _now(self) -> float:
+        """Microseconds since the tracer was created"""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _tid(self) -> int:
+        """Track of the current thread, named after it on first use"""
+        ident = threading.get_ident()
+        tid = self._tids.get(ident)
+        if tid is None:
+            with self._lock:
+                tid = self._tids.setdefault(ident, len(self._tids) + 1)
+                self._events.append({"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid,
+                                     "args": {"name": threading.current_thread().name}})
+        return tid
+
+    @contextmanager
+    def span(self, name: str, cat: str, **args) -> Iterator[Dict[str, Any]]:
+        """
+        Record the enclosed block as a span on the current thread's track
+
+        Yields the span's args dictionary, so results known only at the end
+        (status codes, byte counts) can be added to it.
+        """
+        tid = self._tid()
+        start = self._now()
+        try:
+            yield args
+        except BaseException as e:
+            args['error'] = type(e).__name__
+            raise
+        finally:
+            event = {"ph": "X", "name": name, "cat": cat, "ts": start, "dur": self._now() - start,
+                     "pid": self._pid, "tid": tid}
+            if args:
+                event['args'] = args
+            with self._lock:
+                self._events.append(event)
+
+    def begin_async(self, name: str, cat: str, **args) -> int:
+        """Start a span that ends on another thread; returns its ID for end_async"""
+        span_id = next(self._async_ids)
+        event = {"ph": "b", "name": name, "cat": cat, "id": span_id, "ts": self._now(),
+                 "pid": self._pid, "tid": self._tid()}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+        return span_id
+
+    def end_async(self, span_id: int, name: str, cat: str, **args):
+        """End a span started with begin_async"""
+        event = {"ph": "e", "name": name, "cat": cat, "id": span_id, "ts": self._now(),
+                 "pid": self._pid, "tid": self._tid()}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+
+    def reader(self, source: BinaryIO, name: str) -> "_TracedReader":
+        """Wrap a file so every read is recorded as a span"""
+        return _TracedReader(self, source, name)
+
+    @property
+    def event_count(self) -> int:
+        """Number of events recorded so far"""
+        return len(self._events)
+
+    def save(self, path: str):
+        """Write the trace as JSON"""
+        with self._lock:
+            events = list(self._events)
+        events.insert(0, {"ph": "M", "name": "process_name", "pid": self._pid,
+                          "args": {"name": "qrvideo"}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, separators=(',', ':'))
+
+
+def span(tracer: Optional[Tracer], name: str, cat: str, **args):
+    """tracer.span(), or a block that records nothing when tracer is None"""
+    if tracer is None:
+        return nullcontext(args)
+    return tracer.span(name, cat, **args)
+
+
+class _TracedReader:
+    """File wrapper recording one span per read"""
+
+    def __init__(self, tracer: Tracer, source: BinaryIO, name: str):
+        self._tracer = tracer
+        self._source = source
+        self._name = name
+
+    def read(self, size: int = -1) -> bytes:
+        with self._tracer.span("read", "io", file=self._name) as args:
+            block = self._source.read(size)
+            args['bytes'] = len(block)
+        return block
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._source, name)
+
+
+class TracingAdapter(HTTPAdapter):
+    """
+    HTTP adapter recording new connections as spans
+
+    Each new pooled connection gets a "connect" span, which contains a
+    "dns+tcp" span for name resolution and the TCP handshake; the rest of
+    the connect span is the TLS handshake. Requests reusing a kept-alive
+    connection show no connect span at all.
+    """
+
+    def __init__(self, tracer: Tracer, **kwargs):
+        self.tracer = tracer
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        tracer = self.tracer
+        traced = {}
+        for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items():
+            conn_cls = pool_cls.ConnectionCls
+
+            class TracedConnection(conn_cls):
+                def connect(self):
+                    with tracer.span("connect", "net", host=f"{self.host}:{self.port}"):
+                        return super().connect()
+
+                def _new_conn(self):
+                    with tracer.span("dns+tcp", "net"):
+                        return super()._new_conn()
+
+            traced[scheme] = type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": TracedConnection})
+        self.poolmanager.pool_classes_by_scheme = traced
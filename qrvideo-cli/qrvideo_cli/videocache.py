@@ -0,0 +1,551 @@
+"""Size-bounded local video cache and Range server for kiosks"""
+
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+from urllib.parse import unquote, urlsplit
+
+from .api import QRVideoClient
+from .paging import iter_all_items
+from .resolver import CodeResolver, ResolveUnavailable
+from .segmented import DEFAULT_CONNECTIONS, download_segmented
+from .throttle import format_bytes
+
+
+#: Default directory of the video cache
+DEFAULT_CACHE_DIR = Path.home() / '.qrvideo_cli' / 'video_cache'
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+EVICTION_POLICIES = ('lru', 'lfu')
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class CachedVideo(NamedTuple):
+    """A video file held in the cache"""
+    video_id: str
+    sha256: str
+    path: str
+    size: int
+    content_type: str
+    title: str
+    hits: int
+    used_at: float
+
+
+class VideoCache:
+    """
+    Content-addressed store of video files under a byte budget
+
+    Entries are keyed by video ID and the SHA-256 of the file. A cached file
+    is only used for a video whose filePath and fileSize still match the
+    ones it was downloaded for, so a replaced video is fetched again. Files
+    are stored once per hash under objects/, like backup snapshots, and
+    videos sharing content share the file.
+
+    When adding a file would exceed max_bytes, files no video points at are
+    removed first, then the least recently played (lru) or least often
+    played (lfu) ones.
+    """
+
+    def __init__(
+        self,
+        client: QRVideoClient,
+        cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        policy: str = 'lru',
+        connections: int = DEFAULT_CONNECTIONS
+    ):
+        """
+        Args:
+            client: QRVideoClient for the API the videos come from
+            cache_dir: Directory of the cache (default: ~/.qrvideo_cli/video_cache)
+            max_bytes: Byte budget for cached files (default: 10 GB)
+            policy: Eviction order, 'lru' or 'lfu' (default: lru)
+            connections: Range requests per download (default: 4)
+        """
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.client = client
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.connections = connections
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._pinned: Set[str] = set()
+        self._reserved = 0
+        self._fetcher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="video-cache-fetch")
+
+        self._tmp_dir = self.cache_dir / 'tmp'
+        # Partial downloads of an earlier run are useless
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        self._tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        self._db = sqlite3.connect(str(self.cache_dir / 'index.sqlite3'), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS videos (api TEXT, video_id TEXT, sha256 TEXT, "
+                         "file_path TEXT, file_size INTEGER, content_type TEXT, title TEXT, "
+                         "PRIMARY KEY (api, video_id))")
+        self._db.execute("CREATE TABLE IF NOT EXISTS blobs (sha256 TEXT PRIMARY KEY, path TEXT, "
+                         "size INTEGER, hits INTEGER, used_at REAL, added_at REAL)")
+        self._db.commit()
+
+    # Index
+
+    def _row(self, video_id: str) -> Optional[CachedVideo]:
+        """Cached entry of a video (caller holds the lock)"""
+        row = self._db.execute(
+            "SELECT v.video_id, v.sha256, b.path, b.size, v.content_type, v.title, b.hits, b.used_at "
+            "FROM videos v JOIN blobs b ON b.sha256 = v.sha256 WHERE v.api = ? AND v.video_id = ?",
+            (self.client.base_url, video_id)
+        ).fetchone()
+        if row is None:
+            return None
+        return CachedVideo(row[0], row[1], str(self.cache_dir / row[2]), *row[3:])
+
+    def lookup(self, video_id: str, video: Optional[Dict[str, Any]] = None) -> Optional[CachedVideo]:
+        """
+        Find a cached video
+
+        Args:
+            video_id: Video GUID
+            video: Current video data from the API; when given, the entry is
+                only returned if it was cached for the same filePath and fileSize
+
+        Returns:
+            CachedVideo or None if not cached (or outdated)
+        """
+        with self._lock:
+            entry = self._row(video_id)
+            if entry is None:
+                return None
+            if video is not None:
+                file_path, file_size = self._db.execute(
+                    "SELECT file_path, file_size FROM videos WHERE api = ? AND video_id = ?",
+                    (self.client.base_url, video_id)
+                ).fetchone()
+                if file_path != video.get('filePath') or (video.get('fileSize') and file_size != video['fileSize']):
+                    return None
+            if not os.path.exists(entry.path):
+                self._forget_blob(entry.sha256)
+                self._db.commit()
+                return None
+        return entry
+
+    def touch(self, sha256: str):
+        """Count a play of a cached file"""
+        with self._lock:
+            self._db.execute("UPDATE blobs SET hits = hits + 1, used_at = ? WHERE sha256 = ?",
+                             (time.time(), sha256))
+            self._db.commit()
+
+    def entries(self) -> List[CachedVideo]:
+        """Cached videos of this API, most recently played first"""
+        with self._lock:
+            ids = [row[0] for row in self._db.execute(
+                "SELECT v.video_id FROM videos v JOIN blobs b ON b.sha256 = v.sha256 "
+                "WHERE v.api = ? ORDER BY b.used_at DESC", (self.client.base_url,))]
+            return [entry for entry in map(self._row, ids) if entry is not None]
+
+    def used_bytes(self) -> int:
+        """Bytes taken by cached files"""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    # Eviction
+
+    def _forget_blob(self, sha256: str):
+        """Delete a file and every entry pointing at it (caller holds the lock)"""
+        row = self._db.execute("SELECT path FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        if row is not None:
+            try:
+                os.remove(self.cache_dir / row[0])
+            except FileNotFoundError:
+                pass
+        self._db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+        self._db.execute("DELETE FROM videos WHERE sha256 = ?", (sha256,))
+
+    def _make_room(self, size: int) -> bool:
+        """Evict until size more bytes fit in the budget (caller holds the lock)"""
+        used = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0] + self._reserved
+        order = "used_at" if self.policy == 'lru' else "hits, used_at"
+        while used + size > self.max_bytes:
+            # Files no video points at go first
+            victims = self._db.execute(
+                f"SELECT sha256, size FROM blobs ORDER BY "
+                f"sha256 IN (SELECT sha256 FROM videos), {order}"
+            ).fetchall()
+            victim = next(((sha, blob_size) for sha, blob_size in victims if sha not in self._pinned), None)
+            if victim is None:
+                return False
+            self._forget_blob(victim[0])
+            used -= victim[1]
+        self._db.commit()
+        return True
+
+    # Fetching
+
+    def fetch(self, video: Dict[str, Any]) -> Optional[CachedVideo]:
+        """
+        Return a video from the cache, downloading it first if needed
+
+        Concurrent calls for the same video share one download.
+
+        Args:
+            video: Video data from the API (id, filePath and fileSize)
+
+        Returns:
+            CachedVideo or None if the download failed or the file does not
+            fit in the budget
+        """
+        entry = self.lookup(video['id'], video)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            future = self._pending.get(video['id'])
+            owner = future is None
+            if owner:
+                future = self._pending[video['id']] = Future()
+        if not owner:
+            return future.result()
+        try:
+            entry = self._download(video)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(video['id'], None)
+
+    def fetch_in_background(self, video: Dict[str, Any]):
+        """Start caching a video unless it is cached or already being fetched"""
+        if video['id'] not in self._pending:
+            self._fetcher.submit(self.fetch, video)
+
+    def _download(self, video: Dict[str, Any]) -> Optional[CachedVideo]:
+        expected_size = video.get('fileSize') or None
+        if expected_size and expected_size > self.max_bytes:
+            print(f"⚠ {video.get('title', video['id'])} ({format_bytes(expected_size)}) "
+                  f"does not fit in the cache")
+            return None
+
+        reserved = expected_size or 0
+        with self._lock:
+            if not self._make_room(reserved):
+                print(f"⚠ No room to cache {video.get('title', video['id'])}")
+                return None
+            self._reserved += reserved
+
+        tmp_path = self._tmp_dir / f"{video['id']}.part"
+        try:
+            digest = hashlib.sha256()
+            written = download_segmented(self.client, video['filePath'], str(tmp_path),
+                                         connections=self.connections, expected_size=expected_size,
+                                         digest=digest)
+            if written is None:
+                return None
+            sha256 = digest.hexdigest()
+            ext = os.path.splitext(urlsplit(video['filePath']).path)[1].lower()
+            relative = f"objects/{sha256[:2]}/{sha256}{ext}"
+            target = self.cache_dir / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+            with self._lock:
+                self._reserved -= reserved
+                reserved = 0
+                known = self._db.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+                if known is None and not self._make_room(written):
+                    print(f"⚠ No room to cache {video.get('title', video['id'])}")
+                    return None
+                if known is None or not target.exists():
+                    os.replace(tmp_path, target)
+                now = time.time()
+                self._db.execute("INSERT OR IGNORE INTO blobs (sha256, path, size, hits, used_at, added_at) "
+                                 "VALUES (?, ?, ?, 0, ?, ?)", (sha256, relative, written, now, now))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO videos (api, video_id, sha256, file_path, file_size, "
+                    "content_type, title) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.client.base_url, video['id'], sha256, video['filePath'], written,
+                     video.get('contentType') or 'application/octet-stream', video.get('title', ''))
+                )
+                self._db.commit()
+                return self._row(video['id'])
+        finally:
+            if reserved:
+                with self._lock:
+                    self._reserved -= reserved
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    def prefetch_popular(
+        self,
+        max_plays: int = 100000,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Download the most played videos that fit in the budget
+
+        Videos are ranked by plays over the max_plays most recent play logs
+        and fetched most played first. A video that does not fit next to the
+        more popular ones is skipped; those are never evicted to make room.
+
+        Args:
+            max_plays: Number of most recent plays to count
+            limit: Most videos to consider (default: all played videos)
+            page_size: Items per list request (default: tuned automatically)
+
+        Returns:
+            Dictionary with cached, downloaded, skipped and failed counts
+        """
+        print(f"Counting the last {max_plays} plays...")
+        plays: Counter = Counter()
+        logs = iter_all_items(self.client.list_play_logs, page_size)
+        try:
+            for idx, log in enumerate(logs, 1):
+                plays[log['videoId']] += 1
+                if idx >= max_plays:
+                    break
+        finally:
+            logs.close()
+
+        videos = {video['id']: video for video in iter_all_items(self.client.list_videos, page_size)
+                  if video.get('isActive', True) and video.get('filePath')}
+        ranked = [videos[video_id] for video_id, _ in plays.most_common() if video_id in videos]
+        if limit is not None:
+            ranked = ranked[:limit]
+
+        print(f"Prefetching up to {len(ranked)} videos into a {format_bytes(self.max_bytes)} cache "
+              f"({self.policy})...")
+        results = {"cached": 0, "downloaded": 0, "skipped": 0, "failed": 0, "bytes": 0}
+        planned = 0
+        started = time.monotonic()
+        try:
+            for video in ranked:
+                size = video.get('fileSize') or 0
+                if planned + size > self.max_bytes:
+                    results["skipped"] += 1
+                    continue
+                planned += size
+                entry = self.lookup(video['id'], video)
+                if entry is not None:
+                    results["cached"] += 1
+                else:
+                    entry = self.fetch(video)
+                    if entry is None:
+                        results["failed"] += 1
+                        print(f"✗ {video['title']}")
+                        continue
+                    results["downloaded"] += 1
+                    results["bytes"] += entry.size
+                    print(f"✓ {video['title']} ({format_bytes(entry.size)}, {plays[video['id']]} plays)")
+                # Keep what is planned from being evicted by less popular videos
+                with self._lock:
+                    self._pinned.add(entry.sha256)
+        finally:
+            with self._lock:
+                self._pinned.clear()
+        elapsed = time.monotonic() - started
+
+        print(f"\n{'='*60}")
+        print(f"Prefetch Summary:")
+        print(f"  Already cached: {results['cached']}")
+        print(f"  Downloaded: {results['downloaded']} ({format_bytes(results['bytes'])})")
+        print(f"  Skipped (over budget): {results['skipped']}")
+        print(f"  Failed: {results['failed']}")
+        print(f"  Cache size: {format_bytes(self.used_bytes())} of {format_bytes(self.max_bytes)}")
+        print(f"  Time: {elapsed:.1f}s")
+        return results
+
+    def close(self):
+        """Wait for background downloads and close the index"""
+        self._fetcher.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "VideoCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header
+
+    Args:
+        header: Range header value, or None
+        size: Size of the file
+
+    Returns:
+        (first byte, last byte), or None to send the whole file (no header,
+        multiple ranges or a malformed header)
+
+    Raises:
+        ValueError: If the range lies outside the file
+    """
+    match = _RANGE.match((header or "").replace(" ", ""))
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+class _CacheRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "qrvideo-cache"
+    server: "CacheServer"
+
+    def do_GET(self):
+        self._handle(head=False)
+
+    def do_HEAD(self):
+        self._handle(head=True)
+
+    def _handle(self, head: bool):
+        parts = urlsplit(self.path).path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] not in ('videos', 'codes'):
+            self.send_error(404)
+            return
+        cache = self.server.cache
+        key = unquote(parts[1])
+
+        if parts[0] == 'videos':
+            entry = cache.lookup(key)
+            if entry is None:
+                self.send_error(404, "Video not cached")
+                return
+        else:
+            try:
+                result = self.server.resolver.resolve(key)
+            except ResolveUnavailable:
+                self.send_error(503, "Code not cached and the server is unreachable")
+                return
+            if result is None or not result.get('video'):
+                self.send_error(404, "Unknown or inactive code")
+                return
+            video = result['video']
+            entry = cache.lookup(video['id'], video)
+            if entry is None:
+                # First play streams from the origin while the cache fills
+                cache.fetch_in_background(video)
+                self.send_response(302)
+                self.send_header("Location", cache.client.file_url(video['filePath']))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        try:
+            self._send_file(entry, head)
+        except (BrokenPipeError, ConnectionResetError):
+            # Players routinely drop connections when seeking
+            self.close_connection = True
+
+    def _send_file(self, entry: CachedVideo, head: bool):
+        try:
+            f = open(entry.path, 'rb')
+        except FileNotFoundError:
+            # Evicted after the lookup
+            self.send_error(404, "Video not cached")
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            etag = f'"{entry.sha256}"'
+            header = self.headers.get("Range")
+            if self.headers.get("If-Range") not in (None, etag):
+                header = None
+            try:
+                byte_range = parse_range(header, size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            start, end = byte_range or (0, size - 1)
+            self.send_response(206 if byte_range else 200)
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Type", entry.content_type)
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.end_headers()
+
+            if start == 0 and not head:
+                # Players fetch the start once per play, then seek with ranges
+                self.server.cache.touch(entry.sha256)
+            if not head and end >= start:
+                self.connection.sendfile(f, start, end - start + 1)
+
+
+class CacheServer(ThreadingHTTPServer):
+    """
+    HTTP server for a local player
+
+    GET /videos/<video id> serves a cached video; GET /codes/<code value>
+    resolves the code (through a CodeResolver, so offline too) and serves its
+    video, redirecting to the origin and caching it in the background when it
+    is not cached yet. Both support single Range requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], cache: VideoCache, resolver: CodeResolver):
+        super().__init__(address, _CacheRequestHandler)
+        self.cache = cache
+        self.resolver = resolver
+
+
+def serve_cache(cache: VideoCache, host: str = '127.0.0.1', port: int = 8090,
+                resolver: Optional[CodeResolver] = None):
+    """
+    Serve the cache to a local player until interrupted
+
+    Args:
+        cache: VideoCache to serve
+        host: Address to listen on (default: 127.0.0.1)
+        port: Port to listen on (default: 8090)
+        resolver: CodeResolver for /codes/ requests (default: one with the
+            standard on-disk cache)
+    """
+    owns_resolver = resolver is None
+    if resolver is None:
+        resolver = CodeResolver(cache.client)
+    server = CacheServer((host, port), cache, resolver)
+    print(f"Serving {len(cache.entries())} cached videos on http://{host}:{server.server_port}/")
+    print(f"  /videos/<video id>, /codes/<code value>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        server.server_close()
+        if owns_resolver:
+            resolver.close()
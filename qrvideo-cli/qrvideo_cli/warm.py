@@ -0,0 +1,220 @@
+"""Cache warming of resolve lookups and video first bytes"""
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+
+from .api import QRVideoClient
+from .loadtest import percentile
+from .paging import iter_all_items
+from .throttle import format_bytes
+
+
+DEFAULT_FIRST_BYTES = 2 * 1024 * 1024
+
+# Response headers reverse proxies and CDNs use to report cache hits
+CACHE_STATUS_HEADERS = ("CF-Cache-Status", "X-Cache-Status", "X-Cache", "X-Proxy-Cache")
+
+
+def scan_popularity(
+    client: QRVideoClient,
+    max_scans: int = 100000,
+    page_size: Optional[int] = None
+) -> Counter:
+    """
+    Count scans per code value over the most recent scan logs
+
+    Args:
+        client: QRVideoClient instance
+        max_scans: Number of most recent scans to count
+        page_size: Scan logs per request (default: tuned automatically)
+
+    Returns:
+        Counter of code value -> scans
+    """
+    counts: Counter = Counter()
+    if max_scans <= 0:
+        return counts
+    logs = iter_all_items(client.list_scan_logs, page_size)
+    try:
+        for idx, log in enumerate(logs, 1):
+            counts[log['codeValue']] += 1
+            if idx >= max_scans:
+                break
+    finally:
+        logs.close()
+    return counts
+
+
+class _WarmStats:
+    """Counters shared by warm workers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.resolved = 0
+        self.invalid: List[str] = []
+        self.failed: List[str] = []
+        self.videos = 0
+        self.video_failures = 0
+        self.bytes = 0
+        self.resolve_latencies: List[float] = []
+        self.first_byte_latencies: List[float] = []
+        self.cache_status: Counter = Counter()
+
+
+def _cache_status(response: requests.Response) -> str:
+    for header in CACHE_STATUS_HEADERS:
+        value = response.headers.get(header)
+        if value:
+            return value.split(",")[0].strip().upper()
+    return "unreported"
+
+
+def _warm_video(client: QRVideoClient, file_path: str, first_bytes: int, stats: _WarmStats):
+    """Fetch the first bytes of a video file through the proxy/CDN"""
+    started = time.perf_counter()
+    response = client.open_file(file_path, headers={"Range": f"bytes=0-{first_bytes - 1}"})
+    if response is None:
+        with stats.lock:
+            stats.video_failures += 1
+        return
+
+    first_byte = time.perf_counter() - started
+    received = 0
+    try:
+        # A server without Range support answers 200; stop after first_bytes
+        for chunk in client._iter_body(response):
+            received += len(chunk)
+            if received >= first_bytes:
+                break
+    except requests.RequestException:
+        with stats.lock:
+            stats.video_failures += 1
+        return
+    finally:
+        response.close()
+
+    with stats.lock:
+        stats.videos += 1
+        stats.bytes += min(received, first_bytes)
+        stats.first_byte_latencies.append(first_byte)
+        stats.cache_status[_cache_status(response)] += 1
+
+
+def warm_caches(
+    client: QRVideoClient,
+    workers: int = 8,
+    first_bytes: int = DEFAULT_FIRST_BYTES,
+    scan_window: int = 100000,
+    video_id: Optional[str] = None,
+    page_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Resolve every active QR code and prefetch the start of its video
+
+    Codes are processed most-scanned first, by popularity over the last
+    scan_window scans, so the codes that matter most are warm earliest.
+    Each video is fetched once, with a Range request for its first bytes,
+    however many codes point at it.
+
+    Every resolve is recorded by the server as a scan.
+
+    Args:
+        client: QRVideoClient instance
+        workers: Concurrent requests (default: 8)
+        first_bytes: Bytes to fetch from the start of each video (default: 2 MB)
+        scan_window: Recent scans used for ordering; 0 keeps list order
+        video_id: Only warm the QR codes of one video
+        page_size: Items per list request (default: tuned automatically)
+
+    Returns:
+        Dictionary with resolved, invalid, failed, videos and bytes counts
+    """
+    print("Fetching QR codes...")
+    qrcodes = [qr for qr in iter_all_items(client.list_qrcodes, page_size, video_id=video_id, records=True)
+               if qr.get('isActive', True)]
+
+    if scan_window > 0:
+        print(f"Ranking by the last {scan_window} scans...")
+        popularity = scan_popularity(client, scan_window, page_size)
+        # Stable sort keeps list order among codes with equal counts
+        qrcodes.sort(key=lambda qr: popularity.get(qr['codeValue'], 0), reverse=True)
+
+    print(f"Warming {len(qrcodes)} QR codes with {workers} workers "
+          f"(first {format_bytes(first_bytes)} of each video)...")
+    print("⚠ Every resolve is recorded by the server as a scan")
+
+    stats = _WarmStats()
+    warmed_videos: Set[str] = set()
+    done = [0]
+    started = time.monotonic()
+
+    def warm_code(qr: Dict[str, Any]):
+        code = qr['codeValue']
+        resolve_started = time.perf_counter()
+        try:
+            result = client.resolve_code(code)
+        except (requests.RequestException, ValueError) as e:
+            with stats.lock:
+                stats.failed.append(code)
+            print(f"✗ {code}: {e}")
+            result = None
+        else:
+            with stats.lock:
+                stats.resolve_latencies.append(time.perf_counter() - resolve_started)
+                if result is None:
+                    stats.invalid.append(code)
+                else:
+                    stats.resolved += 1
+
+        video = (result or {}).get('video') or {}
+        file_path = video.get('filePath')
+        if file_path and first_bytes > 0:
+            with stats.lock:
+                claimed = video['id'] not in warmed_videos
+                warmed_videos.add(video['id'])
+            if claimed:
+                _warm_video(client, file_path, first_bytes, stats)
+
+        with stats.lock:
+            done[0] += 1
+            if done[0] % 1000 == 0:
+                print(f"  {done[0]}/{len(qrcodes)} codes, {stats.videos} videos warmed")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # The executor starts tasks in submission order, i.e. by popularity
+        list(executor.map(warm_code, qrcodes))
+    elapsed = time.monotonic() - started
+
+    resolve_times = sorted(stats.resolve_latencies)
+    first_byte_times = sorted(stats.first_byte_latencies)
+    print(f"\n{'='*60}")
+    print(f"Warm Summary:")
+    print(f"  Codes resolved: {stats.resolved}")
+    print(f"  Invalid codes: {len(stats.invalid)}")
+    print(f"  Failed: {len(stats.failed)}")
+    print(f"  Videos warmed: {stats.videos} ({format_bytes(stats.bytes)})")
+    if stats.video_failures:
+        print(f"  Video fetch failures: {stats.video_failures}")
+    print(f"  Resolve latency: p50 {percentile(resolve_times, 50) * 1000:.1f} ms, "
+          f"p95 {percentile(resolve_times, 95) * 1000:.1f} ms")
+    if first_byte_times:
+        print(f"  Video first byte: p50 {percentile(first_byte_times, 50) * 1000:.1f} ms, "
+              f"p95 {percentile(first_byte_times, 95) * 1000:.1f} ms")
+    if stats.cache_status:
+        print(f"  Cache status: {', '.join(f'{k} {v}' for k, v in stats.cache_status.most_common())}")
+    print(f"  Time: {elapsed:.1f}s")
+    for code in stats.invalid[:10]:
+        print(f"  ⚠ Listed as active but not resolvable: {code}")
+
+    return {
+        "resolved": stats.resolved,
+        "invalid": len(stats.invalid),
+        "failed": len(stats.failed),
+        "videos": stats.videos,
+        "bytes": stats.bytes,
+    }
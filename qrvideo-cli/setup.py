@@ -20,6 +20,9 @@ setup(
     install_requires=[
         "requests>=2.31.0",
     ],
+    extras_require={
+        "imaging": ["numpy>=1.20"],
+    },
     entry_points={
         "console_scripts": [
             "qrvideo=qrvideo_cli.cli:main",
@@ -0,0 +1,94 @@
+"""Resuming a logs export after logs were deleted on the server"""
+
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from qrvideo_cli.logarchive import export_logs, iter_archive
+
+
+class FakeLogServer:
+    """Scan logs listed newest first with offset paging, like the API"""
+
+    base_url = "http://fake/api"
+
+    def __init__(self):
+        self.logs = []
+        self.added = 0
+        self.clock = datetime(2026, 1, 1)
+        self.on_fetch = None
+
+    def add(self, count: int):
+        for _ in range(count):
+            self.clock += timedelta(hours=1)
+            self.added += 1
+            self.logs.append({"id": f"log-{self.added:05d}",
+                              "timestamp": self.clock.strftime("%Y-%m-%dT%H:%M:%SZ")})
+
+    def list_scan_logs(self, page, page_size):
+        if self.on_fetch:
+            self.on_fetch()
+        newest = self.logs[::-1]
+        return {"items": newest[(page - 1) * page_size:page * page_size], "page": page,
+                "pageSize": page_size, "totalCount": len(self.logs)}
+
+
+class DeletedLogsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = FakeLogServer()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def export(self):
+        return export_logs(self.server, self.tmp.name, kinds=("scans",), workers=3, page_size=10)["scans"]
+
+    def archived_ids(self):
+        return [log["id"] for log in iter_archive(self.tmp.name, "scans")]
+
+    def test_resume_after_cascade_delete(self):
+        self.server.add(130)
+        self.export()
+        everything = {log["id"] for log in self.server.logs}
+
+        # Deleting QR codes deletes their scan logs, all on sealed days here
+        for log in self.server.logs[5:90:5]:
+            self.server.logs.remove(log)
+        self.server.add(30)
+        everything |= {log["id"] for log in self.server.logs}
+
+        result = self.export()
+        self.assertIsNone(result["error"])
+        ids = self.archived_ids()
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), everything)
+
+    def test_delete_during_export(self):
+        self.server.add(130)
+        self.export()
+        self.server.add(60)
+
+        fetches = []
+
+        def delete_older():
+            # After the first page, the ID check and the first planned page
+            fetches.append(1)
+            if len(fetches) == 3:
+                del self.server.logs[10:20]
+        self.server.on_fetch = delete_older
+
+        result = self.export()
+        self.assertIsNotNone(result["error"])
+
+        # The next run completes the archive
+        self.server.on_fetch = None
+        self.assertIsNone(self.export()["error"])
+        ids = self.archived_ids()
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertTrue({log["id"] for log in self.server.logs} <= set(ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""MP4 parsing of malformed files and bulk upload of them"""
+
+import os
+import struct
+import tempfile
+import unittest
+
+from qrvideo_cli.batch import bulk_upload_videos
+from qrvideo_cli.mp4 import Mp4Error, faststart, read_movie_info
+
+
+def box(box_type: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+def movie(stco_payload: bytes) -> bytes:
+    """A non-faststart MP4 (mdat before moov) with the given stco payload"""
+    mvhd = box(b"mvhd", bytes(4) + bytes(8) + struct.pack(">II", 1000, 5000) + bytes(80))
+    stbl = box(b"stbl", box(b"stco", stco_payload))
+    trak = box(b"trak", box(b"mdia", box(b"minf", stbl)))
+    return (box(b"ftyp", b"isom" + bytes(4) + b"isom") + box(b"mdat", bytes(32))
+            + box(b"moov", mvhd + trak))
+
+
+class FakeClient:
+    """Records uploads; fails those whose file name contains 'fail'"""
+
+    tracer = None
+    limiter = None
+
+    def __init__(self):
+        self.uploaded = []
+
+    def upload_video(self, title, file_path, description=None, file_name=None, duration=None):
+        if "fail" in file_name:
+            raise RuntimeError("connection reset")
+        self.uploaded.append(file_name)
+        return {"id": title, "title": title}
+
+
+class TruncatedBoxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_missing_entry_count(self):
+        data = movie(bytes(4))
+        with self.assertRaises(Mp4Error):
+            read_movie_info(data)
+        path = self.write("corrupt.mp4", data)
+        with self.assertRaises(Mp4Error):
+            faststart(path, os.path.join(self.tmp.name, "out.mp4"))
+
+    def test_entry_count_past_box(self):
+        data = movie(bytes(4) + struct.pack(">I", 1000) + struct.pack(">I", 8))
+        with self.assertRaises(Mp4Error):
+            read_movie_info(data)
+
+    def test_truncated_mvhd(self):
+        data = box(b"moov", box(b"mvhd", bytes(12)))
+        with self.assertRaises(Mp4Error):
+            read_movie_info(data)
+
+    def test_bulk_upload_keeps_going(self):
+        # One worker: a file that fails must not stop the ones after it
+        source = os.path.join(self.tmp.name, "videos")
+        os.mkdir(source)
+        for name, size in (("a-corrupt.mp4", 0), ("b-fail.mp4", 4096), ("c-good.mp4", 8)):
+            data = movie(bytes(4)) if size == 0 else bytes(size)
+            with open(os.path.join(source, name), 'wb') as f:
+                f.write(data)
+
+        client = FakeClient()
+        results = bulk_upload_videos(client, source, workers=1, preflight=False)
+
+        self.assertEqual(sorted(client.uploaded), ["a-corrupt.mp4", "c-good.mp4"])
+        self.assertEqual(results["failed"], ["b-fail.mp4"])
+        self.assertEqual(len(results["success"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
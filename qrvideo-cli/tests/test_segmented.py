@@ -0,0 +1,156 @@
+"""Segmented Range downloads against a local HTTP file server"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from qrvideo_cli.api import QRVideoClient
+from qrvideo_cli.segmented import SegmentedReader, download_segmented, open_first_segment
+
+
+BODY = os.urandom(300 * 1024 + 123)
+SEGMENT = 64 * 1024
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    """Serves BODY at /videos/test.mp4, honouring Range unless told otherwise"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        if self.path != "/videos/test.mp4":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        with server.lock:
+            server.ranges.append(self.headers.get("Range"))
+        if not match or not server.honour_range:
+            return self._send(200, BODY, {})
+
+        start = int(match.group(1))
+        end = min(int(match.group(2) or len(BODY) - 1), len(BODY) - 1)
+        body = BODY[start:end + 1]
+        with server.lock:
+            drop = start in server.drop_at
+            server.drop_at.discard(start)
+        headers = {"Content-Range": f"bytes {start}-{end}/{len(BODY)}"}
+        if drop:
+            # Announce the whole range but hang up halfway through it
+            self._send(206, body, headers, length=len(body) // 2)
+            self.close_connection = True
+            return
+        self._send(206, body, headers)
+
+    def _send(self, status, body, headers, length=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body[:length])
+
+
+class SegmentedDownloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FileHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.ranges = []
+        self.server.drop_at = set()
+        self.server.honour_range = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        self.client = QRVideoClient(f"http://127.0.0.1:{self.server.server_address[1]}/api")
+        # Small chunks, so a dropped transfer has delivered some before it breaks
+        self.client.download_chunk_size = 4096
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, "test.mp4")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def download(self, **kwargs):
+        return download_segmented(self.client, "/videos/test.mp4", self.output, connections=3,
+                                  segment_size=SEGMENT, expected_size=len(BODY),
+                                  expected_sha256=hashlib.sha256(BODY).hexdigest(), **kwargs)
+
+    def read_output(self):
+        with open(self.output, 'rb') as f:
+            return f.read()
+
+    def test_range_download(self):
+        digest = hashlib.sha256()
+        self.assertEqual(self.download(digest=digest), len(BODY))
+        self.assertEqual(self.read_output(), BODY)
+        self.assertEqual(digest.hexdigest(), hashlib.sha256(BODY).hexdigest())
+
+        expected = {f"bytes={start}-{min(start + SEGMENT, len(BODY)) - 1}"
+                    for start in range(0, len(BODY), SEGMENT)}
+        self.assertEqual(set(self.server.ranges), expected)
+        self.assertEqual(len(self.server.ranges), len(expected))
+
+    def test_resume_after_dropped_connection(self):
+        self.server.drop_at = {0, 2 * SEGMENT}
+
+        self.assertEqual(self.download(), len(BODY))
+        self.assertEqual(self.read_output(), BODY)
+
+        # Each dropped range is resumed from its last received chunk, not refetched
+        resumed = sorted((int(start), int(end)) for start, end in
+                         (re.fullmatch(r"bytes=(\d+)-(\d+)", r).groups() for r in self.server.ranges)
+                         if int(start) % SEGMENT)
+        self.assertEqual(len(resumed), 2)
+        for (start, end), segment in zip(resumed, (0, 2 * SEGMENT)):
+            self.assertGreater(start, segment)
+            self.assertLessEqual(start, segment + SEGMENT // 2)
+            self.assertEqual(end, segment + SEGMENT - 1)
+
+    def test_single_stream_fallback(self):
+        self.server.honour_range = False
+
+        self.assertEqual(self.download(), len(BODY))
+        self.assertEqual(self.read_output(), BODY)
+        self.assertEqual(len(self.server.ranges), 1)
+
+    def test_size_mismatch(self):
+        result = download_segmented(self.client, "/videos/test.mp4", self.output,
+                                    segment_size=SEGMENT, expected_size=len(BODY) + 1)
+        self.assertIsNone(result)
+
+    def test_segmented_reader(self):
+        self.server.drop_at = {SEGMENT}
+        first = open_first_segment(self.client, "/videos/test.mp4", SEGMENT)
+        self.assertEqual(first.status_code, 206)
+
+        reader = SegmentedReader(self.client, "/videos/test.mp4", first, connections=2, segment_size=SEGMENT)
+        try:
+            self.assertEqual(reader.size, len(BODY))
+            blocks = []
+            while True:
+                block = reader.read(10000)
+                if not block:
+                    break
+                blocks.append(block)
+        finally:
+            reader.close()
+        self.assertEqual(b"".join(blocks), BODY)
+
+
+if __name__ == '__main__':
+    unittest.main()